@@ -1 +1,36 @@
-﻿from django.contrib import admin
+﻿from django import forms
+from django.contrib import admin
+from .models import ConfiguracionSistema, ConflictoConcurrencia
+
+
+class VersionadoAdminForm(forms.ModelForm):
+    """
+    Formulario de admin para modelos con VersionadoModel: envía oculta la
+    versión que se mostró y el guardado compara contra ella, no contra la
+    releída al recibir el POST.
+    """
+    version_leida = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['version_leida'].initial = self.instance.version
+
+    def clean(self):
+        datos  = super().clean()
+        leida  = datos.get('version_leida')
+        if self.instance.pk and leida is not None:
+            actual = type(self.instance)._base_manager.filter(
+                pk=self.instance.pk).values_list('version', flat=True).first()
+            if actual != leida:
+                raise ConflictoConcurrencia()
+            # save() repite la comparación de forma atómica al escribir
+            self.instance.version = leida
+        return datos
+
+
+@admin.register(ConfiguracionSistema)
+class ConfiguracionSistemaAdmin(admin.ModelAdmin):
+    list_display = ['clave', 'valor', 'tipo', 'is_active', 'updated_at']
+    list_filter = ['tipo', 'is_active']
+    search_fields = ['clave', 'descripcion']
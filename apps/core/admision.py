@@ -0,0 +1,169 @@
+"""
+============================================================
+  ADMISIÓN: apps.core
+  Sala de espera para el día de apertura de matrículas
+============================================================
+
+Cada clase de vistas (settings.ADMISION['CLASES']) tiene un cupo de
+usuarios admitidos a la vez. Quien llega con la clase llena recibe un
+turno (TurnoAdmision, FIFO por id) y una página liviana que sondea su
+posición; al liberarse cupo se admite a los primeros de la cola.
+
+Un usuario admitido lleva un pase en una cookie firmada y no vuelve a
+tocar la base de datos hasta que el pase vence. El personal (is_staff)
+no pasa por la sala de espera.
+"""
+from datetime import timedelta
+
+import shortuuid
+from django.conf import settings
+from django.core import signing
+from django.db import connection, transaction
+from django.shortcuts import render
+from django.utils import timezone
+
+from .models import TurnoAdmision
+
+SAL_COOKIE = 'sfq.admision'
+
+
+def configuracion():
+    conf = {
+        'ACTIVA':        True,
+        'DURACION_PASE': 900,
+        'ABANDONO':      60,
+        'SONDEO':        5,
+        'CLASES':        {},
+    }
+    conf.update(getattr(settings, 'ADMISION', {}))
+    return conf
+
+
+def clase_de_vista(view_name):
+    """Clase de admisión a la que pertenece una vista ('app:nombre'), o None."""
+    for clase, datos in configuracion()['CLASES'].items():
+        if view_name in datos['vistas']:
+            return clase
+    return None
+
+
+def nombre_cookie(clase):
+    return f'admision_{clase}'
+
+
+# ─── Cola ─────────────────────────────────────────────────────────────────────
+
+def _bloquear_clase(clase):
+    """Serializa las decisiones de admisión de una clase entre procesos."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', [f'admision:{clase}'])
+
+
+def evaluar_turno(clase, token=None):
+    """
+    Registra el sondeo del turno `token` (o crea uno nuevo) y lo admite si
+    hay cupo y está entre los primeros de la cola. Devuelve el turno con
+    el atributo `posicion` (0 si fue admitido).
+    """
+    conf  = configuracion()
+    cupo  = conf['CLASES'][clase]['cupo']
+    ahora = timezone.now()
+
+    with transaction.atomic():
+        _bloquear_clase(clase)
+        turno = TurnoAdmision.objects.filter(clase=clase, token=token).first() if token else None
+        if turno is None:
+            turno = TurnoAdmision.objects.create(
+                clase=clase, token=shortuuid.uuid(), ultimo_sondeo=ahora,
+            )
+        elif turno.admitido_hasta and turno.admitido_hasta > ahora:
+            turno.posicion = 0
+            return turno
+        else:
+            # Pase vencido: vuelve a la cola conservando su lugar original
+            turno.admitido_hasta = None
+            turno.ultimo_sondeo  = ahora
+
+        admitidos = TurnoAdmision.objects.filter(clase=clase, admitido_hasta__gt=ahora).count()
+        posicion  = TurnoAdmision.objects.filter(
+            clase=clase,
+            admitido_hasta__isnull=True,
+            ultimo_sondeo__gte=ahora - timedelta(seconds=conf['ABANDONO']),
+            pk__lt=turno.pk,
+        ).count()
+
+        if posicion < cupo - admitidos:
+            turno.admitido_hasta = ahora + timedelta(seconds=conf['DURACION_PASE'])
+            turno.posicion = 0
+        else:
+            turno.posicion = posicion + 1
+        turno.save(update_fields=['admitido_hasta', 'ultimo_sondeo'])
+    return turno
+
+
+def leer_pase(request, clase):
+    """(token, vigente) según la cookie firmada de la clase."""
+    try:
+        token, hasta = request.get_signed_cookie(nombre_cookie(clase), salt=SAL_COOKIE).split(':')
+    except (KeyError, signing.BadSignature, ValueError):
+        return None, False
+    return token, float(hasta) > timezone.now().timestamp()
+
+
+def guardar_pase(response, turno):
+    """Guarda en la cookie el token del turno y, si aplica, el vencimiento del pase."""
+    hasta = turno.admitido_hasta.timestamp() if turno.admitido_hasta else 0
+    response.set_signed_cookie(
+        nombre_cookie(turno.clase), f'{turno.token}:{hasta:.0f}', salt=SAL_COOKIE,
+        max_age=configuracion()['DURACION_PASE'] * 4, httponly=True, samesite='Lax',
+    )
+    return response
+
+
+# ─── Middleware ───────────────────────────────────────────────────────────────
+
+class SalaEsperaMiddleware:
+    """
+    Control de admisión por clase de vistas. Debe ir después de
+    AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        turno = getattr(request, '_turno_admitido', None)
+        if turno is not None:
+            guardar_pase(response, turno)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not configuracion()['ACTIVA'] or request.resolver_match is None:
+            return None
+        clase = clase_de_vista(request.resolver_match.view_name)
+        if clase is None:
+            return None
+        user = request.user
+        if not user.is_authenticated or user.is_staff:
+            return None
+
+        token, vigente = leer_pase(request, clase)
+        if vigente:
+            return None
+
+        turno = evaluar_turno(clase, token)
+        if turno.posicion == 0:
+            request._turno_admitido = turno
+            return None
+
+        response = render(request, 'core/sala_espera.html', {
+            'clase':     clase,
+            'posicion':  turno.posicion,
+            'sondeo':    configuracion()['SONDEO'],
+            'siguiente': request.get_full_path(),
+        })
+        response['Cache-Control'] = 'no-store'
+        response['Retry-After']   = str(configuracion()['SONDEO'])
+        return guardar_pase(response, turno)
@@ -0,0 +1,85 @@
+"""
+============================================================
+  API: apps.core
+  Utilidades compartidas por las vistas DRF del sistema
+============================================================
+"""
+from django.core.exceptions import ValidationError
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import ConflictoConcurrencia
+from .utils import etag_de, sello_queryset
+
+try:
+    from rest_framework import status
+    from rest_framework.response import Response
+    from rest_framework.views import exception_handler
+
+    def manejador_excepciones(exc, context):
+        """
+        Traduce las excepciones de dominio a respuestas HTTP:
+        ConflictoConcurrencia → 409, ValidationError de Django → 400.
+        El resto lo resuelve el manejador por defecto de DRF.
+        """
+        if isinstance(exc, ConflictoConcurrencia):
+            return Response({'detail': exc.messages[0]}, status=status.HTTP_409_CONFLICT)
+        if isinstance(exc, ValidationError):
+            return Response({'detail': exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return exception_handler(exc, context)
+
+    class RespuestaCondicionalMixin:
+        """
+        GET condicional para ViewSets: agrega ETag a `list`/`retrieve` y
+        responde 304 si el cliente ya tiene la representación vigente.
+        El validador sale de un agregado sobre el queryset filtrado
+        (ver `sello_queryset`), sin cargar ni serializar los objetos.
+
+        `modelos_relacionados`: modelos cuyo cambio altera la representación
+        (p. ej. el nombre del nivel dentro de un paralelo).
+        """
+        modelos_relacionados = ()
+
+        def validador_condicional(self, queryset):
+            return [sello_queryset(queryset)] + [
+                sello_queryset(modelo.objects.all()) for modelo in self.modelos_relacionados
+            ]
+
+        def responder_condicional(self, request, validador, construir, ultima_modificacion=None):
+            """
+            Devuelve 304 si el validador coincide con If-None-Match
+            (o If-Modified-Since); si no, llama a `construir()`.
+            """
+            etag = etag_de(*validador)
+            marca = ultima_modificacion.timestamp() if ultima_modificacion else None
+            respuesta = get_conditional_response(request, etag=etag, last_modified=marca)
+            if respuesta is None:
+                respuesta = construir()
+            if 200 <= respuesta.status_code < 300 or respuesta.status_code == 304:
+                respuesta['ETag'] = etag
+                if marca is not None:
+                    respuesta['Last-Modified'] = http_date(marca)
+                patch_cache_control(respuesta, private=True, no_cache=True)
+            return respuesta
+
+        def list(self, request, *args, **kwargs):
+            construir = super().list
+            validador = self.validador_condicional(self.filter_queryset(self.get_queryset()))
+            return self.responder_condicional(
+                request, validador, lambda: construir(request, *args, **kwargs),
+            )
+
+        def retrieve(self, request, *args, **kwargs):
+            construir = super().retrieve
+            lookup    = self.lookup_url_kwarg or self.lookup_field
+            queryset  = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup]}
+            )
+            validador = self.validador_condicional(queryset)
+            return self.responder_condicional(
+                request, validador, lambda: construir(request, *args, **kwargs),
+                ultima_modificacion=validador[0][0] if len(validador) == 1 else None,
+            )
+
+except ImportError:
+    pass
@@ -4,3 +4,7 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
     verbose_name = 'Core'
+
+    def ready(self):
+        # Conecta las señales que invalidan los catálogos cacheados
+        from . import catalogos  # noqa: F401
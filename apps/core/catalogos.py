@@ -0,0 +1,148 @@
+"""
+============================================================
+  CATÁLOGOS: apps.core
+  Cache por proceso de Nivel y TipoDocumento
+============================================================
+
+Los catálogos cambian pocas veces al año y se consultan en cada
+formulario y listado. Cada proceso guarda una copia completa como
+registros inmutables (namedtuples), indexada por pk y por las claves
+declaradas (p. ej. `codigo`); las lecturas no consultan la base.
+
+Invalidación:
+
+  - post_save / post_delete del modelo descartan la copia del proceso al
+    confirmar la transacción;
+  - los demás procesos comparan cada REVISION_SEGUNDOS una huella barata
+    (COUNT + MAX(updated_at)) y recargan si cambió.
+
+Un queryset.update() no emite señales ni, si omite updated_at, cambia la
+huella: los cambios masivos a un catálogo deben llamar a `descartar()`.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+
+from . import metricas
+
+REVISION_SEGUNDOS = 5
+
+Copia = namedtuple('Copia', 'huella revisada ordenados por_pk por_clave')
+
+
+class Catalogo:
+    """Lectura de un modelo de catálogo completo desde memoria."""
+
+    def __init__(self, modelo, registro, claves=(), orden=('orden',)):
+        self.modelo   = modelo          # 'app_label.Modelo'
+        self.registro = registro        # namedtuple cuyos campos son columnas del modelo
+        self.claves   = tuple(claves)
+        self.orden    = tuple(orden)
+        self._copia   = None
+        self._candado = threading.Lock()
+        for senal in (post_save, post_delete):
+            senal.connect(self._al_cambiar, sender=modelo, weak=False,
+                          dispatch_uid=f'catalogo:{modelo}')
+
+    def _al_cambiar(self, **kwargs):
+        transaction.on_commit(self.descartar)
+
+    def descartar(self):
+        self._copia = None
+
+    def _huella(self, modelo):
+        datos = modelo._default_manager.aggregate(n=Count('pk'), ultimo=Max('updated_at'))
+        return datos['n'], datos['ultimo']
+
+    def _cargar(self, modelo, huella):
+        filas = (modelo._default_manager.order_by(*self.orden)
+                 .values_list(*self.registro._fields))
+        ordenados = tuple(self.registro(*fila) for fila in filas)
+        return Copia(
+            huella=huella,
+            revisada=time.monotonic(),
+            ordenados=ordenados,
+            por_pk={r.pk: r for r in ordenados},
+            por_clave={c: {getattr(r, c): r for r in ordenados} for c in self.claves},
+        )
+
+    def _vigente(self):
+        copia = self._copia
+        if copia is not None and time.monotonic() - copia.revisada < REVISION_SEGUNDOS:
+            return copia
+        with self._candado:
+            copia = self._copia
+            if copia is not None and time.monotonic() - copia.revisada < REVISION_SEGUNDOS:
+                return copia
+            modelo = apps.get_model(self.modelo)
+            huella = self._huella(modelo)
+            vigente = copia is not None and copia.huella == huella
+            metricas.cache_consultada(f'catalogo:{self.modelo}', vigente)
+            if vigente:
+                copia = copia._replace(revisada=time.monotonic())
+            else:
+                copia = self._cargar(modelo, huella)
+            self._copia = copia
+        return copia
+
+    # ─── Lecturas ─────────────────────────────────────────────────────────────
+    def todos(self):
+        return self._vigente().ordenados
+
+    def activos(self):
+        return tuple(r for r in self.todos() if r.is_active)
+
+    def get(self, pk, default=None):
+        try:
+            return self._vigente().por_pk.get(int(pk), default)
+        except (TypeError, ValueError):
+            return default
+
+    def por(self, clave, valor, default=None):
+        return self._vigente().por_clave[clave].get(valor, default)
+
+    def opciones(self, vacio='---------'):
+        """Choices para un ModelChoiceField sin consultar la base al renderizar."""
+        opciones = [(r.pk, str(r)) for r in self.activos()]
+        return [('', vacio)] + opciones if vacio is not None else opciones
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Registros
+# ─────────────────────────────────────────────────────────────────────────────
+
+class NivelRegistro(namedtuple('NivelRegistro',
+                               'pk nombre subnivel orden descripcion is_active')):
+    __slots__ = ()
+
+    def __str__(self):
+        return self.nombre
+
+
+class TipoDocumentoRegistro(namedtuple('TipoDocumentoRegistro', [
+        'pk', 'codigo', 'nombre', 'descripcion', 'orden', 'es_obligatorio',
+        'aplica_primera_vez', 'aplica_renovacion', 'aplica_traslado',
+        'aplica_discapacidad', 'formatos_permitidos', 'tamano_maximo_mb', 'is_active'])):
+    __slots__ = ()
+
+    def __str__(self):
+        obligatorio = '(*) ' if self.es_obligatorio else ''
+        return f'{obligatorio}{self.nombre}'
+
+    @property
+    def extensiones_lista(self):
+        return [ext.strip().lower() for ext in self.formatos_permitidos.split(',')]
+
+    def aplica_para_matricula(self, matricula):
+        from apps.documentos.models import tipo_aplica_para_matricula
+        return tipo_aplica_para_matricula(self, matricula)
+
+
+NIVELES         = Catalogo('periodos.Nivel', NivelRegistro)
+TIPOS_DOCUMENTO = Catalogo('documentos.TipoDocumento', TipoDocumentoRegistro,
+                           claves=['codigo'], orden=['orden', 'nombre'])
@@ -0,0 +1,123 @@
+"""
+============================================================
+  CONFIGURACIÓN: apps.core
+  Instantánea tipada de ConfiguracionSistema
+============================================================
+
+Todas las claves activas se cargan con una consulta en una instantánea
+inmutable por proceso, con los valores ya convertidos según `tipo`. Las
+lecturas siguientes son un acceso a diccionario.
+
+Guardar o eliminar una configuración incrementa VersionConfiguracion en la
+misma transacción. Cada proceso compara su versión con la de esa fila a lo
+sumo cada CONFIGURACION_REVISION_SEGUNDOS y recarga si cambió; el proceso
+que hizo el cambio recarga al confirmar, sin esperar.
+"""
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+from types import MappingProxyType
+
+from django.conf import settings
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+VERDADEROS = {'1', 'true', 'si', 'sí', 'yes', 'on'}
+FALSOS     = {'0', 'false', 'no', 'off', ''}
+
+Instantanea = namedtuple('Instantanea', 'version valores revisada')
+
+_actual  = None
+_candado = threading.Lock()
+
+
+def convertir(tipo, valor):
+    """Valor de texto convertido según `tipo`; ValueError si no es válido."""
+    if tipo == 'numero':
+        texto = valor.strip()
+        try:
+            return int(texto)
+        except ValueError:
+            pass
+        try:
+            return Decimal(texto)
+        except InvalidOperation:
+            raise ValueError(f'"{valor}" no es un número.')
+    if tipo == 'booleano':
+        texto = valor.strip().lower()
+        if texto in VERDADEROS:
+            return True
+        if texto in FALSOS:
+            return False
+        raise ValueError(f'"{valor}" no es un booleano (use true/false, 1/0, sí/no).')
+    if tipo == 'json':
+        try:
+            return _congelar(json.loads(valor))
+        except json.JSONDecodeError as e:
+            raise ValueError(f'JSON inválido: {e}')
+    return valor
+
+
+def _congelar(valor):
+    """Listas y objetos JSON como tuplas y mappings de solo lectura."""
+    if isinstance(valor, dict):
+        return MappingProxyType({k: _congelar(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+
+def _version_actual():
+    from .models import VersionConfiguracion
+    return (VersionConfiguracion.objects.filter(pk=VersionConfiguracion.PK)
+            .values_list('numero', flat=True).first() or 0)
+
+
+def _cargar(version):
+    from .models import ConfiguracionSistema
+    valores = {}
+    for clave, valor, tipo in (ConfiguracionSistema.objects.filter(is_active=True)
+                               .values_list('clave', 'valor', 'tipo')):
+        try:
+            valores[clave] = convertir(tipo, valor)
+        except ValueError as e:
+            # Un valor inválido cargado por fuera del admin: se ignora y rige el default
+            logger.warning('Configuración "%s" ignorada: %s', clave, e)
+    return Instantanea(version, MappingProxyType(valores), time.monotonic())
+
+
+def instantanea():
+    """Instantánea vigente; consulta la versión solo si ya pasó el intervalo de revisión."""
+    global _actual
+    actual = _actual
+    intervalo = getattr(settings, 'CONFIGURACION_REVISION_SEGUNDOS', 5)
+    if actual is not None and time.monotonic() - actual.revisada < intervalo:
+        return actual
+    with _candado:
+        actual = _actual
+        if actual is not None and time.monotonic() - actual.revisada < intervalo:
+            return actual
+        version = _version_actual()
+        metricas.cache_consultada('configuracion', actual is not None and actual.version == version)
+        if actual is not None and actual.version == version:
+            actual = actual._replace(revisada=time.monotonic())
+        else:
+            actual = _cargar(version)
+        _actual = actual
+    return actual
+
+
+def obtener(clave, default=None):
+    """Valor tipado de la configuración `clave`, o `default` si no existe o está inactiva."""
+    return instantanea().valores.get(clave, default)
+
+
+def descartar():
+    """Fuerza la recarga en la próxima lectura (se llama al confirmar un cambio)."""
+    global _actual
+    _actual = None
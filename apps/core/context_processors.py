@@ -11,3 +11,9 @@ def school_info(request):
         'SCHOOL_CITY': getattr(settings, 'SCHOOL_CITY', 'Quito'),
         'SCHOOL_PROVINCE': getattr(settings, 'SCHOOL_PROVINCE', 'Pichincha'),
     }
+
+
+def configuracion(request):
+    """CONFIG.<clave> en los templates: valores tipados de ConfiguracionSistema."""
+    from .configuracion import instantanea
+    return {'CONFIG': instantanea().valores}
@@ -0,0 +1,122 @@
+"""
+============================================================
+  IDEMPOTENCIA: apps.core
+  Reintentos seguros de los POST de creación y transición
+============================================================
+
+La clave llega en la cabecera `Idempotency-Key` (clientes API) o en el
+campo oculto `clave_idempotencia` que agrega {% clave_idempotencia %}
+a cada formulario. El primer POST con una clave la registra EN_CURSO,
+ejecuta la vista y guarda el resultado: la redirección y los mensajes.
+Un reintento con la misma clave no vuelve a ejecutar nada:
+
+  - si la clave ya está COMPLETADA, reproduce la redirección y los mensajes;
+  - si sigue EN_CURSO (doble clic), responde 409 con Retry-After en el
+    acto: esperar a la primera ocuparía un hilo de gunicorn sin hacer
+    nada. Al reenviar (recargar la página repite el POST con la misma
+    clave) se reproduce el resultado ya guardado.
+
+Las respuestas que no son redirección (formulario con errores) y las
+excepciones liberan la clave, para que el usuario corrija y reenvíe.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils import timezone
+
+from .models import ClaveIdempotencia
+
+CAMPO    = 'clave_idempotencia'
+CABECERA = 'Idempotency-Key'
+
+
+def _huella(request):
+    """Resumen del contenido del POST, para detectar claves reutilizadas."""
+    partes = [request.path]
+    for nombre in sorted(request.POST):
+        if nombre not in (CAMPO, 'csrfmiddlewaretoken'):
+            partes.append(f'{nombre}={request.POST.getlist(nombre)}')
+    for nombre in sorted(request.FILES):
+        archivo = request.FILES[nombre]
+        partes.append(f'{nombre}:{archivo.name}:{archivo.size}')
+    return hashlib.sha256('\n'.join(partes).encode()).hexdigest()
+
+
+def _reproducir(request, registro):
+    for nivel, texto in registro.mensajes:
+        messages.add_message(request, nivel, texto)
+    if registro.ubicacion:
+        return HttpResponseRedirect(registro.ubicacion)
+    return HttpResponse(status=registro.codigo or 204)
+
+
+class IdempotenteMixin:
+    """
+    Hace idempotentes los POST de una vista basada en clases.
+    Va después de los mixins de permisos: `request.user` ya está autenticado.
+    """
+    reintentar_en = 2   # segundos sugeridos en Retry-After mientras la original sigue en curso
+
+    def dispatch(self, request, *args, **kwargs):
+        clave = None
+        if request.method == 'POST':
+            clave = request.headers.get(CABECERA) or request.POST.get(CAMPO)
+        if not clave or not request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+
+        clave  = clave[:64]
+        huella = _huella(request)
+        ttl    = getattr(settings, 'IDEMPOTENCIA_TTL_HORAS', 24)
+        try:
+            with transaction.atomic():
+                registro = ClaveIdempotencia.objects.create(
+                    usuario=request.user, clave=clave, ruta=request.path[:255], huella=huella,
+                    expira=timezone.now() + timedelta(hours=ttl),
+                )
+        except IntegrityError:
+            return self._responder_duplicado(request, clave, huella)
+
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except BaseException:
+            registro.delete()
+            raise
+
+        if not response.has_header('Location'):
+            registro.delete()
+            return response
+
+        almacen = getattr(request, '_messages', None)
+        registro.estado    = ClaveIdempotencia.ESTADO_COMPLETADA
+        registro.codigo    = response.status_code
+        registro.ubicacion = response['Location'][:255]
+        registro.mensajes  = [
+            [m.level, str(m.message)] for m in getattr(almacen, '_queued_messages', [])
+        ]
+        registro.save(update_fields=['estado', 'codigo', 'ubicacion', 'mensajes'])
+        return response
+
+    def _responder_duplicado(self, request, clave, huella):
+        registro = ClaveIdempotencia.objects.filter(usuario=request.user, clave=clave).first()
+        if registro is not None and registro.expira <= timezone.now():
+            registro.delete()
+            registro = None
+        if registro is None:
+            # La petición original falló (o la clave venció): se ejecuta esta
+            return self.dispatch(request, *self.args, **self.kwargs)
+        if registro.huella != huella:
+            return HttpResponse('La clave de idempotencia ya se usó con otra petición.',
+                                status=422, content_type='text/plain; charset=utf-8')
+        if registro.estado == ClaveIdempotencia.ESTADO_COMPLETADA:
+            return _reproducir(request, registro)
+        response = HttpResponse(
+            'La petición original aún se está procesando. '
+            'Vuelva a intentarlo en unos segundos.',
+            status=409, content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = str(self.reintentar_en)
+        return response
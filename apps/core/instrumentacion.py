@@ -0,0 +1,138 @@
+"""
+============================================================
+  INSTRUMENTACIÓN: apps.core
+  Consultas por petición y detección de N+1
+============================================================
+
+InstrumentacionMiddleware envuelve las conexiones con execute_wrapper y
+por cada petición cuenta las consultas, suma su duración y agrupa el SQL
+por huella (literales reemplazados por ?, listas IN colapsadas). Si la
+petición supera algún umbral de settings.INSTRUMENTACION se registra una
+advertencia en el logger `apps.core.instrumentacion` con las huellas más
+repetidas: una misma huella ejecutada muchas veces es un N+1.
+
+Al personal (is_staff) se le agrega la cabecera Server-Timing, visible en
+la pestaña de red del navegador:
+
+    Server-Timing: db;dur=12.4;desc="18 consultas", app;dur=40.1
+
+Cada petición alimenta además los histogramas de apps.core.metricas.
+
+Las consultas de un StreamingHttpResponse ocurren después de que el
+middleware responde y no se cuentan.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS    = re.compile(r'\((?:\s*(?:\?|%s)\s*,)+\s*(?:\?|%s)\s*\)')
+_ESPACIOS  = re.compile(r'\s+')
+
+
+def configuracion():
+    conf = {
+        'ACTIVA':            True,
+        'MAX_CONSULTAS':     50,    # consultas por petición
+        'MAX_REPETICIONES':  10,    # ejecuciones de una misma huella
+        'MAX_MS_DB':         500,   # tiempo total en la base
+        'SERVER_TIMING':     True,
+    }
+    conf.update(getattr(settings, 'INSTRUMENTACION', {}))
+    return conf
+
+
+def huella(sql):
+    """SQL normalizado: mismas consultas con distintos parámetros comparten huella."""
+    sql = _LITERALES.sub('?', sql)
+    sql = _LISTAS.sub('(...)', sql)
+    return _ESPACIOS.sub(' ', sql).strip()
+
+
+class Registro:
+    """Consultas ejecutadas dentro de un bloque `registrar_consultas`."""
+    __slots__ = ('total', 'segundos', 'huellas')
+
+    def __init__(self):
+        self.total    = 0
+        self.segundos = 0.0
+        self.huellas  = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.total    += 1
+            self.huellas[huella(sql)] += 1
+
+    @property
+    def milisegundos(self):
+        return self.segundos * 1000
+
+    def repetidas(self, minimo=2):
+        """[(huella, veces)] de las consultas ejecutadas al menos `minimo` veces."""
+        return [(sql, n) for sql, n in self.huellas.most_common() if n >= minimo]
+
+
+@contextmanager
+def registrar_consultas():
+    """Cuenta y cronometra las consultas de todas las conexiones dentro del bloque."""
+    registro = Registro()
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(registro))
+        yield registro
+
+
+class InstrumentacionMiddleware:
+    """
+    Mide las consultas de cada petición. Va al principio de MIDDLEWARE para
+    incluir las de sesión y autenticación.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        conf = configuracion()
+        if not conf['ACTIVA']:
+            return self.get_response(request)
+
+        inicio = time.perf_counter()
+        with registrar_consultas() as registro:
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        metricas.registrar_peticion(
+            coincidencia.view_name if coincidencia else 'sin_ruta', request.method,
+            response.status_code, total_ms / 1000, registro.segundos, registro.total,
+        )
+
+        repetidas = registro.repetidas(conf['MAX_REPETICIONES'])
+        if (registro.total > conf['MAX_CONSULTAS'] or repetidas
+                or registro.milisegundos > conf['MAX_MS_DB']):
+            logger.warning(
+                '%s %s: %d consultas, %.1f ms en la base, %.1f ms en total%s',
+                request.method, request.path, registro.total, registro.milisegundos, total_ms,
+                ''.join(f'\n  {n}× {sql[:300]}' for sql, n in repetidas[:5]),
+            )
+
+        user = getattr(request, 'user', None)
+        if conf['SERVER_TIMING'] and user is not None and user.is_authenticated and user.is_staff:
+            response['Server-Timing'] = (
+                f'db;dur={registro.milisegundos:.1f};desc="{registro.total} consultas", '
+                f'app;dur={total_ms - registro.milisegundos:.1f}'
+            )
+        return response
@@ -0,0 +1,628 @@
+"""
+Genera un conjunto de datos sintético de tamaño productivo para pruebas
+de carga y de escala.
+
+Uso:
+    python manage.py generar_datos_sinteticos [--estudiantes 200000] [--anios 3]
+        [--procesos 4] [--lote 2000] [--semilla 1] [--secretarias 8]
+        [--clave sinteticos] [--forzar]
+
+Crea (o reutiliza) los niveles, `--anios` períodos lectivos consecutivos
+hasta el actual (el último queda activo), los paralelos necesarios para
+~35 estudiantes por aula, los tipos de documento y las secretarias; luego
+reparte los estudiantes en bloques entre `--procesos` procesos. Cada
+bloque crea, con bulk_create y en una transacción:
+
+  - representantes (~1,6 estudiantes cada uno, con la contraseña --clave);
+  - estudiantes con cédulas ecuatorianas válidas (dígito verificador);
+  - una matrícula por año cursado, encadenadas con matricula_anterior, con
+    trayectorias plausibles (rechazos y reenvíos, anulaciones, abandonos) y
+    su HistorialMatricula con fechas coherentes: verificar_historial no
+    encuentra diferencias;
+  - para el período activo, los documentos de cada matrícula (apuntan a un
+    archivo de relleno por tipo, no a uno por documento) y las
+    notificaciones de cada cambio de estado.
+
+No se generan EventoMatricula: el despachador de webhooks los enviaría.
+Cada bloque usa su propio generador aleatorio derivado de --semilla, así
+que la misma semilla produce los mismos estudiantes y trayectorias con
+cualquier número de procesos (cambian solo los pk y los códigos). Semillas distintas usan rangos de cédulas y usuarios distintos
+y pueden cargarse sobre la misma base.
+
+Con DEBUG=False se niega a correr salvo con --forzar.
+"""
+import math
+import multiprocessing
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, time as hora, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from apps.documentos.models import DocumentoMatricula, TipoDocumento
+from apps.estudiantes.models import Estudiante
+from apps.matriculas.models import HistorialMatricula, Matricula
+from apps.notificaciones.models import Notificacion
+from apps.periodos.models import Nivel, Paralelo, PeriodoAcademico
+from apps.usuarios.models import Usuario
+
+# ─── Catálogos por defecto (solo si la base no tiene ninguno) ─────────────────
+
+NIVELES = [
+    ('1ro EGB', Nivel.SUBNIVEL_PREPARATORIA),
+    ('2do EGB', Nivel.SUBNIVEL_BASICA_ELEMENTAL),
+    ('3ro EGB', Nivel.SUBNIVEL_BASICA_ELEMENTAL),
+    ('4to EGB', Nivel.SUBNIVEL_BASICA_ELEMENTAL),
+    ('5to EGB', Nivel.SUBNIVEL_BASICA_MEDIA),
+    ('6to EGB', Nivel.SUBNIVEL_BASICA_MEDIA),
+    ('7mo EGB', Nivel.SUBNIVEL_BASICA_MEDIA),
+    ('8vo EGB', Nivel.SUBNIVEL_BASICA_SUPERIOR),
+    ('9no EGB', Nivel.SUBNIVEL_BASICA_SUPERIOR),
+    ('10mo EGB', Nivel.SUBNIVEL_BASICA_SUPERIOR),
+    ('1ro BGU', Nivel.SUBNIVEL_BGU),
+    ('2do BGU', Nivel.SUBNIVEL_BGU),
+    ('3ro BGU', Nivel.SUBNIVEL_BGU),
+]
+
+TIPOS_DOCUMENTO = [
+    # codigo, nombre, primera vez, renovación, traslado, discapacidad
+    ('CEDULA_EST',   'Cédula del estudiante',          True,  False, True,  False),
+    ('CEDULA_REP',   'Cédula del representante',       True,  True,  True,  False),
+    ('PARTIDA',      'Partida de nacimiento',          True,  False, True,  False),
+    ('PASE',         'Pase de la institución anterior', False, False, True,  False),
+    ('CERT_CONADIS', 'Carné del CONADIS',              True,  True,  True,  True),
+]
+
+# PDF mínimo válido para los archivos de relleno
+PDF_RELLENO = (b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n'
+               b'2 0 obj<</Type/Pages/Kids[]/Count 0>>endobj\n'
+               b'trailer<</Root 1 0 R>>\n%%EOF\n')
+
+# ─── Nombres ──────────────────────────────────────────────────────────────────
+
+NOMBRES_M = ['Mateo', 'Santiago', 'Sebastián', 'Matías', 'Nicolás', 'Samuel', 'Daniel',
+             'Alejandro', 'Joaquín', 'Emiliano', 'Thiago', 'Benjamín', 'Juan', 'José',
+             'Luis', 'Carlos', 'David', 'Gabriel', 'Diego', 'Andrés', 'Adrián', 'Martín',
+             'Isaac', 'Dylan', 'Kevin', 'Bryan', 'Jostin', 'Ángel', 'Miguel', 'Jorge']
+NOMBRES_F = ['Sofía', 'Valentina', 'Isabella', 'Camila', 'Emily', 'Mía', 'Antonella',
+             'Victoria', 'Daniela', 'Valeria', 'Martina', 'Luciana', 'Sara', 'Ana',
+             'María', 'Paula', 'Gabriela', 'Fernanda', 'Andrea', 'Mishel', 'Ariana',
+             'Doménica', 'Renata', 'Julieta', 'Emilia', 'Allison', 'Nayeli', 'Dayana',
+             'Alejandra', 'Rafaela']
+APELLIDOS = ['García', 'Rodríguez', 'Zambrano', 'Vera', 'Mendoza', 'López', 'Sánchez',
+             'Pérez', 'Torres', 'Cedeño', 'Moreira', 'Vásquez', 'Castro', 'Chávez',
+             'Morales', 'Herrera', 'Flores', 'Guerrero', 'Ramírez', 'Ortiz', 'Jiménez',
+             'Suárez', 'Romero', 'Álvarez', 'Reyes', 'Cevallos', 'Macías', 'Espinoza',
+             'Villacís', 'Paredes', 'Andrade', 'Salazar', 'Quishpe', 'Guamán', 'Tipán',
+             'Chicaiza', 'Caiza', 'Pillajo', 'Intriago', 'Bravo']
+CIUDADES = ['Quito', 'Guayaquil', 'Cuenca', 'Ambato', 'Riobamba', 'Ibarra', 'Loja',
+            'Portoviejo', 'Manta', 'Machala', 'Latacunga', 'Santo Domingo']
+RELACIONES = ['Madre'] * 6 + ['Padre'] * 3 + ['Abuelo/a', 'Tío/a']
+DISCAPACIDADES = ['Auditiva', 'Visual', 'Física', 'Intelectual', 'Psicosocial']
+
+MOTIVOS_RECHAZO = [
+    'La cédula del estudiante está ilegible.',
+    'Falta la firma del representante en la solicitud.',
+    'La partida de nacimiento no corresponde al estudiante.',
+    'El pase de la institución anterior está incompleto.',
+    'Los datos del representante no coinciden con la cédula adjunta.',
+]
+MOTIVOS_ANULACION = [
+    'Retiro voluntario por cambio de domicilio.',
+    'Traslado a otra institución.',
+    'Matrícula duplicada por error de digitación.',
+]
+COMENTARIO_REENVIO = 'Representante reenvió la solicitud con correcciones.'
+
+NOTIFICACIONES = {
+    Matricula.ESTADO_EN_REVISION: (Notificacion.TIPO_INFO, 'Solicitud en revisión',
+                                   'La secretaría está revisando la solicitud de {nombre}.'),
+    Matricula.ESTADO_APROBADA:    (Notificacion.TIPO_EXITO, 'Matrícula aprobada',
+                                   'La matrícula de {nombre} fue aprobada.'),
+    Matricula.ESTADO_RECHAZADA:   (Notificacion.TIPO_ERROR, 'Matrícula rechazada',
+                                   'La solicitud de {nombre} fue rechazada: {motivo}'),
+    Matricula.ESTADO_ANULADA:     (Notificacion.TIPO_ADVERTENCIA, 'Matrícula anulada',
+                                   'La matrícula de {nombre} fue anulada: {motivo}'),
+}
+
+ESTUDIANTES_POR_REPRESENTANTE = 1.6
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Funciones auxiliares
+# ─────────────────────────────────────────────────────────────────────────────
+
+def cedula_valida(n):
+    """
+    La n-ésima cédula ecuatoriana válida del espacio sintético: provincia
+    01-24, tercer dígito 0-5, serie de 6 dígitos y dígito verificador
+    (módulo 10). Inyectiva para 0 <= n < 144.000.000.
+    """
+    n, provincia = divmod(n, 24)
+    n, tercero   = divmod(n, 6)
+    base = f'{provincia + 1:02d}{tercero}{n % 1_000_000:06d}'
+    total = 0
+    for digito, coeficiente in zip(base, (2, 1, 2, 1, 2, 1, 2, 1, 2)):
+        producto = int(digito) * coeficiente
+        total += producto - 9 if producto > 9 else producto
+    return f'{base}{(10 - total % 10) % 10}'
+
+
+def trayectoria(rng, final):
+    """
+    Transiciones (anterior, nuevo) que llevan una solicitud de PENDIENTE al
+    estado `final`, con 0-3 rondas previas de rechazo y reenvío.
+    """
+    P, R, A, RE, AN = (Matricula.ESTADO_PENDIENTE, Matricula.ESTADO_EN_REVISION,
+                       Matricula.ESTADO_APROBADA, Matricula.ESTADO_RECHAZADA,
+                       Matricula.ESTADO_ANULADA)
+    pasos = []
+    if final != P:
+        rondas = 0
+        while rondas < 3 and rng.random() < 0.18:
+            pasos += [(P, R), (R, RE), (RE, P)]
+            rondas += 1
+    if final == P and rng.random() < 0.1:
+        pasos += [(P, R), (R, RE), (RE, P)]   # reenviada, aún sin revisar
+    if final in (R, A, RE, AN):
+        pasos.append((P, R))
+    if final == RE:
+        pasos.append((R, RE))
+    if final in (A, AN):
+        pasos.append((R, A))
+    if final == AN:
+        pasos.append((A, AN))
+    return pasos
+
+
+def estado_final(rng, actual):
+    """Estado final de una matrícula: en el período activo hay trámites abiertos."""
+    r = rng.random()
+    if not actual:
+        if r < 0.93:
+            return Matricula.ESTADO_APROBADA
+        return Matricula.ESTADO_RECHAZADA if r < 0.97 else Matricula.ESTADO_ANULADA
+    if r < 0.25:
+        return Matricula.ESTADO_PENDIENTE
+    if r < 0.40:
+        return Matricula.ESTADO_EN_REVISION
+    if r < 0.48:
+        return Matricula.ESTADO_RECHAZADA
+    return Matricula.ESTADO_APROBADA if r < 0.99 else Matricula.ESTADO_ANULADA
+
+
+def _espera(rng, anterior, nuevo):
+    """Tiempo plausible entre un estado y el siguiente."""
+    if nuevo == Matricula.ESTADO_EN_REVISION:
+        return timedelta(hours=rng.expovariate(1 / 30))
+    if anterior == Matricula.ESTADO_RECHAZADA:
+        return timedelta(hours=rng.expovariate(1 / 48))
+    if nuevo == Matricula.ESTADO_ANULADA:
+        return timedelta(days=rng.uniform(20, 120))
+    return timedelta(hours=rng.expovariate(1 / 10))
+
+
+@contextmanager
+def sin_fechas_automaticas(*modelos):
+    """Desactiva auto_now/auto_now_add para fijar fechas históricas en bulk_create."""
+    campos = [(campo, campo.auto_now, campo.auto_now_add)
+              for modelo in modelos for campo in modelo._meta.concrete_fields
+              if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)]
+    for campo, _, _ in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in campos:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def _inicializar_proceso():
+    # Con 'spawn' (Windows, macOS) el proceso hijo arranca sin Django configurado
+    import django
+    django.setup()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Bloque de trabajo (se ejecuta en los procesos del pool)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def generar_bloque(tarea):
+    indice, inicio, cantidad, ctx = tarea
+    rng = random.Random(f'{ctx["semilla"]}:{indice}')
+    with sin_fechas_automaticas(Estudiante, Matricula, HistorialMatricula,
+                                DocumentoMatricula, Notificacion), transaction.atomic():
+        return _Bloque(rng, inicio, cantidad, ctx).generar()
+
+
+class _Bloque:
+
+    def __init__(self, rng, inicio, cantidad, ctx):
+        self.rng, self.inicio, self.cantidad, self.ctx = rng, inicio, cantidad, ctx
+        self.lote  = ctx['lote']
+        self.ahora = timezone.now()
+        self.conteo = dict.fromkeys(['representantes', 'estudiantes', 'matriculas',
+                                     'historial', 'documentos', 'notificaciones'], 0)
+
+    def _fecha(self, dia):
+        """Fecha y hora de oficina aleatoria dentro de `dia`."""
+        momento = datetime.combine(dia, hora(self.rng.randint(7, 17), self.rng.randint(0, 59)))
+        return timezone.make_aware(momento)
+
+    def generar(self):
+        representantes = self._representantes()
+        alumnos = self._estudiantes(representantes)
+        anteriores = {}
+        for k, periodo in enumerate(self.ctx['periodos']):
+            anteriores = self._matriculas_del_anio(k, periodo, alumnos, anteriores)
+        return self.conteo
+
+    # ─── Personas ────────────────────────────────────────────────────────────
+    def _representantes(self):
+        rng, ctx = self.rng, self.ctx
+        desde = math.floor(self.inicio / ESTUDIANTES_POR_REPRESENTANTE)
+        hasta = math.floor((self.inicio + self.cantidad) / ESTUDIANTES_POR_REPRESENTANTE)
+        usuarios = []
+        for n in range(desde, max(hasta, desde + 1)):
+            nombre = rng.choice(NOMBRES_F if rng.random() < 0.65 else NOMBRES_M)
+            apellido = rng.choice(APELLIDOS)
+            username = f'{ctx["prefijo"]}-r{n}'
+            usuarios.append(Usuario(
+                username=username, email=f'{username}@sinteticos.invalid',
+                first_name=nombre, last_name=f'{apellido} {rng.choice(APELLIDOS)}',
+                password=ctx['clave'], rol=Usuario.ROL_REPRESENTANTE, is_verified=True,
+                telefono=f'09{rng.randint(0, 99_999_999):08d}', ciudad=rng.choice(CIUDADES),
+            ))
+        Usuario.objects.bulk_create(usuarios, batch_size=self.lote)
+        self.conteo['representantes'] = len(usuarios)
+        return usuarios
+
+    def _estudiantes(self, representantes):
+        """[(Estudiante, año de ingreso, índice de nivel al ingresar, tipo)]"""
+        rng, ctx = self.rng, self.ctx
+        anios, niveles = len(ctx['periodos']), len(ctx['niveles'])
+        alumnos = []
+        for i in range(self.cantidad):
+            global_ = self.inicio + i
+            representante = representantes[min(int(i / ESTUDIANTES_POR_REPRESENTANTE),
+                                               len(representantes) - 1)]
+            if anios == 1 or rng.random() < 0.6:
+                ingreso, nivel = 0, rng.randrange(niveles)
+                tipo = Matricula.TIPO_NUEVA if nivel == 0 else Matricula.TIPO_RENOVACION
+            else:
+                ingreso = rng.randrange(1, anios)
+                if niveles == 1 or rng.random() < 0.7:
+                    nivel, tipo = 0, Matricula.TIPO_NUEVA
+                else:
+                    nivel, tipo = rng.randrange(1, niveles), Matricula.TIPO_TRASLADO_ENTRADA
+            anio_ingreso = ctx['periodos'][ingreso]['anio']
+            genero = rng.choice('MF')
+            discapacidad = rng.random() < 0.04
+            creado = self._fecha(ctx['periodos'][ingreso]['matriculas'][0])
+            alumnos.append((Estudiante(
+                nombres=' '.join(rng.sample(NOMBRES_M if genero == 'M' else NOMBRES_F, 2)),
+                apellidos=f'{representante.last_name.split()[0]} {rng.choice(APELLIDOS)}',
+                cedula=cedula_valida(ctx['cedula_base'] + global_),
+                fecha_nacimiento=date(anio_ingreso - 5 - nivel, 1, 1)
+                                 + timedelta(days=rng.randrange(365)),
+                genero=genero, ciudad=representante.ciudad, representante=representante,
+                relacion_representante=rng.choice(RELACIONES),
+                tiene_discapacidad=discapacidad,
+                tipo_discapacidad=rng.choice(DISCAPACIDADES) if discapacidad else '',
+                created_at=creado, updated_at=creado,
+            ), ingreso, nivel, tipo))
+        Estudiante.objects.bulk_create([a[0] for a in alumnos], batch_size=self.lote)
+        self.conteo['estudiantes'] = len(alumnos)
+        return alumnos
+
+    # ─── Matrículas ──────────────────────────────────────────────────────────
+    def _matriculas_del_anio(self, k, periodo, alumnos, anteriores):
+        """Matrículas del período `k`; devuelve {índice de alumno: matrícula} para el siguiente."""
+        rng, ctx = self.rng, self.ctx
+        es_actual = k == len(ctx['periodos']) - 1
+        inicio_ventana, fin_ventana = periodo['matriculas']
+        nuevas, pasos_por_matricula = {}, []
+        for i, (estudiante, ingreso, nivel_inicial, tipo) in enumerate(alumnos):
+            if k < ingreso:
+                continue
+            anterior = anteriores.get(i)
+            if k > ingreso:
+                if anterior is None:
+                    continue                      # abandonó o no fue aprobada
+                tipo = Matricula.TIPO_RENOVACION
+            nivel = nivel_inicial + (k - ingreso)
+            if nivel >= len(ctx['niveles']):
+                continue                          # ya se graduó
+            paralelos = ctx['paralelos'][periodo['pk']][nivel]
+
+            final = estado_final(rng, es_actual)
+            pasos = trayectoria(rng, final)
+            dias = (fin_ventana - inicio_ventana).days
+            momento = self._fecha(inicio_ventana + timedelta(days=rng.randint(0, dias)))
+            if es_actual:
+                momento = min(momento, self.ahora - timedelta(hours=1))
+            solicitud = momento
+            matricula = Matricula(
+                estudiante=estudiante, paralelo_id=paralelos[i % len(paralelos)],
+                periodo_id=periodo['pk'], solicitante_id=estudiante.representante_id,
+                tipo=tipo, estado=final, fecha_solicitud=solicitud, created_at=solicitud,
+                matricula_anterior=anterior, version=len(pasos),
+            )
+            historial = []
+            for anterior_estado, nuevo in pasos:
+                momento += _espera(rng, anterior_estado, nuevo)
+                if es_actual:
+                    momento = min(momento, self.ahora)
+                if anterior_estado == Matricula.ESTADO_RECHAZADA:
+                    usuario, comentario = estudiante.representante_id, COMENTARIO_REENVIO
+                    matricula.motivo_rechazo = ''
+                else:
+                    usuario, comentario = rng.choice(ctx['secretarias']), ''
+                if nuevo == Matricula.ESTADO_EN_REVISION:
+                    matricula.fecha_revision, matricula.revisado_por_id = momento, usuario
+                elif nuevo == Matricula.ESTADO_APROBADA:
+                    matricula.fecha_resolucion, matricula.revisado_por_id = momento, usuario
+                elif nuevo == Matricula.ESTADO_RECHAZADA:
+                    comentario = rng.choice(MOTIVOS_RECHAZO)
+                    matricula.fecha_resolucion, matricula.revisado_por_id = momento, usuario
+                    matricula.motivo_rechazo = comentario
+                    matricula.numero_intentos += 1
+                elif nuevo == Matricula.ESTADO_ANULADA:
+                    comentario = rng.choice(MOTIVOS_ANULACION)
+                    matricula.fecha_anulacion, matricula.anulado_por_id = momento, usuario
+                    matricula.motivo_anulacion = comentario
+                historial.append((anterior_estado, nuevo, usuario, momento, comentario))
+            matricula.updated_at = momento
+            pasos_por_matricula.append((matricula, historial))
+            if final == Matricula.ESTADO_APROBADA and rng.random() > 0.04:
+                nuevas[i] = matricula
+
+        matriculas = [m for m, _ in pasos_por_matricula]
+        Matricula.asignar_codigos(matriculas)
+        Matricula.objects.bulk_create(matriculas, batch_size=self.lote)
+        HistorialMatricula.objects.bulk_create([
+            HistorialMatricula(matricula=m, estado_anterior=a, estado_nuevo=n,
+                               usuario_id=u, fecha=f, comentario=c)
+            for m, historial in pasos_por_matricula for a, n, u, f, c in historial
+        ], batch_size=self.lote)
+        self.conteo['matriculas'] += len(matriculas)
+        self.conteo['historial'] += sum(len(h) for _, h in pasos_por_matricula)
+
+        if es_actual:
+            self._documentos(pasos_por_matricula)
+            self._notificaciones(pasos_por_matricula)
+        return nuevas
+
+    def _documentos(self, pasos_por_matricula):
+        rng, ctx = self.rng, self.ctx
+        documentos = []
+        for matricula, historial in pasos_por_matricula:
+            estudiante = matricula.estudiante
+            rechazado = None
+            for tipo in ctx['tipos']:
+                aplica = {Matricula.TIPO_NUEVA: tipo['aplica_primera_vez'],
+                          Matricula.TIPO_RENOVACION: tipo['aplica_renovacion'],
+                          Matricula.TIPO_TRASLADO_ENTRADA: tipo['aplica_traslado']}[matricula.tipo]
+                if not aplica or (tipo['aplica_discapacidad'] and not estudiante.tiene_discapacidad):
+                    continue
+                estado, observacion = DocumentoMatricula.ESTADO_PENDIENTE, ''
+                if matricula.estado == Matricula.ESTADO_RECHAZADA and rechazado is None:
+                    rechazado = tipo
+                    estado, observacion = DocumentoMatricula.ESTADO_RECHAZADO, matricula.motivo_rechazo
+                elif (matricula.estado in (Matricula.ESTADO_APROBADA, Matricula.ESTADO_ANULADA,
+                                           Matricula.ESTADO_RECHAZADA)
+                      or matricula.estado == Matricula.ESTADO_EN_REVISION and rng.random() < 0.5):
+                    estado = DocumentoMatricula.ESTADO_VERIFICADO
+                revisado = estado != DocumentoMatricula.ESTADO_PENDIENTE
+                subido = matricula.fecha_solicitud
+                documentos.append(DocumentoMatricula(
+                    matricula=matricula, tipo_id=tipo['pk'], archivo=tipo['archivo'],
+                    nombre_original=f'{tipo["codigo"].lower()}_{estudiante.cedula}.pdf',
+                    tamano_bytes=rng.randint(80_000, 2_500_000), estado=estado,
+                    observacion=observacion,
+                    verificado_por_id=matricula.revisado_por_id if revisado else None,
+                    fecha_verificacion=matricula.fecha_resolucion or matricula.fecha_revision
+                                       if revisado else None,
+                    created_at=subido, updated_at=matricula.updated_at,
+                ))
+        DocumentoMatricula.objects.bulk_create(documentos, batch_size=self.lote)
+        self.conteo['documentos'] += len(documentos)
+
+    def _notificaciones(self, pasos_por_matricula):
+        rng = self.rng
+        hace_una_semana = self.ahora - timedelta(days=7)
+        notificaciones = []
+        for matricula, historial in pasos_por_matricula:
+            nombre = matricula.estudiante.nombres
+            for _, nuevo, usuario, fecha, comentario in historial:
+                if nuevo not in NOTIFICACIONES:
+                    continue
+                tipo, titulo, mensaje = NOTIFICACIONES[nuevo]
+                leida = fecha < hace_una_semana and rng.random() < 0.8
+                notificaciones.append(Notificacion(
+                    destinatario_id=matricula.solicitante_id, generada_por_id=usuario,
+                    tipo=tipo, titulo=titulo, matricula=matricula,
+                    mensaje=mensaje.format(nombre=nombre, motivo=comentario),
+                    url_accion=f'/matriculas/{matricula.pk}/',
+                    leida=leida, fecha_lectura=fecha + timedelta(days=1) if leida else None,
+                    created_at=fecha, updated_at=fecha,
+                ))
+        Notificacion.objects.bulk_create(notificaciones, batch_size=self.lote)
+        self.conteo['notificaciones'] += len(notificaciones)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Comando
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Command(BaseCommand):
+    help = 'Genera períodos, estudiantes, matrículas e historial sintéticos para pruebas de carga.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estudiantes', type=int, default=10_000,
+                            help='Estudiantes a generar (default: 10000).')
+        parser.add_argument('--anios', type=int, default=3,
+                            help='Años lectivos hasta el actual inclusive (default: 3).')
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1,
+                            help='Procesos en paralelo (default: núcleos de la CPU).')
+        parser.add_argument('--lote', type=int, default=2000,
+                            help='Filas por INSERT y estudiantes por bloque (default: 2000).')
+        parser.add_argument('--semilla', type=int, default=1,
+                            help='Semilla aleatoria; distingue cargas sucesivas (default: 1).')
+        parser.add_argument('--secretarias', type=int, default=8,
+                            help='Secretarias que revisan las solicitudes (default: 8).')
+        parser.add_argument('--clave', default='sinteticos',
+                            help='Contraseña de los usuarios generados (default: sinteticos).')
+        parser.add_argument('--forzar', action='store_true',
+                            help='Permite correr con DEBUG=False.')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['forzar']:
+            raise CommandError('DEBUG=False: use --forzar si realmente quiere cargar datos '
+                               'sintéticos en esta base.')
+        if options['anios'] < 1 or options['estudiantes'] < 1:
+            raise CommandError('--anios y --estudiantes deben ser positivos.')
+        semilla = options['semilla']
+        prefijo = f'sint{semilla}'
+        if Usuario.objects.filter(username__startswith=f'{prefijo}-').exists():
+            raise CommandError(f'Ya hay datos con la semilla {semilla}; use otra --semilla.')
+
+        inicio = time.monotonic()
+        clave  = make_password(options['clave'])
+        niveles = self._niveles()
+        ctx = {
+            'semilla':     semilla,
+            'prefijo':     prefijo,
+            'lote':        options['lote'],
+            'clave':       clave,
+            'cedula_base': semilla * 7_919_311 % 100_000_000,
+            'niveles':     [n.pk for n in niveles],
+            'periodos':    self._periodos(options['anios']),
+            'secretarias': self._secretarias(prefijo, options['secretarias'], clave),
+            'tipos':       self._tipos_documento(),
+        }
+        ctx['paralelos'] = self._paralelos(ctx['periodos'], niveles, options['estudiantes'])
+        if connection.vendor == 'postgresql':
+            from apps.core.utils import reservar_codigos_matricula
+            for periodo in ctx['periodos']:
+                # Crea la secuencia de códigos antes de repartir el trabajo
+                reservar_codigos_matricula(periodo['pk'], 0)
+
+        total, lote = options['estudiantes'], options['lote']
+        tareas = [(n, desde, min(lote, total - desde), ctx)
+                  for n, desde in enumerate(range(0, total, lote))]
+        acumulado = {}
+        for conteo in self._ejecutar(tareas, options['procesos']):
+            for clave_conteo, valor in conteo.items():
+                acumulado[clave_conteo] = acumulado.get(clave_conteo, 0) + valor
+            self.stdout.write(f'  {acumulado["estudiantes"]}/{total} estudiantes '
+                              f'({time.monotonic() - inicio:.0f} s)')
+
+        Notificacion.recalcular_contadores(
+            Usuario.objects.filter(username__startswith=f'{prefijo}-'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Generados en {time.monotonic() - inicio:.0f} s: '
+            + ', '.join(f'{valor} {nombre}' for nombre, valor in acumulado.items())
+            + f'. Usuarios {prefijo}-r<n> / {prefijo}-s<n>, contraseña "{options["clave"]}".'
+        ))
+
+    def _ejecutar(self, tareas, procesos):
+        if procesos <= 1 or len(tareas) == 1:
+            yield from map(generar_bloque, tareas)
+            return
+        # Los hijos no deben heredar las conexiones abiertas del proceso principal
+        connections.close_all()
+        with multiprocessing.Pool(min(procesos, len(tareas)),
+                                  initializer=_inicializar_proceso) as pool:
+            yield from pool.imap_unordered(generar_bloque, tareas)
+
+    # ─── Catálogos y estructura ──────────────────────────────────────────────
+    def _niveles(self):
+        niveles = list(Nivel.objects.filter(is_active=True).order_by('orden'))
+        if not niveles:
+            niveles = Nivel.objects.bulk_create([
+                Nivel(nombre=nombre, subnivel=subnivel, orden=orden)
+                for orden, (nombre, subnivel) in enumerate(NIVELES, start=1)
+            ])
+        return niveles
+
+    def _periodos(self, anios):
+        hoy = timezone.localdate()
+        ultimo = hoy.year if hoy >= date(hoy.year, 8, 1) else hoy.year - 1
+        periodos = []
+        for anio in range(ultimo - anios + 1, ultimo + 1):
+            periodo, _ = PeriodoAcademico.objects.get_or_create(
+                nombre=f'{anio}-{anio + 1} Sierra',
+                defaults={
+                    'regimen':                 PeriodoAcademico.REGIMEN_SIERRA,
+                    'fecha_inicio':            date(anio, 9, 1),
+                    'fecha_fin':               date(anio + 1, 7, 1),
+                    'fecha_inicio_matriculas': date(anio, 8, 1),
+                    'fecha_fin_matriculas':    date(anio, 8, 31),
+                },
+            )
+            periodos.append({
+                'pk': periodo.pk, 'anio': anio,
+                'matriculas': (periodo.fecha_inicio_matriculas, periodo.fecha_fin_matriculas),
+            })
+        if not periodo.es_activo:
+            periodo.es_activo = True
+            periodo.save()
+        return periodos
+
+    def _paralelos(self, periodos, niveles, estudiantes):
+        """{periodo_pk: [[pk de paralelo, ...] por nivel]}"""
+        por_nivel = math.ceil(estudiantes / len(niveles) / 35)
+        nombres = [chr(ord('A') + i) if i < 26 else f'A{i}' for i in range(por_nivel)]
+        existentes = {}
+        for pk, periodo_id, nivel_id, nombre in (Paralelo.objects
+                .filter(periodo_id__in=[p['pk'] for p in periodos])
+                .values_list('pk', 'periodo_id', 'nivel_id', 'nombre')):
+            existentes[periodo_id, nivel_id, nombre] = pk
+        faltantes = [Paralelo(periodo_id=p['pk'], nivel=nivel, nombre=nombre,
+                              jornada='MATUTINA' if i % 2 == 0 else 'VESPERTINA')
+                     for p in periodos for nivel in niveles
+                     for i, nombre in enumerate(nombres)
+                     if (p['pk'], nivel.pk, nombre) not in existentes]
+        for paralelo in Paralelo.objects.bulk_create(faltantes):
+            existentes[paralelo.periodo_id, paralelo.nivel_id, paralelo.nombre] = paralelo.pk
+        return {p['pk']: [[existentes[p['pk'], nivel.pk, nombre] for nombre in nombres]
+                          for nivel in niveles]
+                for p in periodos}
+
+    def _secretarias(self, prefijo, cantidad, clave):
+        secretarias = Usuario.objects.bulk_create([
+            Usuario(username=f'{prefijo}-s{n}', email=f'{prefijo}-s{n}@sinteticos.invalid',
+                    first_name=f'Secretaria {n}', last_name='Sintética', password=clave,
+                    rol=Usuario.ROL_SECRETARIA, is_staff=True, is_verified=True)
+            for n in range(max(cantidad, 1))
+        ])
+        return [s.pk for s in secretarias]
+
+    def _tipos_documento(self):
+        if not TipoDocumento.objects.exists():
+            TipoDocumento.objects.bulk_create([
+                TipoDocumento(codigo=codigo, nombre=nombre, orden=orden,
+                              es_obligatorio=not discapacidad and codigo != 'PASE',
+                              aplica_primera_vez=primera, aplica_renovacion=renovacion,
+                              aplica_traslado=traslado, aplica_discapacidad=discapacidad)
+                for orden, (codigo, nombre, primera, renovacion, traslado, discapacidad)
+                in enumerate(TIPOS_DOCUMENTO, start=1)
+            ])
+        tipos = list(TipoDocumento.objects.filter(is_active=True).order_by('orden', 'nombre')
+                     .values('pk', 'codigo', 'aplica_primera_vez', 'aplica_renovacion',
+                             'aplica_traslado', 'aplica_discapacidad'))
+        for tipo in tipos:
+            nombre = f'documentos/sinteticos/{tipo["codigo"].lower()}.pdf'
+            if not default_storage.exists(nombre):
+                nombre = default_storage.save(nombre, ContentFile(PDF_RELLENO))
+            tipo['archivo'] = nombre
+        return tipos
@@ -0,0 +1,20 @@
+"""
+Elimina las claves de idempotencia vencidas.
+
+Uso:
+    python manage.py purgar_claves_idempotencia
+
+El tiempo de vida se define con IDEMPOTENCIA_TTL_HORAS (24 h por defecto).
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.models import ClaveIdempotencia
+
+
+class Command(BaseCommand):
+    help = 'Elimina las claves de idempotencia vencidas.'
+
+    def handle(self, *args, **options):
+        borradas, _ = ClaveIdempotencia.objects.filter(expira__lt=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f'{borradas} claves eliminadas.'))
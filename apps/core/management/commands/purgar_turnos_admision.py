@@ -0,0 +1,34 @@
+"""
+Elimina los turnos de la sala de espera que ya no sirven.
+
+Uso:
+    python manage.py purgar_turnos_admision [--horas 6]
+
+Un turno se borra cuando no fue sondeado en las últimas `--horas` y no
+tiene un pase vigente. Conviene programarlo (cron) durante las semanas
+de matrícula.
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.models import TurnoAdmision
+
+
+class Command(BaseCommand):
+    help = 'Elimina turnos de admisión abandonados o vencidos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=int, default=6,
+                            help='Antigüedad mínima del último sondeo (default: 6).')
+
+    def handle(self, *args, **options):
+        ahora  = timezone.now()
+        limite = ahora - timedelta(hours=options['horas'])
+        borrados, _ = TurnoAdmision.objects.filter(
+            Q(admitido_hasta__isnull=True) | Q(admitido_hasta__lt=ahora),
+            ultimo_sondeo__lt=limite,
+        ).delete()
+        self.stdout.write(self.style.SUCCESS(f'{borrados} turnos eliminados.'))
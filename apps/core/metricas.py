@@ -0,0 +1,223 @@
+"""
+============================================================
+  MÉTRICAS: apps.core
+  Histogramas por vista y exportación en formato Prometheus
+============================================================
+
+Cada proceso acumula en memoria, sin bloqueos de base ni de red:
+
+  sfq_peticion_segundos{vista, metodo, estado}   histograma de latencia
+  sfq_db_segundos{vista}                         histograma de tiempo en la base
+  sfq_db_consultas_total{vista}                  contador de consultas
+  sfq_cache_total{cache, resultado}              aciertos / fallos de las caches
+
+Las peticiones las registra InstrumentacionMiddleware; las caches llaman
+a `cache_consultada`. Con gunicorn cada worker es un proceso: si
+settings.METRICAS_DIR está definido, cada uno vuelca sus valores a
+<METRICAS_DIR>/<pid>.json (como mucho una vez por segundo) y el endpoint
+/metricas/ suma los archivos de todos. El directorio debe vaciarse al
+arrancar el servidor; sin él solo se ve el proceso que atiende. Cuando un
+worker termina, `absorber` pasa sus valores a acumulado.json
+(config/gunicorn.py lo llama desde el proceso maestro).
+
+Los indicadores de cola (correos pendientes, matrículas por revisar,
+novedades retenidas) se consultan en el momento de cada lectura.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HISTOGRAMAS = {
+    'sfq_peticion_segundos': ('Duración de la petición.', ('vista', 'metodo', 'estado')),
+    'sfq_db_segundos':       ('Tiempo en la base por petición.', ('vista',)),
+}
+CONTADORES = {
+    'sfq_db_consultas_total': ('Consultas ejecutadas.', ('vista',)),
+    'sfq_cache_total':        ('Lecturas de caches de la aplicación (catálogos y configuración: '
+                               'solo las revisiones de vigencia).', ('cache', 'resultado')),
+}
+
+# nombre -> {etiquetas: [conteo por bucket..., +Inf, suma]} | {etiquetas: valor}
+_histogramas = {nombre: {} for nombre in HISTOGRAMAS}
+_contadores  = {nombre: {} for nombre in CONTADORES}
+_candado     = threading.Lock()
+_ultimo_volcado = 0.0
+
+
+def directorio():
+    return getattr(settings, 'METRICAS_DIR', None)
+
+
+# ─── Registro ─────────────────────────────────────────────────────────────────
+
+def observar(nombre, etiquetas, valor):
+    with _candado:
+        fila = _histogramas[nombre].get(etiquetas)
+        if fila is None:
+            fila = _histogramas[nombre][etiquetas] = [0] * (len(BUCKETS) + 1) + [0.0]
+        fila[bisect_left(BUCKETS, valor)] += 1
+        fila[-1] += valor
+
+
+def incrementar(nombre, etiquetas, cantidad=1):
+    with _candado:
+        contador = _contadores[nombre]
+        contador[etiquetas] = contador.get(etiquetas, 0) + cantidad
+
+
+def cache_consultada(cache, acierto):
+    incrementar('sfq_cache_total', (cache, 'acierto' if acierto else 'fallo'))
+
+
+def registrar_peticion(vista, metodo, estado, segundos, segundos_db, consultas):
+    observar('sfq_peticion_segundos', (vista, metodo, str(estado)), segundos)
+    observar('sfq_db_segundos', (vista,), segundos_db)
+    incrementar('sfq_db_consultas_total', (vista,), consultas)
+    volcar()
+
+
+# ─── Varios procesos ──────────────────────────────────────────────────────────
+
+def _instantanea():
+    with _candado:
+        return {
+            'histogramas': {n: [[list(k), list(v)] for k, v in d.items()]
+                            for n, d in _histogramas.items()},
+            'contadores':  {n: [[list(k), v] for k, v in d.items()]
+                            for n, d in _contadores.items()},
+        }
+
+
+def volcar(forzar=False):
+    """Escribe los valores de este proceso en METRICAS_DIR (a lo sumo una vez por segundo)."""
+    global _ultimo_volcado
+    carpeta = directorio()
+    ahora   = time.monotonic()
+    if not carpeta or (not forzar and ahora - _ultimo_volcado < 1):
+        return
+    _ultimo_volcado = ahora
+    os.makedirs(carpeta, exist_ok=True)
+    destino  = os.path.join(carpeta, f'{os.getpid()}.json')
+    temporal = f'{destino}.tmp'
+    with open(temporal, 'w') as archivo:
+        json.dump(_instantanea(), archivo)
+    os.replace(temporal, destino)
+
+
+def _sumar(total, datos):
+    for nombre, filas in datos['histogramas'].items():
+        destino = total['histogramas'].setdefault(nombre, {})
+        for etiquetas, valores in filas:
+            actual = destino.setdefault(tuple(etiquetas), [0] * len(valores))
+            for i, valor in enumerate(valores):
+                actual[i] += valor
+    for nombre, filas in datos['contadores'].items():
+        destino = total['contadores'].setdefault(nombre, {})
+        for etiquetas, valor in filas:
+            destino[tuple(etiquetas)] = destino.get(tuple(etiquetas), 0) + valor
+
+
+def absorber(pid):
+    """
+    Suma el archivo de un worker terminado a acumulado.json y lo borra.
+    Solo debe llamarlo un proceso (el maestro de gunicorn): no hay bloqueo
+    entre escritores.
+    """
+    carpeta = directorio()
+    origen  = carpeta and os.path.join(carpeta, f'{pid}.json')
+    if not origen or not os.path.exists(origen):
+        return
+    destino = os.path.join(carpeta, 'acumulado.json')
+    total   = {'histogramas': {}, 'contadores': {}}
+    for ruta in (destino, origen):
+        try:
+            with open(ruta) as archivo:
+                _sumar(total, json.load(archivo))
+        except (OSError, ValueError):
+            continue
+    temporal = f'{destino}.tmp'
+    with open(temporal, 'w') as archivo:
+        json.dump({
+            'histogramas': {n: [[list(k), v] for k, v in d.items()]
+                            for n, d in total['histogramas'].items()},
+            'contadores':  {n: [[list(k), v] for k, v in d.items()]
+                            for n, d in total['contadores'].items()},
+        }, archivo)
+    os.replace(temporal, destino)
+    os.remove(origen)
+
+
+def agregado():
+    """Suma de todos los procesos: los archivos de METRICAS_DIR más este proceso en vivo."""
+    total   = {'histogramas': {}, 'contadores': {}}
+    carpeta = directorio()
+    propio  = f'{os.getpid()}.json'
+    if carpeta and os.path.isdir(carpeta):
+        for nombre in os.listdir(carpeta):
+            if not nombre.endswith('.json') or nombre == propio:
+                continue
+            try:
+                with open(os.path.join(carpeta, nombre)) as archivo:
+                    _sumar(total, json.load(archivo))
+            except (OSError, ValueError):
+                continue   # archivo a medio escribir o borrado entre listdir y open
+    _sumar(total, _instantanea())
+    return total
+
+
+# ─── Formato de texto de Prometheus ───────────────────────────────────────────
+
+def _etiquetas(nombres, valores, extra=()):
+    pares = [*zip(nombres, valores), *extra]
+    if not pares:
+        return ''
+    texto = ','.join('{}="{}"'.format(
+        n, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for n, v in pares)
+    return '{' + texto + '}'
+
+
+def exportar():
+    """Texto para /metricas/ (text/plain; version=0.0.4)."""
+    from django.db.models import Count
+    from apps.matriculas.models import Matricula
+    from apps.notificaciones.models import CorreoPendiente, NovedadPendiente
+
+    datos  = agregado()
+    lineas = []
+    for nombre, (ayuda, etiquetas) in HISTOGRAMAS.items():
+        lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} histogram']
+        for valores, fila in sorted(datos['histogramas'].get(nombre, {}).items()):
+            acumulado = 0
+            for limite, conteo in zip((*BUCKETS, '+Inf'), fila[:-1]):
+                acumulado += conteo
+                lineas.append(f'{nombre}_bucket'
+                              f'{_etiquetas(etiquetas, valores, [("le", limite)])} {acumulado}')
+            lineas.append(f'{nombre}_sum{_etiquetas(etiquetas, valores)} {fila[-1]:.6f}')
+            lineas.append(f'{nombre}_count{_etiquetas(etiquetas, valores)} {acumulado}')
+    for nombre, (ayuda, etiquetas) in CONTADORES.items():
+        lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} counter']
+        for valores, valor in sorted(datos['contadores'].get(nombre, {}).items()):
+            lineas.append(f'{nombre}{_etiquetas(etiquetas, valores)} {valor}')
+
+    revision = dict(Matricula.objects
+                    .filter(estado__in=[Matricula.ESTADO_PENDIENTE, Matricula.ESTADO_EN_REVISION])
+                    .values_list('estado').annotate(n=Count('pk')).order_by())
+    lineas += ['# HELP sfq_matriculas_por_revisar Matrículas esperando a secretaría.',
+               '# TYPE sfq_matriculas_por_revisar gauge']
+    for estado in (Matricula.ESTADO_PENDIENTE, Matricula.ESTADO_EN_REVISION):
+        lineas.append(f'sfq_matriculas_por_revisar{{estado="{estado}"}} {revision.get(estado, 0)}')
+    correos = CorreoPendiente.objects.filter(estado=CorreoPendiente.ESTADO_PENDIENTE).count()
+    lineas += ['# HELP sfq_correos_pendientes Correos en la cola de salida.',
+               '# TYPE sfq_correos_pendientes gauge',
+               f'sfq_correos_pendientes {correos}',
+               '# HELP sfq_novedades_retenidas Notificaciones esperando su resumen.',
+               '# TYPE sfq_novedades_retenidas gauge',
+               f'sfq_novedades_retenidas {NovedadPendiente.objects.count()}']
+    return '\n'.join(lineas) + '\n'
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:28
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TurnoAdmision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clase', models.CharField(max_length=30, verbose_name='Clase de vistas')),
+                ('token', models.CharField(max_length=32, unique=True, verbose_name='Token')),
+                ('creado', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('ultimo_sondeo', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Último sondeo')),
+                ('admitido_hasta', models.DateTimeField(blank=True, null=True, verbose_name='Admitido hasta')),
+            ],
+            options={
+                'verbose_name': 'Turno de admisión',
+                'verbose_name_plural': 'Turnos de admisión',
+                'indexes': [models.Index(fields=['clase', 'admitido_hasta'], name='turno_admitidos_idx'), models.Index(condition=models.Q(('admitido_hasta__isnull', True)), fields=['clase', 'id'], name='turno_en_espera_idx')],
+            },
+        ),
+    ]
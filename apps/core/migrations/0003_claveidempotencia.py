@@ -0,0 +1,40 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:33
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0002_turnoadmision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClaveIdempotencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=64, verbose_name='Clave')),
+                ('ruta', models.CharField(max_length=255, verbose_name='Ruta')),
+                ('huella', models.CharField(max_length=64, verbose_name='Huella de la petición')),
+                ('estado', models.CharField(choices=[('EN_CURSO', 'En curso'), ('COMPLETADA', 'Completada')], default='EN_CURSO', max_length=12, verbose_name='Estado')),
+                ('codigo', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Código HTTP')),
+                ('ubicacion', models.CharField(blank=True, max_length=255, verbose_name='Redirección')),
+                ('mensajes', models.JSONField(blank=True, default=list, verbose_name='Mensajes')),
+                ('creado', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('expira', models.DateTimeField(db_index=True, verbose_name='Expira el')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Clave de idempotencia',
+                'verbose_name_plural': 'Claves de idempotencia',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='claveidempotencia',
+            constraint=models.UniqueConstraint(fields=('usuario', 'clave'), name='idempotencia_usuario_clave'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:54
+
+from django.db import migrations, models
+
+
+def crear_version(apps, schema_editor):
+    """La fila única del contador de versiones de la configuración."""
+    VersionConfiguracion = apps.get_model('core', 'VersionConfiguracion')
+    VersionConfiguracion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_claveidempotencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionConfiguracion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.BigIntegerField(default=0, verbose_name='Versión')),
+            ],
+            options={
+                'verbose_name': 'Versión de la configuración',
+                'verbose_name_plural': 'Versión de la configuración',
+            },
+        ),
+        migrations.RunPython(crear_version, migrations.RunPython.noop),
+    ]
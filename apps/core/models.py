@@ -4,7 +4,10 @@
   Modelos abstractos base para todo el sistema
 ============================================================
 """
-from django.db import models
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, router, transaction
+from django.db.models import F
 from django.utils import timezone
 
 
@@ -22,24 +25,96 @@ class TimeStampedModel(models.Model):
         ordering = ['-created_at']
 
 
+class ConflictoConcurrencia(ValidationError):
+    """
+    El registro cambió desde que se leyó (otra persona lo modificó).
+    Hereda de ValidationError para que las vistas lo muestren como
+    cualquier otro error de negocio.
+    """
+    MENSAJE = ('El registro fue modificado por otro usuario mientras lo editaba. '
+               'Recargue la página e intente nuevamente.')
+
+    def __init__(self, message=None, *args, **kwargs):
+        super().__init__(message or self.MENSAJE, *args, **kwargs)
+
+
+class VersionadoModel(models.Model):
+    """
+    Control de concurrencia optimista.
+    `guardar_cambios` actualiza solo los campos indicados con
+    UPDATE ... WHERE id = %s AND version = %s, sin bloqueos.
+    `save()` sobre un registro existente hace la misma comparación antes de
+    reescribirlo: formularios, admin y cualquier otro guardado completo
+    fallan con ConflictoConcurrencia en lugar de pisar un cambio ajeno.
+    """
+    version = models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión')
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get('force_insert'):
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            # Reclamar la versión leída: el UPDATE bloquea la fila hasta el commit
+            filas = type(self)._base_manager.using(using).filter(
+                pk=self.pk, version=self.version,
+            ).update(version=F('version') + 1)
+            if not filas:
+                raise ConflictoConcurrencia()
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+            try:
+                super().save(*args, **kwargs)
+            except BaseException:
+                self.version -= 1   # la transacción deshace también la reclamación
+                raise
+
+    def guardar_cambios(self, campos):
+        """
+        Compare-and-swap: persiste `campos` solo si nadie modificó el registro
+        desde que se leyó. Lanza ConflictoConcurrencia en caso contrario.
+        """
+        valores = {}
+        for nombre in campos:
+            campo = self._meta.get_field(nombre)
+            valores[campo.attname] = getattr(self, campo.attname)
+        if any(f.name == 'updated_at' for f in self._meta.concrete_fields):
+            self.updated_at = valores['updated_at'] = timezone.now()
+        filas = type(self)._default_manager.filter(
+            pk=self.pk, version=self.version,
+        ).update(version=F('version') + 1, **valores)
+        if not filas:
+            raise ConflictoConcurrencia()
+        self.version += 1
+
+
 class ConfiguracionSistema(TimeStampedModel):
     """
     Tabla de configuración clave-valor para parámetros del sistema
     que pueden cambiar sin necesidad de redesplegar.
     Ejemplos: 'max_documentos_mb', 'dias_vigencia_matricula', etc.
+    Se lee desde la instantánea tipada de apps.core.configuracion.
     """
+    TIPO_TEXTO    = 'texto'
+    TIPO_NUMERO   = 'numero'
+    TIPO_BOOLEANO = 'booleano'
+    TIPO_JSON     = 'json'
+
     clave       = models.CharField(max_length=100, unique=True, verbose_name='Clave')
     valor       = models.TextField(verbose_name='Valor')
     descripcion = models.CharField(max_length=255, blank=True, verbose_name='Descripción')
     tipo        = models.CharField(
         max_length=20,
         choices=[
-            ('texto',    'Texto'),
-            ('numero',   'Número'),
-            ('booleano', 'Booleano'),
-            ('json',     'JSON'),
+            (TIPO_TEXTO,    'Texto'),
+            (TIPO_NUMERO,   'Número'),
+            (TIPO_BOOLEANO, 'Booleano'),
+            (TIPO_JSON,     'JSON'),
         ],
-        default='texto',
+        default=TIPO_TEXTO,
         verbose_name='Tipo de dato'
     )
 
@@ -51,10 +126,113 @@ class ConfiguracionSistema(TimeStampedModel):
     def __str__(self):
         return f'{self.clave} = {self.valor}'
 
+    def clean(self):
+        from .configuracion import convertir
+        try:
+            convertir(self.tipo, self.valor)
+        except ValueError as e:
+            raise ValidationError({'valor': str(e)})
+
+    # ─── Cada cambio invalida las instantáneas de todos los procesos ──────────
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            VersionConfiguracion.incrementar()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            VersionConfiguracion.incrementar()
+        return resultado
+
     @classmethod
     def obtener(cls, clave, default=None):
-        """Obtiene el valor de una configuración por su clave."""
-        try:
-            return cls.objects.get(clave=clave, is_active=True).valor
-        except cls.DoesNotExist:
-            return default
\ No newline at end of file
+        """Valor de una configuración por su clave, ya convertido según su tipo."""
+        from .configuracion import obtener
+        return obtener(clave, default)
+
+
+class VersionConfiguracion(models.Model):
+    """
+    Fila única con un contador que sube con cada cambio de ConfiguracionSistema.
+    Los procesos comparan su instantánea contra este número.
+    """
+    PK = 1
+
+    numero = models.BigIntegerField(default=0, verbose_name='Versión')
+
+    class Meta:
+        verbose_name        = 'Versión de la configuración'
+        verbose_name_plural = 'Versión de la configuración'
+
+    def __str__(self):
+        return f'Configuración v{self.numero}'
+
+    @classmethod
+    def incrementar(cls):
+        from .configuracion import descartar
+        if not cls.objects.filter(pk=cls.PK).update(numero=F('numero') + 1):
+            cls.objects.get_or_create(pk=cls.PK, defaults={'numero': 1})
+        transaction.on_commit(descartar)
+
+class TurnoAdmision(models.Model):
+    """
+    Turno en la sala de espera de una clase de vistas (ver settings.ADMISION).
+    El orden de llegada es el id: la cola es FIFO. Un turno queda admitido
+    hasta `admitido_hasta`; si deja de sondear se considera abandonado.
+    """
+    clase          = models.CharField(max_length=30, verbose_name='Clase de vistas')
+    token          = models.CharField(max_length=32, unique=True, verbose_name='Token')
+    creado         = models.DateTimeField(auto_now_add=True, verbose_name='Creado el')
+    ultimo_sondeo  = models.DateTimeField(default=timezone.now, verbose_name='Último sondeo')
+    admitido_hasta = models.DateTimeField(null=True, blank=True, verbose_name='Admitido hasta')
+
+    class Meta:
+        verbose_name        = 'Turno de admisión'
+        verbose_name_plural = 'Turnos de admisión'
+        indexes = [
+            models.Index(fields=['clase', 'admitido_hasta'], name='turno_admitidos_idx'),
+            models.Index(fields=['clase', 'id'], name='turno_en_espera_idx',
+                         condition=models.Q(admitido_hasta__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f'{self.clase} #{self.pk}'
+
+
+class ClaveIdempotencia(models.Model):
+    """
+    Resultado de un POST identificado por una clave de idempotencia.
+    Un reintento con la misma clave (doble clic, reenvío del navegador)
+    reproduce el resultado guardado en lugar de ejecutar de nuevo la vista.
+    """
+    ESTADO_EN_CURSO   = 'EN_CURSO'
+    ESTADO_COMPLETADA = 'COMPLETADA'
+    ESTADOS = [
+        (ESTADO_EN_CURSO,   'En curso'),
+        (ESTADO_COMPLETADA, 'Completada'),
+    ]
+
+    usuario   = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                  related_name='+', verbose_name='Usuario')
+    clave     = models.CharField(max_length=64, verbose_name='Clave')
+    ruta      = models.CharField(max_length=255, verbose_name='Ruta')
+    huella    = models.CharField(max_length=64, verbose_name='Huella de la petición')
+    estado    = models.CharField(max_length=12, choices=ESTADOS, default=ESTADO_EN_CURSO,
+                                 verbose_name='Estado')
+    codigo    = models.PositiveSmallIntegerField(null=True, blank=True,
+                                                 verbose_name='Código HTTP')
+    ubicacion = models.CharField(max_length=255, blank=True, verbose_name='Redirección')
+    mensajes  = models.JSONField(default=list, blank=True, verbose_name='Mensajes')
+    creado    = models.DateTimeField(auto_now_add=True, verbose_name='Creado el')
+    expira    = models.DateTimeField(db_index=True, verbose_name='Expira el')
+
+    class Meta:
+        verbose_name        = 'Clave de idempotencia'
+        verbose_name_plural = 'Claves de idempotencia'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'clave'], name='idempotencia_usuario_clave'),
+        ]
+
+    def __str__(self):
+        return f'{self.clave} ({self.get_estado_display()})'
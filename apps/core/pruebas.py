@@ -0,0 +1,32 @@
+"""
+============================================================
+  PRUEBAS: apps.core
+  Presupuesto de consultas por URL para los tests
+============================================================
+
+    class PanelTests(PresupuestoConsultasMixin, TestCase):
+        def test_panel(self):
+            self.client.force_login(self.secretaria)
+            self.assertPresupuestoConsultas('/documentos/panel/', 12)
+
+Si la página supera el presupuesto, el fallo lista las huellas más
+repetidas (ver apps.core.instrumentacion), que es donde suele estar el N+1.
+"""
+from .instrumentacion import registrar_consultas
+
+
+class PresupuestoConsultasMixin:
+    """Para TestCase: afirma cuántas consultas puede hacer una URL como máximo."""
+
+    def assertPresupuestoConsultas(self, url, maximo, metodo='get', client=None,
+                                   estado=200, **kwargs):
+        client = client or self.client
+        with registrar_consultas() as registro:
+            response = getattr(client, metodo)(url, **kwargs)
+        if estado is not None:
+            self.assertEqual(response.status_code, estado,
+                             f'{url} respondió {response.status_code}')
+        if registro.total > maximo:
+            detalle = ''.join(f'\n  {n}× {sql[:300]}' for sql, n in registro.repetidas()[:5])
+            self.fail(f'{url}: {registro.total} consultas (presupuesto {maximo}).{detalle}')
+        return response
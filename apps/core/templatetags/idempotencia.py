@@ -0,0 +1,19 @@
+"""
+Campo oculto con una clave de idempotencia nueva para cada formulario.
+
+    {% load idempotencia %}
+    <form method="post">{% csrf_token %}{% clave_idempotencia %} ...
+"""
+import uuid
+
+from django import template
+from django.utils.html import format_html
+
+from apps.core.idempotencia import CAMPO
+
+register = template.Library()
+
+
+@register.simple_tag
+def clave_idempotencia():
+    return format_html('<input type="hidden" name="{}" value="{}">', CAMPO, uuid.uuid4().hex)
@@ -5,4 +5,8 @@ app_name = 'core'
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('admision/<str:clase>/', views.turno_admision, name='turno_admision'),
+    path('metricas/', views.metricas, name='metricas'),
+    path('salud/', views.salud, name='salud'),
+    path('salud/listo/', views.salud_listo, name='salud_listo'),
 ]
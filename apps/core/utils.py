@@ -1,14 +1,98 @@
 ﻿"""
 Utilidades compartidas del sistema
 """
+import hashlib
+
 import shortuuid
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Max
+
+
+# periodo_id -> año lectivo, ya con su secuencia creada (cache por proceso)
+_ANIO_POR_PERIODO = {}
+
+
+def digito_verificador(numero):
+    """Dígito de control Luhn (mod 10) para una cadena de dígitos."""
+    total = 0
+    for i, digito in enumerate(reversed(numero)):
+        valor = int(digito)
+        if i % 2 == 0:
+            valor *= 2
+            if valor > 9:
+                valor -= 9
+        total += valor
+    return str((10 - total % 10) % 10)
+
+
+def formatear_codigo_matricula(anio, secuencial):
+    """MAT-2025-000123-4: año lectivo, secuencial y dígito verificador."""
+    numero = f'{anio}{secuencial:06d}'
+    return f'MAT-{anio}-{secuencial:06d}-{digito_verificador(numero)}'
+
+
+def crear_secuencia_codigos(anio):
+    """
+    Crea la secuencia de códigos del año lectivo si no existe. La crea
+    PeriodoAcademico.save() (y la migración 0010 para los existentes); aquí
+    solo se llega por un período que se saltó save(). Dos procesos que la
+    crean a la vez pueden chocar en pg_type aun con IF NOT EXISTS: el
+    perdedor recibe IntegrityError, y para él la secuencia ya existe.
+    """
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS matricula_codigo_{anio:d}')
+    except IntegrityError:
+        pass
+
 
+def reservar_codigos_matricula(periodo_id, cantidad=1):
+    """
+    Reserva `cantidad` códigos consecutivos para el período en una sola consulta.
 
-def generar_codigo_matricula():
-    """Genera un cÃ³digo Ãºnico para la matrÃ­cula"""
-    return f"MAT-{shortuuid.uuid()[:8].upper()}"
+    Usa una secuencia de PostgreSQL por año lectivo (los períodos Sierra y
+    Costa que inician el mismo año la comparten, así los códigos nunca
+    chocan). Los huecos por transacciones revertidas son aceptables; los
+    códigos son monótonos y no requieren reintentos. Las rutas masivas
+    (bulk_create) deben reservar el bloque completo de una vez. La ruta de
+    la petición no ejecuta DDL: solo comprueba (una vez por proceso) que la
+    secuencia exista.
+    """
+    if connection.vendor != 'postgresql':
+        # Bases de prueba sin secuencias: código aleatorio de 8 caracteres
+        return [f"MAT-{shortuuid.uuid()[:8].upper()}" for _ in range(cantidad)]
+
+    from apps.periodos.models import PeriodoAcademico
+    with connection.cursor() as cursor:
+        anio = _ANIO_POR_PERIODO.get(periodo_id)
+        if anio is None:
+            cursor.execute(
+                f'SELECT EXTRACT(YEAR FROM fecha_inicio)::int '
+                f'FROM {PeriodoAcademico._meta.db_table} WHERE id = %s',
+                [periodo_id],
+            )
+            anio = cursor.fetchone()[0]
+            cursor.execute('SELECT to_regclass(%s)', [f'matricula_codigo_{anio:d}'])
+            if cursor.fetchone()[0] is None:
+                crear_secuencia_codigos(anio)
+                # Solo se recuerda si la creación de la secuencia se confirma
+                transaction.on_commit(
+                    lambda: _ANIO_POR_PERIODO.__setitem__(periodo_id, anio)
+                )
+            else:
+                _ANIO_POR_PERIODO[periodo_id] = anio
+        cursor.execute(
+            'SELECT nextval(%s) FROM generate_series(1, %s)',
+            [f'matricula_codigo_{anio:d}', cantidad],
+        )
+        return [formatear_codigo_matricula(anio, fila[0]) for fila in cursor.fetchall()]
+
+
+def generar_codigo_matricula(periodo_id):
+    """Genera el siguiente código de matrícula del período."""
+    return reservar_codigos_matricula(periodo_id, 1)[0]
 
 
 def enviar_email_sistema(destinatario, asunto, mensaje):
@@ -20,3 +104,32 @@ def enviar_email_sistema(destinatario, asunto, mensaje):
         recipient_list=[destinatario],
         fail_silently=True,
     )
+
+
+def aplicar_version_enviada(request, objeto):
+    """
+    Toma la versión que el usuario tenía en pantalla (campo oculto
+    `version`) para que la actualización se compare contra ella y no
+    contra la recién leída de la base de datos.
+    """
+    version = request.POST.get('version', '')
+    if version.isdigit():
+        objeto.version = int(version)
+    return objeto
+
+
+# ─── Respuestas condicionales (ETag) ──────────────────────────────────────────
+
+def sello_queryset(queryset):
+    """
+    Validador barato de un conjunto: (último updated_at, cantidad de filas).
+    Un solo agregado; la cantidad detecta también las eliminaciones.
+    """
+    fila = queryset.order_by().aggregate(ultimo=Max('updated_at'), total=Count('pk'))
+    return fila['ultimo'], fila['total']
+
+
+def etag_de(*partes):
+    """ETag débil a partir de los valores que determinan la representación."""
+    resumen = hashlib.md5(repr(partes).encode(), usedforsecurity=False).hexdigest()
+    return f'W/"{resumen}"'
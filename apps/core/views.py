@@ -1,8 +1,82 @@
-﻿from django.shortcuts import render
+﻿import hmac
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse, JsonResponse
+
+from . import metricas as _metricas
+from .admision import configuracion, evaluar_turno, guardar_pase, leer_pase
+
+logger = logging.getLogger(__name__)
 
 
 def home(request):
     if request.user.is_authenticated:
         return render(request, 'core/home.html')
     return render(request, 'core/landing.html')
+
+
+@login_required
+def turno_admision(request, clase):
+    """Sondeo de la sala de espera: posición actual y si ya fue admitido."""
+    if clase not in configuracion()['CLASES']:
+        raise Http404
+    token, _ = leer_pase(request, clase)
+    turno    = evaluar_turno(clase, token)
+    response = JsonResponse({'admitido': turno.posicion == 0, 'posicion': turno.posicion})
+    response['Cache-Control'] = 'no-store'
+    return guardar_pase(response, turno)
+
+
+def metricas(request):
+    """
+    Métricas en formato de texto de Prometheus. Acceso con
+    `Authorization: Bearer <METRICAS_TOKEN>` o como personal autenticado.
+    """
+    token     = getattr(settings, 'METRICAS_TOKEN', '')
+    cabecera  = request.headers.get('Authorization', '')
+    por_token = bool(token) and hmac.compare_digest(cabecera, f'Bearer {token}')
+    if not por_token and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse(status=401 if not request.user.is_authenticated else 403)
+    response = HttpResponse(_metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def salud(request):
+    """Vida: el proceso responde. No toca la base (un corte de PostgreSQL no debe reiniciarlo)."""
+    response = JsonResponse({'estado': 'ok'})
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def salud_listo(request):
+    """
+    Disponibilidad: la base y la cache responden. 503 mientras no, para que
+    el balanceador deje de enviar tráfico a esta instancia.
+    """
+    componentes = {}
+    for alias in connections:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+            componentes[f'base_{alias}'] = 'ok'
+        except DatabaseError:
+            logger.exception('Salud: la base %s no responde', alias)
+            componentes[f'base_{alias}'] = 'error'
+    try:
+        cache.set('salud_listo', 1, 5)
+        componentes['cache'] = 'ok' if cache.get('salud_listo') == 1 else 'sin escritura'
+    except Exception:   # cada backend de cache lanza sus propias excepciones
+        logger.exception('Salud: la cache no responde')
+        componentes['cache'] = 'error'
+
+    listo    = all(v == 'ok' for v in componentes.values())
+    response = JsonResponse({'estado': 'ok' if listo else 'no disponible', **componentes},
+                            status=200 if listo else 503)
+    response['Cache-Control'] = 'no-store'
+    return response
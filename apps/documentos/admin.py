@@ -1,4 +1,5 @@
 ﻿from django.contrib import admin
+from apps.core.admin import VersionadoAdminForm
 from .models import TipoDocumento, DocumentoMatricula
 
 
@@ -10,5 +11,7 @@ class TipoDocumentoAdmin(admin.ModelAdmin):
 
 @admin.register(DocumentoMatricula)
 class DocumentoMatriculaAdmin(admin.ModelAdmin):
+    form = VersionadoAdminForm
     list_display = ['__str__', 'estado', 'verificado_por', 'updated_at']
     list_filter = ['estado']
+    list_select_related = ['matricula', 'verificado_por']
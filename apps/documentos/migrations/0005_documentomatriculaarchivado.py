@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0004_alter_documentomatricula_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentoMatriculaArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archivo', models.CharField(blank=True, max_length=255, verbose_name='Ruta del archivo')),
+                ('nombre_original', models.CharField(blank=True, max_length=255, verbose_name='Nombre original del archivo')),
+                ('tamano_bytes', models.PositiveIntegerField(blank=True, null=True, verbose_name='Tamaño en bytes')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente de verificación'), ('VERIFICADO', 'Verificado y aceptado'), ('RECHAZADO', 'Rechazado — debe volver a subir')], max_length=15, verbose_name='Estado')),
+                ('observacion', models.TextField(blank=True, verbose_name='Observación del revisor')),
+                ('fecha_verificacion', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de verificación')),
+                ('created_at', models.DateTimeField(verbose_name='Creado el')),
+                ('updated_at', models.DateTimeField(verbose_name='Modificado el')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+            ],
+            options={
+                'verbose_name': 'Documento de matrícula archivada',
+                'verbose_name_plural': 'Documentos de matrículas archivadas',
+                'ordering': ['matricula', 'tipo'],
+            },
+        ),
+    ]
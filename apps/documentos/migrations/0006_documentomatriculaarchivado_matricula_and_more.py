@@ -0,0 +1,32 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matriculas', '0004_matriculaarchivada_historialmatriculaarchivado_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('documentos', '0005_documentomatriculaarchivado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentomatriculaarchivado',
+            name='matricula',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='documentos', to='matriculas.matriculaarchivada', verbose_name='Matrícula archivada'),
+        ),
+        migrations.AddField(
+            model_name='documentomatriculaarchivado',
+            name='tipo',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='documentos.tipodocumento', verbose_name='Tipo de documento'),
+        ),
+        migrations.AddField(
+            model_name='documentomatriculaarchivado',
+            name='verificado_por',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Verificado por'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentos', '0006_documentomatriculaarchivado_matricula_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentomatricula',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión'),
+        ),
+    ]
@@ -7,9 +7,9 @@
 import os
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
-from django.db import models
-from apps.core.models import TimeStampedModel
-from apps.matriculas.models import Matricula
+from django.db import models, transaction
+from apps.core.models import TimeStampedModel, VersionadoModel
+from apps.matriculas.models import EventoMatricula, Matricula, MatriculaArchivada
 
 
 def validar_tamano_archivo(archivo):
@@ -23,7 +23,7 @@ def ruta_documento(instance, filename):
     """Genera la ruta de almacenamiento del documento."""
     ext = filename.split('.')[-1]
     return (f'documentos/matriculas/'
-            f'{instance.matricula.paralelo.periodo_id}/'
+            f'{instance.matricula.periodo_id}/'
             f'{instance.matricula.codigo}/'
             f'{instance.tipo.codigo}_{instance.pk}.{ext}')
 
@@ -81,26 +81,33 @@ class TipoDocumento(TimeStampedModel):
         Devuelve True si este tipo de documento aplica para
         el tipo y condiciones de la matrícula dada.
         """
-        from apps.matriculas.models import Matricula as M
-        tipo = matricula.tipo
-        tiene_discapacidad = matricula.estudiante.tiene_discapacidad
-
-        if tipo == M.TIPO_NUEVA and not self.aplica_primera_vez:
-            return False
-        if tipo == M.TIPO_RENOVACION and not self.aplica_renovacion:
-            return False
-        if tipo == M.TIPO_TRASLADO_ENTRADA and not self.aplica_traslado:
-            return False
-        if self.aplica_discapacidad and not tiene_discapacidad:
-            return False
-        return True
+        return tipo_aplica_para_matricula(self, matricula)
 
     @property
     def extensiones_lista(self):
         return [ext.strip().lower() for ext in self.formatos_permitidos.split(',')]
 
 
-class DocumentoMatricula(TimeStampedModel):
+def tipo_aplica_para_matricula(tipo_documento, matricula):
+    """
+    Regla de TipoDocumento.aplica_para_matricula; la comparten el modelo y
+    el registro del catálogo en memoria (apps.core.catalogos).
+    """
+    from apps.matriculas.models import Matricula as M
+    tipo = matricula.tipo
+
+    if tipo == M.TIPO_NUEVA and not tipo_documento.aplica_primera_vez:
+        return False
+    if tipo == M.TIPO_RENOVACION and not tipo_documento.aplica_renovacion:
+        return False
+    if tipo == M.TIPO_TRASLADO_ENTRADA and not tipo_documento.aplica_traslado:
+        return False
+    if tipo_documento.aplica_discapacidad and not matricula.estudiante.tiene_discapacidad:
+        return False
+    return True
+
+
+class DocumentoMatricula(TimeStampedModel, VersionadoModel):
     """
     Archivo concreto subido por el representante para una matrícula.
     Cada documento pasa por revisión de la secretaría.
@@ -161,7 +168,9 @@ class DocumentoMatricula(TimeStampedModel):
         unique_together     = [['matricula', 'tipo']]
 
     def __str__(self):
-        return f'{self.tipo.nombre} — {self.matricula.codigo}'
+        from apps.core.catalogos import TIPOS_DOCUMENTO
+        tipo = TIPOS_DOCUMENTO.get(self.tipo_id)
+        return f'{tipo.nombre if tipo else self.tipo_id} — {self.matricula.codigo}'
 
     def save(self, *args, **kwargs):
         if self.archivo and not self.nombre_original:
@@ -203,13 +212,63 @@ class DocumentoMatricula(TimeStampedModel):
         self.verificado_por = usuario
         self.fecha_verificacion = tz.now()
         self.observacion = ''
-        self.save()
+        with transaction.atomic():
+            self.guardar_cambios(['estado', 'verificado_por', 'fecha_verificacion', 'observacion'])
+            self._registrar_evento(EventoMatricula.TIPO_DOCUMENTO_VERIFICADO)
 
     def rechazar(self, usuario, observacion):
-        """Rechaza el documento con observación."""
+        """Rechaza el documento con observación y avisa al representante."""
+        from apps.notificaciones.services import notificar_documento_rechazado
         if not observacion:
             raise ValidationError('Debe indicar el motivo del rechazo.')
         self.estado = self.ESTADO_RECHAZADO
         self.verificado_por = usuario
         self.observacion = observacion
-        self.save()
\ No newline at end of file
+        with transaction.atomic():
+            self.guardar_cambios(['estado', 'verificado_por', 'observacion'])
+            self._registrar_evento(EventoMatricula.TIPO_DOCUMENTO_RECHAZADO,
+                                   observacion=observacion)
+            transaction.on_commit(lambda: notificar_documento_rechazado(self), robust=True)
+
+    def _registrar_evento(self, tipo, **extra):
+        EventoMatricula.registrar(tipo, self.matricula, documento=self.pk,
+                                  tipo_documento=self.tipo.codigo, **extra)
+
+
+class DocumentoMatriculaArchivado(models.Model):
+    """
+    Documento de una matrícula archivada (período cerrado).
+    El archivo físico no se mueve: se conserva la ruta original en el storage.
+    """
+    id                 = models.BigIntegerField(primary_key=True)
+    matricula          = models.ForeignKey(MatriculaArchivada, on_delete=models.DO_NOTHING,
+                                           db_constraint=False, related_name='documentos',
+                                           verbose_name='Matrícula archivada')
+    tipo               = models.ForeignKey(TipoDocumento, on_delete=models.DO_NOTHING,
+                                           db_constraint=False, related_name='+',
+                                           verbose_name='Tipo de documento')
+    archivo            = models.CharField(max_length=255, blank=True,
+                                          verbose_name='Ruta del archivo')
+    nombre_original    = models.CharField(max_length=255, blank=True,
+                                          verbose_name='Nombre original del archivo')
+    tamano_bytes       = models.PositiveIntegerField(blank=True, null=True,
+                                                     verbose_name='Tamaño en bytes')
+    estado             = models.CharField(max_length=15, choices=DocumentoMatricula.ESTADOS,
+                                          verbose_name='Estado')
+    observacion        = models.TextField(blank=True, verbose_name='Observación del revisor')
+    verificado_por     = models.ForeignKey('usuarios.Usuario', on_delete=models.DO_NOTHING,
+                                           db_constraint=False, null=True, blank=True,
+                                           related_name='+', verbose_name='Verificado por')
+    fecha_verificacion = models.DateTimeField(blank=True, null=True,
+                                              verbose_name='Fecha de verificación')
+    created_at         = models.DateTimeField(verbose_name='Creado el')
+    updated_at         = models.DateTimeField(verbose_name='Modificado el')
+    is_active          = models.BooleanField(default=True, verbose_name='Activo')
+
+    class Meta:
+        verbose_name        = 'Documento de matrícula archivada'
+        verbose_name_plural = 'Documentos de matrículas archivadas'
+        ordering            = ['matricula', 'tipo']
+
+    def __str__(self):
+        return f'{self.tipo_id} — {self.matricula_id} (archivado)'
@@ -7,7 +7,7 @@
 import os
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import PermissionDenied, ValidationError
 from django.http import FileResponse, Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy, reverse
@@ -15,8 +15,12 @@ from django.utils import timezone
 from django.views import View
 from django.views.generic import ListView, DetailView, CreateView, DeleteView, TemplateView
 
-from .models import DocumentoMatricula, TipoDocumento
+from .models import DocumentoMatricula
+from apps.core.catalogos import TIPOS_DOCUMENTO
 from apps.matriculas.models import Matricula
+from apps.core.idempotencia import IdempotenteMixin
+from apps.core.models import ConflictoConcurrencia
+from apps.core.utils import aplicar_version_enviada
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -54,19 +58,20 @@ class DocumentosMatriculaView(LoginRequiredMixin, View):
     template_name = 'documentos/lista.html'
 
     def get(self, request, matricula_pk):
-        matricula = get_object_or_404(Matricula, pk=matricula_pk)
+        matricula = get_object_or_404(Matricula.objects.select_related('estudiante'),
+                                      pk=matricula_pk)
 
         if not _puede_ver_matricula(request.user, matricula):
             raise PermissionDenied
 
-        # Documentos ya subidos
+        # Documentos ya subidos (el tipo sale del catálogo en memoria: sin JOIN)
         documentos = DocumentoMatricula.objects.filter(
             matricula=matricula
-        ).select_related('tipo', 'verificado_por')
+        ).select_related('verificado_por').order_by()
 
         # Tipos requeridos para esta matrícula
         tipos_requeridos = [
-            t for t in TipoDocumento.objects.filter(is_active=True).order_by('orden')
+            t for t in TIPOS_DOCUMENTO.activos()
             if t.aplica_para_matricula(matricula)
         ]
 
@@ -107,13 +112,15 @@ class DocumentosMatriculaView(LoginRequiredMixin, View):
 #  SUBIR DOCUMENTO
 # ─────────────────────────────────────────────────────────────────────────────
 
-class SubirDocumentoView(LoginRequiredMixin, View):
+class SubirDocumentoView(LoginRequiredMixin, IdempotenteMixin, View):
     """El representante sube un documento para una matrícula."""
     template_name = 'documentos/subir.html'
 
     def _get_matricula_y_tipo(self, matricula_pk, tipo_pk, user):
         matricula = get_object_or_404(Matricula, pk=matricula_pk)
-        tipo      = get_object_or_404(TipoDocumento, pk=tipo_pk)
+        tipo      = TIPOS_DOCUMENTO.get(tipo_pk)
+        if tipo is None:
+            raise Http404('Tipo de documento no encontrado.')
         if not _puede_ver_matricula(user, matricula):
             raise PermissionDenied
         return matricula, tipo
@@ -122,7 +129,7 @@ class SubirDocumentoView(LoginRequiredMixin, View):
         matricula, tipo = self._get_matricula_y_tipo(matricula_pk, tipo_pk, request.user)
         # Si ya existe, pre-cargar
         documento = DocumentoMatricula.objects.filter(
-            matricula=matricula, tipo=tipo
+            matricula=matricula, tipo_id=tipo.pk
         ).first()
         return render(request, self.template_name, {
             'matricula': matricula,
@@ -155,7 +162,7 @@ class SubirDocumentoView(LoginRequiredMixin, View):
         # Crear o reemplazar
         doc, created = DocumentoMatricula.objects.get_or_create(
             matricula=matricula,
-            tipo=tipo,
+            tipo_id=tipo.pk,
             defaults={
                 'archivo': archivo,
                 'nombre_original': archivo.name,
@@ -164,12 +171,8 @@ class SubirDocumentoView(LoginRequiredMixin, View):
             }
         )
         if not created:
-            # Eliminar archivo anterior y reemplazar
-            if doc.archivo:
-                try:
-                    os.remove(doc.archivo.path)
-                except Exception:
-                    pass
+            # Reemplazar; el archivo anterior se elimina solo si el guardado prosperó
+            anterior            = doc.archivo.path if doc.archivo else None
             doc.archivo         = archivo
             doc.nombre_original = archivo.name
             doc.tamano_bytes    = archivo.size
@@ -177,7 +180,17 @@ class SubirDocumentoView(LoginRequiredMixin, View):
             doc.observacion     = ''
             doc.verificado_por  = None
             doc.fecha_verificacion = None
-            doc.save()
+            try:
+                doc.save()
+            except ConflictoConcurrencia as e:
+                # Secretaría lo verificó o rechazó entre la lectura y el guardado
+                messages.error(request, e.messages[0])
+                return redirect('documentos:lista', matricula_pk=matricula.pk)
+            if anterior:
+                try:
+                    os.remove(anterior)
+                except Exception:
+                    pass
 
         messages.success(request,
             f'Documento "{tipo.nombre}" subido correctamente. Pendiente de verificación.')
@@ -246,14 +259,18 @@ class EliminarDocumentoView(LoginRequiredMixin, View):
 #  VERIFICAR DOCUMENTO (secretaría)
 # ─────────────────────────────────────────────────────────────────────────────
 
-class VerificarDocumentoView(PersonalMixin, View):
+class VerificarDocumentoView(PersonalMixin, IdempotenteMixin, View):
     """Secretaría marca un documento como verificado."""
 
     def post(self, request, pk):
         doc = get_object_or_404(DocumentoMatricula, pk=pk)
-        doc.verificar(request.user)
-        messages.success(request,
-            f'Documento "{doc.tipo.nombre}" verificado correctamente.')
+        try:
+            aplicar_version_enviada(request, doc)
+            doc.verificar(request.user)
+            messages.success(request,
+                f'Documento "{doc.tipo.nombre}" verificado correctamente.')
+        except ValidationError as e:
+            messages.error(request, str(e))
         return redirect('documentos:lista', matricula_pk=doc.matricula_id)
 
 
@@ -261,7 +278,7 @@ class VerificarDocumentoView(PersonalMixin, View):
 #  RECHAZAR DOCUMENTO (secretaría)
 # ─────────────────────────────────────────────────────────────────────────────
 
-class RechazarDocumentoView(PersonalMixin, View):
+class RechazarDocumentoView(PersonalMixin, IdempotenteMixin, View):
     """Secretaría rechaza un documento indicando el motivo."""
 
     def post(self, request, pk):
@@ -271,6 +288,7 @@ class RechazarDocumentoView(PersonalMixin, View):
             messages.error(request, 'Debe indicar el motivo del rechazo.')
             return redirect('documentos:lista', matricula_pk=doc.matricula_id)
         try:
+            aplicar_version_enviada(request, doc)
             doc.rechazar(request.user, observacion)
             messages.warning(request,
                 f'Documento "{doc.tipo.nombre}" rechazado. El representante será notificado.')
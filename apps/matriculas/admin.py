@@ -3,7 +3,11 @@ from django.utils.html import format_html
 from django.utils import timezone
 from django.contrib import messages
 
-from .models import Matricula, HistorialMatricula
+from apps.core.admin import VersionadoAdminForm
+from .models import (
+    Matricula, HistorialMatricula, EventoMatricula, SuscripcionWebhook,
+    MatriculaArchivada, HistorialMatriculaArchivado,
+)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -27,16 +31,18 @@ class HistorialMatriculaInline(admin.TabularInline):
 # ─────────────────────────────────────────────────────────────────────────────
 @admin.register(Matricula)
 class MatriculaAdmin(admin.ModelAdmin):
+    form = VersionadoAdminForm
+
     # ── Listado ───────────────────────────────────────────────────────────────
     list_display = (
         'codigo', 'estudiante', 'paralelo', 'tipo',
-        'badge_estado', 'solicitante', 'fecha_solicitud', 'dias_en_proceso',
+        'badge_estado', 'solicitante', 'fecha_solicitud', 'dias_proceso',
     )
-    list_filter  = ('estado', 'tipo', 'paralelo__periodo', 'fecha_solicitud')
+    list_filter  = ('estado', 'tipo', 'periodo', 'fecha_solicitud')
     search_fields = (
         'codigo',
         'estudiante__nombres', 'estudiante__apellidos',
-        'estudiante__numero_identificacion',
+        'estudiante__cedula',
         'solicitante__username', 'solicitante__email',
     )
     date_hierarchy  = 'fecha_solicitud'
@@ -54,7 +60,7 @@ class MatriculaAdmin(admin.ModelAdmin):
 
     fieldsets = (
         ('Identificación', {
-            'fields': ('codigo', 'badge_estado', 'tipo'),
+            'fields': ('codigo', 'badge_estado', 'tipo', 'version_leida'),
         }),
         ('Participantes', {
             'fields': ('estudiante', 'paralelo', 'solicitante', 'matricula_anterior'),
@@ -158,6 +164,14 @@ class MatriculaAdmin(admin.ModelAdmin):
             color, icono, obj.get_estado_display(),
         )
 
+    # ── Días en proceso calculados en SQL (ordenables) ────────────────────────
+    def get_queryset(self, request):
+        return super().get_queryset(request).con_tiempos()
+
+    @admin.display(description='Días en proceso', ordering='dias_proceso')
+    def dias_proceso(self, obj):
+        return obj.dias_proceso
+
     # ── Protecciones de edición ───────────────────────────────────────────────
     def get_readonly_fields(self, request, obj=None):
         """Hace inmutables los campos clave en matrículas finalizadas."""
@@ -199,4 +213,76 @@ class HistorialMatriculaAdmin(admin.ModelAdmin):
 
     @admin.display(description='Comentario')
     def comentario_corto(self, obj):
-        return (obj.comentario[:60] + '…') if len(obj.comentario) > 60 else obj.comentario
\ No newline at end of file
+        return (obj.comentario[:60] + '…') if len(obj.comentario) > 60 else obj.comentario
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Admin: Eventos e integraciones
+# ─────────────────────────────────────────────────────────────────────────────
+@admin.register(EventoMatricula)
+class EventoMatriculaAdmin(admin.ModelAdmin):
+    list_display  = ('id', 'tipo', 'matricula_id', 'fecha')
+    list_filter   = ('tipo', 'fecha')
+    search_fields = ('=matricula_id', 'datos__codigo')
+    readonly_fields = ('tipo', 'matricula_id', 'datos', 'fecha')
+    ordering = ('-id',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+
+@admin.register(SuscripcionWebhook)
+class SuscripcionWebhookAdmin(admin.ModelAdmin):
+    list_display  = ('nombre', 'url', 'tipos', 'ultimo_evento',
+                     'intentos_fallidos', 'proximo_intento', 'is_active')
+    list_filter   = ('is_active',)
+    search_fields = ('nombre', 'url')
+    readonly_fields = ('intentos_fallidos', 'proximo_intento', 'ultimo_error')
+    actions = ['accion_reintentar_ahora']
+
+    @admin.action(description='🔁 Reintentar ahora')
+    def accion_reintentar_ahora(self, request, queryset):
+        actualizadas = queryset.update(proximo_intento=None)
+        self.message_user(request, f'{actualizadas} suscripción(es) se reintentarán en el '
+                                   f'próximo despacho.', messages.SUCCESS)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Admin: Archivo de períodos cerrados (solo lectura)
+# ─────────────────────────────────────────────────────────────────────────────
+class HistorialArchivadoInline(admin.TabularInline):
+    model = HistorialMatriculaArchivado
+    extra = 0
+    readonly_fields = ('estado_anterior', 'estado_nuevo', 'usuario', 'fecha', 'comentario')
+    can_delete = False
+    ordering = ('fecha',)
+    verbose_name_plural = 'Historial de cambios de estado'
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MatriculaArchivada)
+class MatriculaArchivadaAdmin(admin.ModelAdmin):
+    list_display  = ('codigo', 'estudiante', 'paralelo', 'periodo', 'estado',
+                     'fecha_solicitud', 'fecha_archivado')
+    list_filter   = ('periodo', 'estado', 'tipo')
+    search_fields = ('codigo', 'estudiante__nombres', 'estudiante__apellidos',
+                     'estudiante__cedula')
+    list_select_related = ('estudiante', 'paralelo', 'periodo')
+    inlines       = [HistorialArchivadoInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
@@ -0,0 +1,132 @@
+"""
+============================================================
+  EVENTOS: apps.matriculas
+  Difusión de cambios de estado a los clientes SSE conectados
+============================================================
+
+Cada cambio registrado en HistorialMatricula se publica en el canal
+PostgreSQL `matricula_estado` (pg_notify, que PostgreSQL entrega solo al
+confirmar la transacción). Cada proceso ASGI mantiene UNA conexión con
+LISTEN en un hilo propio y reparte los avisos entre las colas asyncio de
+los suscriptores de esa matrícula. Un cliente inactivo cuesta una cola
+vacía: no retiene conexión a la base de datos ni hilo.
+
+Con otros motores (desarrollo con SQLite) la entrega es solo dentro del
+mismo proceso.
+"""
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+CANAL = 'matricula_estado'
+
+
+def _es_postgresql(conexion=None):
+    return (conexion or connection).vendor == 'postgresql'
+
+
+# ─── Publicación ──────────────────────────────────────────────────────────────
+
+def publicar_cambio_estado(historial):
+    """Publica el cambio de estado representado por un HistorialMatricula."""
+    evento = {
+        'id':             historial.pk,
+        'matricula':      historial.matricula_id,
+        'estado':         historial.estado_nuevo,
+        'estado_display': historial.matricula.get_estado_display(),
+        'version':        historial.matricula.version,
+    }
+    if _es_postgresql():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CANAL, json.dumps(evento)])
+    else:
+        transaction.on_commit(lambda: difusor.repartir(evento))
+
+
+# ─── Difusor en proceso ───────────────────────────────────────────────────────
+
+class Difusor:
+    """
+    Registro de suscriptores por matrícula. El hilo LISTEN (o la
+    publicación local) llama a `repartir`; cada suscriptor recibe el
+    evento en su propio bucle asyncio mediante call_soon_threadsafe.
+    """
+
+    REINTENTO_SEGUNDOS = 5
+
+    def __init__(self):
+        self._suscriptores = defaultdict(set)
+        self._candado      = threading.Lock()
+        self._hilo         = None
+
+    def suscribir(self, matricula_id, loop, cola):
+        self._iniciar_escucha()
+        with self._candado:
+            self._suscriptores[matricula_id].add((loop, cola))
+
+    def desuscribir(self, matricula_id, loop, cola):
+        with self._candado:
+            grupo = self._suscriptores.get(matricula_id)
+            if grupo is None:
+                return
+            grupo.discard((loop, cola))
+            if not grupo:
+                del self._suscriptores[matricula_id]
+
+    def repartir(self, evento):
+        with self._candado:
+            destinos = list(self._suscriptores.get(evento['matricula'], ()))
+        for loop, cola in destinos:
+            try:
+                loop.call_soon_threadsafe(cola.put_nowait, evento)
+            except RuntimeError:
+                # El bucle del cliente ya se cerró; se limpiará al desuscribir
+                pass
+
+    # ─── Escucha PostgreSQL ───────────────────────────────────────────────────
+    def _iniciar_escucha(self):
+        if self._hilo is not None or not _es_postgresql(connections['default']):
+            return
+        with self._candado:
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._escuchar, name='matricula-estado-listen', daemon=True,
+                )
+                self._hilo.start()
+
+    def _escuchar(self):
+        import psycopg2
+
+        parametros = connections['default'].get_connection_params()
+        while True:
+            conexion = None
+            try:
+                conexion = psycopg2.connect(**parametros)
+                conexion.autocommit = True
+                with conexion.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CANAL}')
+                while True:
+                    if select.select([conexion], [], [], 30) == ([], [], []):
+                        continue
+                    conexion.poll()
+                    while conexion.notifies:
+                        aviso = conexion.notifies.pop(0)
+                        try:
+                            self.repartir(json.loads(aviso.payload))
+                        except (ValueError, KeyError):
+                            logger.warning('Aviso inválido en %s: %r', CANAL, aviso.payload)
+            except Exception:
+                logger.exception('Se perdió la escucha de %s; reintentando', CANAL)
+                if conexion is not None:
+                    conexion.close()
+                time.sleep(self.REINTENTO_SEGUNDOS)
+
+
+difusor = Difusor()
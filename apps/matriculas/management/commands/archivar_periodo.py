@@ -0,0 +1,118 @@
+"""
+Mueve las matrículas de un período cerrado a las tablas de archivo.
+
+Uso:
+    python manage.py archivar_periodo <periodo_id> [--lote 1000] [--simular]
+
+Las tablas calientes quedan solo con los períodos vigentes, de modo que
+los filtros del día a día (panel de secretaría, dashboards) no recorren
+años anteriores. El proceso es idempotente y avanza por lotes; si se
+interrumpe, basta con volver a ejecutarlo.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.documentos.models import DocumentoMatricula, DocumentoMatriculaArchivado
+from apps.matriculas.models import (
+    HistorialMatricula, HistorialMatriculaArchivado,
+    Matricula, MatriculaArchivada,
+)
+from apps.periodos.models import PeriodoAcademico
+
+
+CAMPOS_MATRICULA = [
+    'id', 'codigo', 'estudiante_id', 'paralelo_id', 'solicitante_id', 'tipo', 'estado',
+    'fecha_solicitud', 'fecha_revision', 'fecha_resolucion', 'fecha_anulacion',
+    'revisado_por_id', 'anulado_por_id', 'observaciones', 'motivo_rechazo',
+    'motivo_anulacion', 'matricula_anterior_id', 'numero_intentos',
+    'created_at', 'updated_at', 'is_active',
+]
+CAMPOS_HISTORIAL = [
+    'id', 'matricula_id', 'estado_anterior', 'estado_nuevo',
+    'usuario_id', 'fecha', 'comentario',
+]
+CAMPOS_DOCUMENTO = [
+    'id', 'matricula_id', 'tipo_id', 'archivo', 'nombre_original', 'tamano_bytes',
+    'estado', 'observacion', 'verificado_por_id', 'fecha_verificacion',
+    'created_at', 'updated_at', 'is_active',
+]
+
+
+class Command(BaseCommand):
+    help = 'Archiva las matrículas, historial y documentos de un período cerrado.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('periodo_id', type=int)
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Matrículas por transacción (default: 1000).')
+        parser.add_argument('--simular', action='store_true',
+                            help='Solo informa cuántas filas se moverían.')
+        parser.add_argument('--desvincular', action='store_true',
+                            help='Permite archivar aunque matrículas vigentes las '
+                                 'referencien como matrícula anterior.')
+
+    def handle(self, *args, **options):
+        try:
+            periodo = PeriodoAcademico.objects.get(pk=options['periodo_id'])
+        except PeriodoAcademico.DoesNotExist:
+            raise CommandError(f'No existe el período {options["periodo_id"]}.')
+        if periodo.es_activo:
+            raise CommandError(f'El período "{periodo}" está activo; no se puede archivar.')
+
+        matriculas = Matricula.objects.filter(periodo=periodo)
+        referenciadas = Matricula.objects.filter(
+            matricula_anterior__periodo=periodo,
+        ).exclude(periodo=periodo).count()
+
+        if options['simular']:
+            self.stdout.write(
+                f'{periodo}: {matriculas.count()} matrículas, '
+                f'{HistorialMatricula.objects.filter(matricula__periodo=periodo).count()} '
+                f'eventos de historial, '
+                f'{DocumentoMatricula.objects.filter(matricula__periodo=periodo).count()} '
+                f'documentos; {referenciadas} matrícula(s) vigentes las referencian.'
+            )
+            return
+
+        if referenciadas and not options['desvincular']:
+            raise CommandError(
+                f'{referenciadas} matrícula(s) de otros períodos referencian a este como '
+                f'matrícula anterior. Use --desvincular para archivar de todos modos '
+                f'(el id anterior queda consultable en MatriculaArchivada).'
+            )
+
+        total = 0
+        while True:
+            ids = list(matriculas.order_by('pk').values_list('pk', flat=True)[:options['lote']])
+            if not ids:
+                break
+            with transaction.atomic():
+                self._archivar_lote(ids, periodo.pk)
+            total += len(ids)
+            self.stdout.write(f'  {total} matrículas archivadas…')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Período "{periodo}" archivado: {total} matrículas movidas.'
+        ))
+
+    def _archivar_lote(self, ids, periodo_id):
+        MatriculaArchivada.objects.bulk_create(
+            [MatriculaArchivada(periodo_id=periodo_id, **fila)
+             for fila in Matricula.objects.filter(pk__in=ids).values(*CAMPOS_MATRICULA)],
+            ignore_conflicts=True,
+        )
+        HistorialMatriculaArchivado.objects.bulk_create(
+            [HistorialMatriculaArchivado(**fila)
+             for fila in HistorialMatricula.objects.filter(matricula_id__in=ids)
+                                                   .values(*CAMPOS_HISTORIAL)],
+            ignore_conflicts=True,
+        )
+        DocumentoMatriculaArchivado.objects.bulk_create(
+            [DocumentoMatriculaArchivado(**fila)
+             for fila in DocumentoMatricula.objects.filter(matricula_id__in=ids)
+                                                   .values(*CAMPOS_DOCUMENTO)],
+            ignore_conflicts=True,
+        )
+        # El borrado en cascada elimina historial y documentos (los archivos
+        # físicos se conservan) y desvincula notificaciones y renovaciones.
+        Matricula.objects.filter(pk__in=ids).delete()
@@ -0,0 +1,93 @@
+"""
+Envía los eventos de matrícula pendientes a las suscripciones webhook activas.
+
+Uso:
+    python manage.py despachar_webhooks [--lote 100] [--continuo [--intervalo 5]]
+
+Cada suscripción se procesa con su fila bloqueada (SELECT ... FOR UPDATE
+SKIP LOCKED): se pueden correr varios despachadores en paralelo sin
+entregas duplicadas. Los lotes van en orden de id; el cursor solo avanza
+si el receptor responde 2xx. Ante un error la suscripción espera de forma
+exponencial (hasta una hora) antes del siguiente intento.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from apps.matriculas.models import SuscripcionWebhook
+from apps.matriculas.webhooks import entregar, espera_reintento, eventos_visibles
+
+
+class Command(BaseCommand):
+    help = 'Envía los eventos de matrícula pendientes a los webhooks suscritos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=100,
+                            help='Eventos por envío (máximo 500).')
+        parser.add_argument('--continuo', action='store_true',
+                            help='No termina: vuelve a revisar cada --intervalo segundos.')
+        parser.add_argument('--intervalo', type=float, default=5)
+
+    def handle(self, *args, **options):
+        lote = max(1, min(options['lote'], 500))
+        while True:
+            enviados = self._despachar(lote)
+            if enviados:
+                self.stdout.write(f'{enviados} eventos entregados.')
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+
+    def _despachar(self, lote):
+        pendientes = (SuscripcionWebhook.objects
+                      .filter(is_active=True)
+                      .filter(Q(proximo_intento__isnull=True) | Q(proximo_intento__lte=timezone.now()))
+                      .values_list('pk', flat=True))
+        total = 0
+        for pk in pendientes:
+            # Vacía el atraso de la suscripción lote a lote mientras el receptor acepte
+            while True:
+                enviados = self._enviar_lote(pk, lote)
+                if enviados is None:
+                    break
+                total += enviados
+                if enviados < lote:
+                    break
+        return total
+
+    @transaction.atomic
+    def _enviar_lote(self, pk, lote):
+        """Eventos entregados a la suscripción, o None si falló o la toma otro proceso."""
+        suscripcion = (SuscripcionWebhook.objects
+                       .select_for_update(skip_locked=True)
+                       .filter(pk=pk, is_active=True).first())
+        if suscripcion is None:
+            return None
+
+        candidatos = eventos_visibles(suscripcion.ultimo_evento)
+        eventos = list(suscripcion.filtrar_eventos(candidatos)[:lote])
+        if not eventos:
+            # Nada de sus tipos: el cursor salta los eventos ya revisados
+            ultimo = candidatos.aggregate(ultimo=Max('pk'))['ultimo']
+            if ultimo:
+                suscripcion.ultimo_evento = ultimo
+                suscripcion.save(update_fields=['ultimo_evento', 'updated_at'])
+            return 0
+
+        error = entregar(suscripcion, eventos)
+        if error is None:
+            suscripcion.ultimo_evento     = eventos[-1].pk
+            suscripcion.intentos_fallidos = 0
+            suscripcion.proximo_intento   = None
+            suscripcion.ultimo_error      = ''
+        else:
+            suscripcion.intentos_fallidos += 1
+            suscripcion.proximo_intento = timezone.now() + espera_reintento(suscripcion.intentos_fallidos)
+            suscripcion.ultimo_error    = error
+            self.stderr.write(f'{suscripcion}: {error} (intento {suscripcion.intentos_fallidos})')
+        suscripcion.save(update_fields=['ultimo_evento', 'intentos_fallidos', 'proximo_intento',
+                                        'ultimo_error', 'updated_at'])
+        return len(eventos) if error is None else None
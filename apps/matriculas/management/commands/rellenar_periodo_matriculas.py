@@ -0,0 +1,43 @@
+"""
+Rellena / resincroniza la columna desnormalizada Matricula.periodo.
+
+Uso:
+    python manage.py rellenar_periodo_matriculas [--lote 5000] [--todas]
+
+La migración 0005 ya rellena las filas existentes; este comando sirve
+para corregir filas creadas por rutas que no pasan por save()
+(bulk_create, SQL manual) o tras mover paralelos entre períodos.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery
+
+from apps.matriculas.models import Matricula
+from apps.periodos.models import Paralelo
+
+
+class Command(BaseCommand):
+    help = 'Rellena Matricula.periodo a partir de paralelo.periodo, por lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Filas por lote (default: 5000).')
+        parser.add_argument('--todas', action='store_true',
+                            help='Revisa también filas con período ya asignado.')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        periodo_del_paralelo = Subquery(
+            Paralelo.objects.filter(pk=OuterRef('paralelo_id')).values('periodo_id')[:1]
+        )
+        ultimo = Matricula.objects.aggregate(m=Max('pk'))['m'] or 0
+        total = 0
+        for inicio in range(0, ultimo + 1, lote):
+            qs = Matricula.objects.filter(pk__gte=inicio, pk__lt=inicio + lote)
+            if options['todas']:
+                qs = qs.exclude(periodo_id=F('paralelo__periodo_id'))
+            else:
+                qs = qs.filter(periodo__isnull=True)
+            with transaction.atomic():
+                total += qs.update(periodo_id=periodo_del_paralelo)
+        self.stdout.write(self.style.SUCCESS(f'{total} matrícula(s) actualizada(s).'))
@@ -0,0 +1,166 @@
+"""
+Reproduce el historial de cada matrícula y lo compara con la fila actual.
+
+Uso:
+    python manage.py verificar_historial [--periodo <id>] [--lote 5000]
+        [--tolerancia 5] [--reparar] [--detalle 50]
+
+HistorialMatricula es la bitácora de auditoría; estado, numero_intentos y
+las fechas de la matrícula son columnas aparte que pueden desviarse
+(ediciones en el admin, guardados directos, SQL manual). El comando
+recorre ambas tablas ordenadas por matrícula con .iterator() (cursores
+del lado del servidor en PostgreSQL) y las cruza como un merge join: la
+memoria no depende del tamaño de las tablas.
+
+Por cada matrícula reporta:
+  - saltos en la bitácora (estado_anterior distinto del estado reproducido)
+    y transiciones que la máquina de estados no permite;
+  - columnas que no coinciden con el estado reproducido.
+
+Con --reparar, las columnas se alinean con la bitácora (UPDATE condicionado
+a la versión leída: si alguien cambió la fila entretanto, se omite). Los
+saltos y transiciones inválidas solo se reportan.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from apps.matriculas.models import EventoMatricula, HistorialMatricula, Matricula
+
+Reproducido = namedtuple(
+    'Reproducido', 'estado numero_intentos fecha_revision fecha_resolucion fecha_anulacion',
+)
+
+CAMPOS = Reproducido._fields
+CAMPOS_FECHA = ('fecha_revision', 'fecha_resolucion', 'fecha_anulacion')
+
+
+def reproducir(registros):
+    """
+    Aplica los registros de historial (estado_anterior, estado_nuevo, fecha)
+    en orden. Devuelve (Reproducido, anomalías).
+    """
+    estado, intentos = Matricula.ESTADO_PENDIENTE, 0
+    fechas = dict.fromkeys(CAMPOS_FECHA)
+    anomalias = []
+    for anterior, nuevo, fecha in registros:
+        if anterior != estado:
+            anomalias.append(f'salto: el estado reproducido es {estado} y el historial registra '
+                             f'{anterior} → {nuevo} ({fecha:%Y-%m-%d %H:%M})')
+        elif nuevo not in Matricula.TRANSICIONES.get(anterior, ()):
+            anomalias.append(f'transición no permitida {anterior} → {nuevo} ({fecha:%Y-%m-%d %H:%M})')
+        estado = nuevo
+        if nuevo == Matricula.ESTADO_EN_REVISION:
+            fechas['fecha_revision'] = fecha
+        elif nuevo in (Matricula.ESTADO_APROBADA, Matricula.ESTADO_RECHAZADA):
+            fechas['fecha_resolucion'] = fecha
+            if nuevo == Matricula.ESTADO_RECHAZADA:
+                intentos += 1
+        elif nuevo == Matricula.ESTADO_ANULADA:
+            fechas['fecha_anulacion'] = fecha
+    return Reproducido(estado, intentos, **fechas), anomalias
+
+
+class Command(BaseCommand):
+    help = 'Verifica (y opcionalmente repara) las matrículas contra su historial de estados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--periodo', type=int, help='Solo las matrículas de este período.')
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Filas por viaje al servidor (default: 5000).')
+        parser.add_argument('--tolerancia', type=float, default=5,
+                            help='Segundos de diferencia admitidos entre las fechas de la fila '
+                                 'y las del historial (default: 5).')
+        parser.add_argument('--reparar', action='store_true',
+                            help='Alinea las columnas divergentes con el historial.')
+        parser.add_argument('--detalle', type=int, default=50,
+                            help='Máximo de matrículas a detallar en la salida (default: 50).')
+
+    def handle(self, *args, **options):
+        self.tolerancia = timedelta(seconds=options['tolerancia'])
+        lote, detalle = options['lote'], options['detalle']
+
+        matriculas = Matricula.objects.order_by('pk')
+        historial  = HistorialMatricula.objects.order_by('matricula_id', 'pk')
+        if options['periodo']:
+            matriculas = matriculas.filter(periodo_id=options['periodo'])
+            historial  = historial.filter(matricula__periodo_id=options['periodo'])
+        filas = matriculas.values_list('pk', 'codigo', 'version', *CAMPOS).iterator(chunk_size=lote)
+        grupos = groupby(
+            historial.values_list('matricula_id', 'estado_anterior', 'estado_nuevo', 'fecha')
+                     .iterator(chunk_size=lote),
+            key=itemgetter(0),
+        )
+
+        revisadas = con_anomalias = divergentes = reparadas = 0
+        grupo = next(grupos, None)
+        for pk, codigo, version, *actual in filas:
+            registros = []
+            # Merge join: ambos flujos vienen ordenados por matrícula
+            while grupo is not None and grupo[0] <= pk:
+                if grupo[0] == pk:
+                    registros = [fila[1:] for fila in grupo[1]]
+                grupo = next(grupos, None)
+
+            esperado, anomalias = reproducir(registros)
+            diferencias = self._diferencias(Reproducido(*actual), esperado)
+            revisadas += 1
+            if not (anomalias or diferencias):
+                continue
+            con_anomalias += bool(anomalias)
+            divergentes   += bool(diferencias)
+
+            if con_anomalias + divergentes <= detalle:
+                self.stdout.write(f'{codigo} (#{pk}):')
+                for texto in anomalias:
+                    self.stdout.write(f'    historial  {texto}')
+                for campo, (valor, correcto) in diferencias.items():
+                    self.stdout.write(f'    {campo:<16} fila={valor}  historial={correcto}')
+
+            if diferencias and options['reparar']:
+                reparadas += self._reparar(pk, version, diferencias)
+
+        self.stdout.write(
+            f'{revisadas} matrículas revisadas: {con_anomalias} con anomalías en el historial, '
+            f'{divergentes} con columnas divergentes.'
+        )
+        if options['reparar']:
+            omitidas = divergentes - reparadas
+            self.stdout.write(self.style.SUCCESS(
+                f'{reparadas} reparadas' + (f', {omitidas} omitidas (cambiaron durante la '
+                                            f'verificación).' if omitidas else '.')
+            ))
+
+    def _diferencias(self, actual, esperado):
+        """{campo: (valor en la fila, valor reproducido)} para los campos que no coinciden."""
+        diferencias = {}
+        for campo in CAMPOS:
+            valor, correcto = getattr(actual, campo), getattr(esperado, campo)
+            if campo in CAMPOS_FECHA:
+                if correcto is None:
+                    # La bitácora no dice nada de esta fecha (datos previos al historial)
+                    continue
+                if valor is not None and abs(valor - correcto) <= self.tolerancia:
+                    continue
+            elif valor == correcto:
+                continue
+            diferencias[campo] = (valor, correcto)
+        return diferencias
+
+    @transaction.atomic
+    def _reparar(self, pk, version, diferencias):
+        cambios = {campo: correcto for campo, (_, correcto) in diferencias.items()}
+        filas = Matricula.objects.filter(pk=pk, version=version).update(
+            version=F('version') + 1, **cambios,
+        )
+        if filas and 'estado' in cambios:
+            # Los sistemas externos deben enterarse del estado corregido
+            matricula = Matricula.objects.get(pk=pk)
+            EventoMatricula.registrar(EventoMatricula.tipo_de_estado(matricula.estado),
+                                      matricula, reparacion=True)
+        return filas
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estudiantes', '0003_estudiante_amie_anterior_estudiante_anio_anterior_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('periodos', '0002_alter_periodoacademico_options_nivel_subnivel_and_more'),
+        ('matriculas', '0003_alter_historialmatricula_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatriculaArchivada',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('codigo', models.CharField(max_length=20, unique=True, verbose_name='Código de matrícula')),
+                ('tipo', models.CharField(choices=[('NUEVA', 'Primera matrícula'), ('RENOVACION', 'Renovación de matrícula'), ('TRASLADO_ENTRADA', 'Traslado desde otra institución')], max_length=20, verbose_name='Tipo de matrícula')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente de revisión'), ('EN_REVISION', 'En revisión'), ('APROBADA', 'Aprobada'), ('RECHAZADA', 'Rechazada - Requiere correcciones'), ('ANULADA', 'Anulada')], max_length=15, verbose_name='Estado')),
+                ('fecha_solicitud', models.DateTimeField(verbose_name='Fecha de solicitud')),
+                ('fecha_revision', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de inicio de revisión')),
+                ('fecha_resolucion', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de aprobación / rechazo')),
+                ('fecha_anulacion', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de anulación')),
+                ('observaciones', models.TextField(blank=True, verbose_name='Observaciones internas')),
+                ('motivo_rechazo', models.TextField(blank=True, verbose_name='Motivo de rechazo')),
+                ('motivo_anulacion', models.TextField(blank=True, verbose_name='Motivo de anulación')),
+                ('matricula_anterior_id', models.BigIntegerField(blank=True, null=True, verbose_name='Id de la matrícula anterior')),
+                ('numero_intentos', models.PositiveIntegerField(default=0, verbose_name='Número de veces rechazada')),
+                ('created_at', models.DateTimeField(verbose_name='Creado el')),
+                ('updated_at', models.DateTimeField(verbose_name='Modificado el')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('fecha_archivado', models.DateTimeField(auto_now_add=True, verbose_name='Archivada el')),
+                ('anulado_por', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Anulado por')),
+                ('estudiante', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='estudiantes.estudiante', verbose_name='Estudiante')),
+                ('paralelo', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='periodos.paralelo', verbose_name='Paralelo asignado')),
+                ('periodo', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='periodos.periodoacademico', verbose_name='Período académico')),
+                ('revisado_por', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Revisado por')),
+                ('solicitante', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Representante solicitante')),
+            ],
+            options={
+                'verbose_name': 'Matrícula archivada',
+                'verbose_name_plural': 'Matrículas archivadas',
+                'ordering': ['-fecha_solicitud'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HistorialMatriculaArchivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('estado_anterior', models.CharField(max_length=15, verbose_name='Estado anterior')),
+                ('estado_nuevo', models.CharField(max_length=15, verbose_name='Estado nuevo')),
+                ('fecha', models.DateTimeField(verbose_name='Fecha del cambio')),
+                ('comentario', models.TextField(blank=True, verbose_name='Comentario')),
+                ('matricula', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='historial', to='matriculas.matriculaarchivada')),
+                ('usuario', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Usuario que realizó el cambio')),
+            ],
+            options={
+                'verbose_name': 'Historial de matrícula archivada',
+                'verbose_name_plural': 'Historial de matrículas archivadas',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='matriculaarchivada',
+            index=models.Index(fields=['periodo', 'estado'], name='matriculas__periodo_6ce2d1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matriculaarchivada',
+            index=models.Index(fields=['estudiante'], name='matriculas__estudia_11aa08_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:14
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+import django.db.models.deletion
+
+
+LOTE = 5000
+
+
+def rellenar_periodo(apps, schema_editor):
+    """Copia paralelo.periodo en lotes por rango de pk (una transacción por lote)."""
+    Matricula = apps.get_model('matriculas', 'Matricula')
+    Paralelo  = apps.get_model('periodos', 'Paralelo')
+    periodo_del_paralelo = Subquery(
+        Paralelo.objects.filter(pk=OuterRef('paralelo_id')).values('periodo_id')[:1]
+    )
+    ultimo = Matricula.objects.aggregate(m=Max('pk'))['m'] or 0
+    for inicio in range(0, ultimo + 1, LOTE):
+        Matricula.objects.filter(
+            pk__gte=inicio, pk__lt=inicio + LOTE, periodo__isnull=True,
+        ).update(periodo_id=periodo_del_paralelo)
+
+
+class Migration(migrations.Migration):
+
+    # El relleno se hace por lotes fuera de una única transacción
+    atomic = False
+
+    dependencies = [
+        ('periodos', '0002_alter_periodoacademico_options_nivel_subnivel_and_more'),
+        ('matriculas', '0004_matriculaarchivada_historialmatriculaarchivado_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matricula',
+            name='periodo',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='matriculas', to='periodos.periodoacademico', verbose_name='Período académico'),
+        ),
+        migrations.RunPython(rellenar_periodo, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='matricula',
+            index=models.Index(fields=['periodo', 'estado', '-fecha_solicitud'], name='matricula_periodo_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matricula',
+            index=models.Index(condition=models.Q(('estado__in', ['PENDIENTE', 'EN_REVISION', 'RECHAZADA'])), fields=['periodo', '-fecha_solicitud'], name='matricula_periodo_abiertas_idx'),
+        ),
+    ]
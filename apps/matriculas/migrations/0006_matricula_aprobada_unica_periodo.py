@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matriculas', '0005_matricula_periodo'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='matricula',
+            constraint=models.UniqueConstraint(condition=models.Q(('estado', 'APROBADA')), fields=('estudiante', 'periodo'), name='matricula_aprobada_unica_periodo', violation_error_message='Este estudiante ya tiene una matrícula aprobada en este período académico.'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matriculas', '0007_matricula_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoMatricula',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(db_index=True, max_length=40, verbose_name='Tipo')),
+                ('matricula_id', models.BigIntegerField(db_index=True, verbose_name='Matrícula')),
+                ('datos', models.JSONField(default=dict, verbose_name='Datos')),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+            ],
+            options={
+                'verbose_name': 'Evento de matrícula',
+                'verbose_name_plural': 'Eventos de matrícula',
+                'ordering': ['pk'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SuscripcionWebhook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modificado el')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('nombre', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('url', models.URLField(max_length=500, verbose_name='URL de destino')),
+                ('secreto', models.CharField(blank=True, help_text='Firma HMAC-SHA256 de cada envío y token Bearer para el feed. Se genera si se deja vacío.', max_length=64, verbose_name='Secreto de firma')),
+                ('tipos', models.CharField(blank=True, help_text='Separados por coma; "matricula.*" acepta un prefijo. Vacío = todos.', max_length=255, verbose_name='Tipos de evento')),
+                ('ultimo_evento', models.BigIntegerField(default=0, verbose_name='Último evento entregado')),
+                ('intentos_fallidos', models.PositiveIntegerField(default=0, verbose_name='Intentos fallidos')),
+                ('proximo_intento', models.DateTimeField(blank=True, null=True, verbose_name='Próximo intento')),
+                ('ultimo_error', models.TextField(blank=True, verbose_name='Último error')),
+            ],
+            options={
+                'verbose_name': 'Suscripción webhook',
+                'verbose_name_plural': 'Suscripciones webhook',
+                'ordering': ['nombre'],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matriculas', '0008_eventomatricula_suscripcionwebhook'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matricula',
+            index=models.Index(condition=models.Q(('estado', 'EN_REVISION')), fields=['fecha_revision'], name='matricula_revision_abierta_idx'),
+        ),
+    ]
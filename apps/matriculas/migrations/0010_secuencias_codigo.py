@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def crear_secuencias(apps, schema_editor):
+    """Secuencias de códigos de los períodos existentes (las nuevas las crea PeriodoAcademico.save)."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    PeriodoAcademico = apps.get_model('periodos', 'PeriodoAcademico')
+    anios = {fecha.year for fecha in PeriodoAcademico.objects.values_list('fecha_inicio', flat=True)}
+    for anio in sorted(anios):
+        schema_editor.execute(f'CREATE SEQUENCE IF NOT EXISTS matricula_codigo_{anio:d}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matriculas', '0009_matricula_matricula_revision_abierta_idx'),
+        ('periodos', '0003_ventanamatricula'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_secuencias, migrations.RunPython.noop),
+    ]
@@ -4,16 +4,58 @@
   Proceso completo del flujo de matrícula y su historial
 ============================================================
 """
+from contextlib import nullcontext
+from datetime import timedelta
+
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, models, router, transaction
+from django.db.models.functions import Coalesce, ExtractDay, Now
 from django.utils import timezone
-from apps.core.models import TimeStampedModel
+from apps.core.models import TimeStampedModel, VersionadoModel
 from apps.usuarios.models import Usuario
 from apps.estudiantes.models import Estudiante
-from apps.periodos.models import Paralelo
+from apps.periodos.models import PeriodoAcademico, Paralelo
+
+
+MENSAJE_APROBADA_DUPLICADA = (
+    'Este estudiante ya tiene una matrícula aprobada en este período académico.'
+)
 
+class MatriculaQuerySet(models.QuerySet):
+
+    def con_tiempos(self):
+        """
+        Equivalentes en SQL de `dias_en_proceso` y de la primera revisión,
+        para ordenar, filtrar y agregar sin cargar las filas en Python:
+
+        - dias_proceso:     días desde la solicitud hasta la resolución (u hoy)
+        - primera_revision: fecha en que la secretaría tomó la solicitud por
+                            primera vez, según el historial
+        """
+        primera = (HistorialMatricula.objects
+                   .filter(matricula=models.OuterRef('pk'),
+                           estado_nuevo=Matricula.ESTADO_EN_REVISION)
+                   .order_by('fecha')
+                   .values('fecha')[:1])
+        return self.annotate(
+            dias_proceso=ExtractDay(models.ExpressionWrapper(
+                Coalesce('fecha_resolucion', Now()) - models.F('fecha_solicitud'),
+                output_field=models.DurationField(),
+            )),
+            primera_revision=models.Subquery(primera),
+        )
 
-class Matricula(TimeStampedModel):
+    def estancadas_en_revision(self, dias):
+        """
+        Solicitudes en EN_REVISION desde hace más de `dias` días, la más
+        antigua primero. Usa el índice parcial matricula_revision_abierta_idx.
+        """
+        return (self.filter(estado=Matricula.ESTADO_EN_REVISION,
+                            fecha_revision__lt=timezone.now() - timedelta(days=dias))
+                .order_by('fecha_revision'))
+
+
+class Matricula(TimeStampedModel, VersionadoModel):
     """
     Solicitud y proceso completo de matrícula de un estudiante.
 
@@ -45,6 +87,16 @@ class Matricula(TimeStampedModel):
     ESTADOS_FINALES   = [ESTADO_APROBADA, ESTADO_ANULADA]
     ESTADOS_EDITABLES = [ESTADO_PENDIENTE, ESTADO_RECHAZADA]
 
+    # Transiciones válidas (las aplican los métodos de transición de abajo;
+    # el comando verificar_historial las usa para reproducir el historial)
+    TRANSICIONES = {
+        ESTADO_PENDIENTE:   {ESTADO_EN_REVISION, ESTADO_RECHAZADA},
+        ESTADO_EN_REVISION: {ESTADO_APROBADA, ESTADO_RECHAZADA},
+        ESTADO_RECHAZADA:   {ESTADO_PENDIENTE},
+        ESTADO_APROBADA:    {ESTADO_ANULADA},
+        ESTADO_ANULADA:     set(),
+    }
+
     # ── Tipos de matrícula ────────────────────────────────────────────────────
     TIPO_NUEVA           = 'NUEVA'
     TIPO_RENOVACION      = 'RENOVACION'
@@ -66,6 +118,12 @@ class Matricula(TimeStampedModel):
     paralelo         = models.ForeignKey(Paralelo, on_delete=models.CASCADE,
                                          related_name='matriculas',
                                          verbose_name='Paralelo asignado')
+    # Copia de paralelo.periodo: evita el JOIN con periodos_paralelo en los
+    # filtros por período. Se mantiene en save() y al cambiar el paralelo.
+    periodo          = models.ForeignKey(PeriodoAcademico, on_delete=models.CASCADE,
+                                         null=True, blank=True, editable=False,
+                                         related_name='matriculas',
+                                         verbose_name='Período académico')
     solicitante      = models.ForeignKey(Usuario, on_delete=models.CASCADE,
                                          related_name='matriculas_solicitadas',
                                          verbose_name='Representante solicitante')
@@ -114,6 +172,8 @@ class Matricula(TimeStampedModel):
     numero_intentos  = models.PositiveIntegerField(default=0,
                                                    verbose_name='Número de veces rechazada')
 
+    objects = MatriculaQuerySet.as_manager()
+
     class Meta:
         verbose_name        = 'Matrícula'
         verbose_name_plural = 'Matrículas'
@@ -122,30 +182,100 @@ class Matricula(TimeStampedModel):
             models.Index(fields=['codigo']),
             models.Index(fields=['estado']),
             models.Index(fields=['estudiante', 'paralelo']),
+            # Paneles de secretaría: filtro por período + estado, orden por fecha
+            models.Index(fields=['periodo', 'estado', '-fecha_solicitud'],
+                         name='matricula_periodo_estado_idx'),
+            # Bandeja de trabajo: solo las solicitudes aún no resueltas
+            models.Index(fields=['periodo', '-fecha_solicitud'],
+                         condition=models.Q(estado__in=['PENDIENTE', 'EN_REVISION', 'RECHAZADA']),
+                         name='matricula_periodo_abiertas_idx'),
+            # Escalamiento: revisiones abiertas ordenadas por antigüedad
+            models.Index(fields=['fecha_revision'],
+                         condition=models.Q(estado='EN_REVISION'),
+                         name='matricula_revision_abierta_idx'),
+        ]
+        constraints         = [
+            # Una sola matrícula APROBADA por estudiante y período
+            models.UniqueConstraint(fields=['estudiante', 'periodo'],
+                                    condition=models.Q(estado='APROBADA'),
+                                    name='matricula_aprobada_unica_periodo',
+                                    violation_error_message=MENSAJE_APROBADA_DUPLICADA),
         ]
 
     def __str__(self):
         return f'{self.codigo} — {self.estudiante}'
 
     def clean(self):
-        # Validar que no exista matrícula aprobada para este estudiante
-        # en el mismo período
-        if self.paralelo_id and self.estudiante_id:
-            duplicada = Matricula.objects.filter(
-                estudiante=self.estudiante,
-                paralelo__periodo=self.paralelo.periodo,
-                estado=self.ESTADO_APROBADA,
-            ).exclude(pk=self.pk)
-            if duplicada.exists():
-                raise ValidationError(
-                    'Este estudiante ya tiene una matrícula aprobada en este período académico.'
-                )
+        # La unicidad de la matrícula aprobada por período la garantiza la
+        # restricción `matricula_aprobada_unica_periodo`; aquí solo se
+        # sincroniza el período para que validate_constraints lo vea.
+        self._sincronizar_periodo()
+
+    def validate_constraints(self, exclude=None):
+        # `periodo` no es editable (se deriva del paralelo), pero los
+        # formularios deben seguir mostrando el error de duplicidad.
+        if exclude:
+            exclude = set(exclude) - {'periodo'}
+        super().validate_constraints(exclude)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._paralelo_id_cargado = instancia.__dict__.get('paralelo_id')
+        return instancia
 
     def save(self, *args, **kwargs):
+        self._sincronizar_periodo()
         if not self.codigo:
             from apps.core.utils import generar_codigo_matricula
-            self.codigo = generar_codigo_matricula()
-        super().save(*args, **kwargs)
+            self.codigo = generar_codigo_matricula(self.periodo_id)
+        try:
+            with self._punto_de_control(kwargs.get('using')):
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            if self._es_aprobada_duplicada(e):
+                raise ValidationError(MENSAJE_APROBADA_DUPLICADA) from e
+            raise
+
+    @classmethod
+    def asignar_codigos(cls, matriculas):
+        """
+        Asigna códigos a un lote de matrículas sin guardar (para bulk_create):
+        una sola reserva de bloque por período. Requiere `periodo_id` cargado.
+        """
+        from apps.core.utils import reservar_codigos_matricula
+        por_periodo = {}
+        for matricula in matriculas:
+            if not matricula.codigo:
+                por_periodo.setdefault(matricula.periodo_id, []).append(matricula)
+        for periodo_id, grupo in por_periodo.items():
+            codigos = reservar_codigos_matricula(periodo_id, len(grupo))
+            for matricula, codigo in zip(grupo, codigos):
+                matricula.codigo = codigo
+
+    def _punto_de_control(self, using=None):
+        """
+        Savepoint solo si ya hay una transacción abierta: así un IntegrityError
+        no invalida la transacción externa, y en autocommit no se paga un
+        BEGIN/COMMIT adicional.
+        """
+        using = using or router.db_for_write(type(self), instance=self)
+        if transaction.get_connection(using).in_atomic_block:
+            return transaction.atomic(using=using)
+        return nullcontext()
+
+    @staticmethod
+    def _es_aprobada_duplicada(error):
+        return 'matricula_aprobada_unica_periodo' in str(error)
+
+    def _sincronizar_periodo(self):
+        """Copia el período del paralelo si es nuevo o si cambió de paralelo."""
+        if not self.paralelo_id:
+            return
+        if (self.periodo_id is None
+                or self.paralelo_id != getattr(self, '_paralelo_id_cargado', None)):
+            self.periodo_id = self.paralelo.periodo_id
+            self._paralelo_id_cargado = self.paralelo_id
 
     # ─── Métodos de transición de estado ─────────────────────────────────────
     def iniciar_revision(self, usuario):
@@ -155,8 +285,8 @@ class Matricula(TimeStampedModel):
         self.estado = self.ESTADO_EN_REVISION
         self.revisado_por = usuario
         self.fecha_revision = timezone.now()
-        self.save()
-        self._registrar_historial(self.ESTADO_PENDIENTE, self.ESTADO_EN_REVISION, usuario)
+        self._aplicar_transicion(['revisado_por', 'fecha_revision'],
+                                 self.ESTADO_PENDIENTE, usuario)
 
     def aprobar(self, usuario, observaciones=''):
         """Aprueba la matrícula."""
@@ -165,10 +295,11 @@ class Matricula(TimeStampedModel):
         self.estado = self.ESTADO_APROBADA
         self.fecha_resolucion = timezone.now()
         self.revisado_por = usuario
+        campos = ['fecha_resolucion', 'revisado_por']
         if observaciones:
             self.observaciones = observaciones
-        self.save()
-        self._registrar_historial(self.ESTADO_EN_REVISION, self.ESTADO_APROBADA, usuario, observaciones)
+            campos.append('observaciones')
+        self._aplicar_transicion(campos, self.ESTADO_EN_REVISION, usuario, observaciones)
 
     def rechazar(self, usuario, motivo):
         """Rechaza la matrícula con un motivo visible al representante."""
@@ -182,8 +313,10 @@ class Matricula(TimeStampedModel):
         self.revisado_por = usuario
         self.motivo_rechazo = motivo
         self.numero_intentos += 1
-        self.save()
-        self._registrar_historial(estado_anterior, self.ESTADO_RECHAZADA, usuario, motivo)
+        self._aplicar_transicion(
+            ['fecha_resolucion', 'revisado_por', 'motivo_rechazo', 'numero_intentos'],
+            estado_anterior, usuario, motivo,
+        )
 
     def anular(self, usuario, motivo):
         """Anula una matrícula aprobada (solo en casos excepcionales)."""
@@ -195,8 +328,8 @@ class Matricula(TimeStampedModel):
         self.fecha_anulacion = timezone.now()
         self.anulado_por = usuario
         self.motivo_anulacion = motivo
-        self.save()
-        self._registrar_historial(self.ESTADO_APROBADA, self.ESTADO_ANULADA, usuario, motivo)
+        self._aplicar_transicion(['fecha_anulacion', 'anulado_por', 'motivo_anulacion'],
+                                 self.ESTADO_APROBADA, usuario, motivo)
 
     def reenviar(self, usuario):
         """El representante reenvía la solicitud rechazada con correcciones."""
@@ -204,18 +337,41 @@ class Matricula(TimeStampedModel):
             raise ValidationError('Solo se puede reenviar una solicitud rechazada.')
         self.estado = self.ESTADO_PENDIENTE
         self.motivo_rechazo = ''
-        self.save()
-        self._registrar_historial(self.ESTADO_RECHAZADA, self.ESTADO_PENDIENTE, usuario,
-                                  'Representante reenvió la solicitud con correcciones.')
+        self._aplicar_transicion(['motivo_rechazo'], self.ESTADO_RECHAZADA, usuario,
+                                 'Representante reenvió la solicitud con correcciones.')
+
+    def _aplicar_transicion(self, campos, estado_anterior, usuario, comentario=''):
+        """
+        Persiste el nuevo estado y los `campos` modificados con compare-and-swap
+        sobre `version`, junto con su historial, en una sola transacción.
+        Si otra persona cambió la matrícula entretanto, lanza ConflictoConcurrencia.
+        El representante recibe el aviso al confirmarse la transacción.
+        """
+        from apps.notificaciones.services import notificar_transicion
+        try:
+            with transaction.atomic():
+                self.guardar_cambios(['estado', *campos])
+                self._registrar_historial(estado_anterior, self.estado, usuario, comentario)
+                # robust: un fallo al avisar no deshace ni oculta la transición ya hecha
+                transaction.on_commit(lambda: notificar_transicion(self), robust=True)
+        except IntegrityError as e:
+            if self._es_aprobada_duplicada(e):
+                raise ValidationError(MENSAJE_APROBADA_DUPLICADA) from e
+            raise
 
     def _registrar_historial(self, estado_anterior, estado_nuevo, usuario, comentario=''):
-        HistorialMatricula.objects.create(
+        from .eventos import publicar_cambio_estado
+        historial = HistorialMatricula.objects.create(
             matricula=self,
             estado_anterior=estado_anterior,
             estado_nuevo=estado_nuevo,
             usuario=usuario,
             comentario=comentario,
         )
+        # Los clientes SSE suscritos reciben el cambio al confirmar la transacción
+        publicar_cambio_estado(historial)
+        # Y los sistemas externos, por el feed de cambios y los webhooks
+        EventoMatricula.registrar(EventoMatricula.tipo_de_estado(estado_nuevo), self)
 
     # ─── Propiedades útiles ───────────────────────────────────────────────────
     @property
@@ -259,4 +415,206 @@ class HistorialMatricula(models.Model):
     def __str__(self):
         return (f'{self.matricula.codigo}: '
                 f'{self.estado_anterior} → {self.estado_nuevo} '
-                f'({self.fecha:%Y-%m-%d %H:%M})')
\ No newline at end of file
+                f'({self.fecha:%Y-%m-%d %H:%M})')
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Eventos para sistemas externos (feed de cambios y webhooks)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class EventoMatricula(models.Model):
+    """
+    Bandeja de salida (outbox) del ciclo de vida de la matrícula.
+    Se escribe en la misma transacción que el cambio que la origina: el
+    evento existe si y solo si el cambio se confirmó. El pk creciente es
+    el cursor del feed `api/cambios/?since=<id>` y de los webhooks.
+
+    `matricula_id` no es clave foránea para que los eventos sobrevivan al
+    archivo del período.
+    """
+    TIPO_DOCUMENTO_VERIFICADO = 'documento.verificado'
+    TIPO_DOCUMENTO_RECHAZADO  = 'documento.rechazado'
+
+    tipo         = models.CharField(max_length=40, db_index=True, verbose_name='Tipo')
+    matricula_id = models.BigIntegerField(db_index=True, verbose_name='Matrícula')
+    datos        = models.JSONField(default=dict, verbose_name='Datos')
+    fecha        = models.DateTimeField(auto_now_add=True, verbose_name='Fecha')
+
+    class Meta:
+        verbose_name        = 'Evento de matrícula'
+        verbose_name_plural = 'Eventos de matrícula'
+        ordering            = ['pk']
+
+    def __str__(self):
+        return f'#{self.pk} {self.tipo} ({self.datos.get("codigo", self.matricula_id)})'
+
+    @classmethod
+    def tipo_de_estado(cls, estado):
+        """'APROBADA' → 'matricula.aprobada'."""
+        return f'matricula.{estado.lower()}'
+
+    @classmethod
+    def registrar(cls, tipo, matricula, **extra):
+        """Agrega un evento con la foto de la matrícula en este momento."""
+        return cls.objects.create(
+            tipo=tipo,
+            matricula_id=matricula.pk,
+            datos={
+                'codigo':       matricula.codigo,
+                'estado':       matricula.estado,
+                'version':      matricula.version,
+                'estudiante':   matricula.estudiante_id,
+                'periodo':      matricula.periodo_id,
+                'paralelo':     matricula.paralelo_id,
+                **extra,
+            },
+        )
+
+    def como_dict(self):
+        return {
+            'id':        self.pk,
+            'tipo':      self.tipo,
+            'fecha':     self.fecha.isoformat(),
+            'matricula': self.matricula_id,
+            'datos':     self.datos,
+        }
+
+
+class SuscripcionWebhook(TimeStampedModel):
+    """
+    Sistema externo (contabilidad, LMS…) que recibe los eventos por POST.
+    El despachador (manage.py despachar_webhooks) envía lotes en orden a
+    partir de `ultimo_evento` y solo avanza el cursor cuando el receptor
+    responde 2xx; ante un error reintenta con espera exponencial.
+    """
+    nombre            = models.CharField(max_length=100, verbose_name='Nombre')
+    url               = models.URLField(max_length=500, verbose_name='URL de destino')
+    secreto           = models.CharField(max_length=64, blank=True,
+                                         verbose_name='Secreto de firma',
+                                         help_text='Firma HMAC-SHA256 de cada envío y token '
+                                                   'Bearer para el feed. Se genera si se deja vacío.')
+    tipos             = models.CharField(max_length=255, blank=True, verbose_name='Tipos de evento',
+                                         help_text='Separados por coma; "matricula.*" acepta un '
+                                                   'prefijo. Vacío = todos.')
+    ultimo_evento     = models.BigIntegerField(default=0, verbose_name='Último evento entregado')
+    intentos_fallidos = models.PositiveIntegerField(default=0, verbose_name='Intentos fallidos')
+    proximo_intento   = models.DateTimeField(null=True, blank=True, verbose_name='Próximo intento')
+    ultimo_error      = models.TextField(blank=True, verbose_name='Último error')
+
+    class Meta:
+        verbose_name        = 'Suscripción webhook'
+        verbose_name_plural = 'Suscripciones webhook'
+        ordering            = ['nombre']
+
+    def __str__(self):
+        return self.nombre
+
+    def save(self, *args, **kwargs):
+        if not self.secreto:
+            import secrets
+            self.secreto = secrets.token_hex(32)
+        super().save(*args, **kwargs)
+
+    def filtrar_eventos(self, eventos):
+        """Restringe un queryset de EventoMatricula a los tipos suscritos."""
+        filtro = models.Q()
+        for tipo in filter(None, (t.strip() for t in self.tipos.split(','))):
+            if tipo.endswith('*'):
+                filtro |= models.Q(tipo__startswith=tipo[:-1])
+            else:
+                filtro |= models.Q(tipo=tipo)
+        return eventos.filter(filtro) if filtro else eventos
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Archivo histórico (períodos cerrados)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class MatriculaArchivada(models.Model):
+    """
+    Copia de solo lectura de una matrícula de un período ya cerrado.
+
+    Las tablas calientes (Matricula, HistorialMatricula, DocumentoMatricula)
+    conservan únicamente los períodos en curso; el comando
+    `archivar_periodo` mueve aquí las filas de los años cerrados.
+    Se conserva el id original para que auditorías y reportes históricos
+    puedan seguir localizando el registro.
+    """
+    id               = models.BigIntegerField(primary_key=True)
+    codigo           = models.CharField(max_length=20, unique=True,
+                                        verbose_name='Código de matrícula')
+    periodo          = models.ForeignKey('periodos.PeriodoAcademico',
+                                         on_delete=models.DO_NOTHING, db_constraint=False,
+                                         related_name='+', verbose_name='Período académico')
+    estudiante       = models.ForeignKey(Estudiante, on_delete=models.DO_NOTHING,
+                                         db_constraint=False, related_name='+',
+                                         verbose_name='Estudiante')
+    paralelo         = models.ForeignKey(Paralelo, on_delete=models.DO_NOTHING,
+                                         db_constraint=False, related_name='+',
+                                         verbose_name='Paralelo asignado')
+    solicitante      = models.ForeignKey(Usuario, on_delete=models.DO_NOTHING,
+                                         db_constraint=False, related_name='+',
+                                         verbose_name='Representante solicitante')
+    tipo             = models.CharField(max_length=20, choices=Matricula.TIPOS,
+                                        verbose_name='Tipo de matrícula')
+    estado           = models.CharField(max_length=15, choices=Matricula.ESTADOS,
+                                        verbose_name='Estado')
+    fecha_solicitud  = models.DateTimeField(verbose_name='Fecha de solicitud')
+    fecha_revision   = models.DateTimeField(blank=True, null=True,
+                                            verbose_name='Fecha de inicio de revisión')
+    fecha_resolucion = models.DateTimeField(blank=True, null=True,
+                                            verbose_name='Fecha de aprobación / rechazo')
+    fecha_anulacion  = models.DateTimeField(blank=True, null=True,
+                                            verbose_name='Fecha de anulación')
+    revisado_por     = models.ForeignKey(Usuario, on_delete=models.DO_NOTHING,
+                                         db_constraint=False, null=True, blank=True,
+                                         related_name='+', verbose_name='Revisado por')
+    anulado_por      = models.ForeignKey(Usuario, on_delete=models.DO_NOTHING,
+                                         db_constraint=False, null=True, blank=True,
+                                         related_name='+', verbose_name='Anulado por')
+    observaciones    = models.TextField(blank=True, verbose_name='Observaciones internas')
+    motivo_rechazo   = models.TextField(blank=True, verbose_name='Motivo de rechazo')
+    motivo_anulacion = models.TextField(blank=True, verbose_name='Motivo de anulación')
+    matricula_anterior_id = models.BigIntegerField(blank=True, null=True,
+                                                   verbose_name='Id de la matrícula anterior')
+    numero_intentos  = models.PositiveIntegerField(default=0,
+                                                   verbose_name='Número de veces rechazada')
+    created_at       = models.DateTimeField(verbose_name='Creado el')
+    updated_at       = models.DateTimeField(verbose_name='Modificado el')
+    is_active        = models.BooleanField(default=True, verbose_name='Activo')
+    fecha_archivado  = models.DateTimeField(auto_now_add=True, verbose_name='Archivada el')
+
+    class Meta:
+        verbose_name        = 'Matrícula archivada'
+        verbose_name_plural = 'Matrículas archivadas'
+        ordering            = ['-fecha_solicitud']
+        indexes             = [
+            models.Index(fields=['periodo', 'estado']),
+            models.Index(fields=['estudiante']),
+        ]
+
+    def __str__(self):
+        return f'{self.codigo} — {self.estudiante} (archivada)'
+
+
+class HistorialMatriculaArchivado(models.Model):
+    """Historial de estados de una matrícula archivada."""
+    id              = models.BigIntegerField(primary_key=True)
+    matricula       = models.ForeignKey(MatriculaArchivada, on_delete=models.DO_NOTHING,
+                                        db_constraint=False, related_name='historial')
+    estado_anterior = models.CharField(max_length=15, verbose_name='Estado anterior')
+    estado_nuevo    = models.CharField(max_length=15, verbose_name='Estado nuevo')
+    usuario         = models.ForeignKey(Usuario, on_delete=models.DO_NOTHING,
+                                        db_constraint=False, null=True, related_name='+',
+                                        verbose_name='Usuario que realizó el cambio')
+    fecha           = models.DateTimeField(verbose_name='Fecha del cambio')
+    comentario      = models.TextField(blank=True, verbose_name='Comentario')
+
+    class Meta:
+        verbose_name        = 'Historial de matrícula archivada'
+        verbose_name_plural = 'Historial de matrículas archivadas'
+        ordering            = ['-fecha']
+
+    def __str__(self):
+        return (f'{self.matricula_id}: '
+                f'{self.estado_anterior} → {self.estado_nuevo} '
+                f'({self.fecha:%Y-%m-%d %H:%M})')
@@ -31,4 +31,8 @@ urlpatterns = [
 
     # ── API JSON (para AJAX / dashboards) ─────────────────────────────────
     path('api/estado/<int:pk>/',            views.MatriculaEstadoAPIView.as_view(),   name='api_estado'),
+    path('api/eventos/<int:pk>/',           views.MatriculaEventosView.as_view(),     name='eventos'),
+
+    # ── Integraciones (contabilidad, LMS) ─────────────────────────────────
+    path('api/cambios/',                    views.FeedCambiosView.as_view(),          name='feed_cambios'),
 ]
\ No newline at end of file
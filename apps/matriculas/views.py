@@ -4,21 +4,37 @@
   Cubre los flujos de Representante, Secretaría y Admin.
 ============================================================
 """
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.exceptions import ValidationError
-from django.db.models import Q
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy, reverse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.http import condition
 from django.views.generic import (
     CreateView, DetailView, ListView,
     TemplateView, UpdateView,
 )
 
-from .models import Matricula, HistorialMatricula
+from apps.core.idempotencia import IdempotenteMixin
+from apps.core.models import ConflictoConcurrencia
+from apps.core.utils import aplicar_version_enviada, etag_de
+from apps.notificaciones.services import notificar_solicitud_recibida
+
+from .eventos import difusor
+from .models import Matricula, HistorialMatricula, SuscripcionWebhook
+from .webhooks import eventos_visibles
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -46,6 +62,22 @@ class AdminMixin(LoginRequiredMixin, UserPassesTestMixin):
         return self.request.user.is_superuser
 
 
+def conteo_por_estado(periodo_id=None):
+    """
+    Contadores del panel en una sola consulta agregada.
+    Con período, la consulta se resuelve sobre el índice (periodo, estado, …).
+    """
+    qs = Matricula.objects.all()
+    if periodo_id:
+        qs = qs.filter(periodo_id=periodo_id)
+    return qs.aggregate(
+        pendientes=Count('pk',  filter=Q(estado=Matricula.ESTADO_PENDIENTE)),
+        en_revision=Count('pk', filter=Q(estado=Matricula.ESTADO_EN_REVISION)),
+        aprobadas=Count('pk',   filter=Q(estado=Matricula.ESTADO_APROBADA)),
+        rechazadas=Count('pk',  filter=Q(estado=Matricula.ESTADO_RECHAZADA)),
+    )
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  REPRESENTANTE / SOLICITANTE
 # ─────────────────────────────────────────────────────────────────────────────
@@ -97,13 +129,13 @@ class MatriculaListView(LoginRequiredMixin, ListView):
             if estado:
                 qs = qs.filter(estado=estado)
             if periodo:
-                qs = qs.filter(paralelo__periodo__id=periodo)
+                qs = qs.filter(periodo_id=periodo)
             if busqueda:
                 qs = qs.filter(
                     Q(codigo__icontains=busqueda) |
                     Q(estudiante__nombres__icontains=busqueda) |
                     Q(estudiante__apellidos__icontains=busqueda) |
-                    Q(estudiante__numero_identificacion__icontains=busqueda)
+                    Q(estudiante__cedula__icontains=busqueda)
                 )
         else:
             qs = Matricula.objects.filter(solicitante=user).select_related(
@@ -121,16 +153,11 @@ class MatriculaListView(LoginRequiredMixin, ListView):
         ctx['busqueda']        = self.request.GET.get('q', '')
         ctx['es_staff']        = self.request.user.is_staff
         if self.request.user.is_staff:
-            ctx['conteo'] = {
-                'pendientes':  Matricula.objects.filter(estado=Matricula.ESTADO_PENDIENTE).count(),
-                'en_revision': Matricula.objects.filter(estado=Matricula.ESTADO_EN_REVISION).count(),
-                'aprobadas':   Matricula.objects.filter(estado=Matricula.ESTADO_APROBADA).count(),
-                'rechazadas':  Matricula.objects.filter(estado=Matricula.ESTADO_RECHAZADA).count(),
-            }
+            ctx['conteo'] = conteo_por_estado(self.request.GET.get('periodo'))
         return ctx
 
 
-class MatriculaCreateView(RepresentanteMixin, CreateView):
+class MatriculaCreateView(RepresentanteMixin, IdempotenteMixin, CreateView):
     """El representante crea una nueva solicitud de matrícula."""
     model         = Matricula
     template_name = 'matriculas/formulario.html'
@@ -144,9 +171,14 @@ class MatriculaCreateView(RepresentanteMixin, CreateView):
         from apps.periodos.models import PeriodoAcademico, Paralelo
         periodo = PeriodoAcademico.objects.filter(es_activo=True).first()
         if periodo:
+            # Solo los niveles cuya ventana de matrícula está abierta ahora
             form.fields['paralelo'].queryset = Paralelo.objects.filter(
-                periodo=periodo
+                periodo=periodo, nivel_id__in=periodo.niveles_habilitados(),
             ).select_related('nivel', 'periodo')
+            form.fields['paralelo'].error_messages['invalid_choice'] = (
+                'Las matrículas para ese nivel no están abiertas en este momento. '
+                'Revise el calendario por nivel.'
+            )
         else:
             form.fields['paralelo'].queryset = Paralelo.objects.none()
 
@@ -157,20 +189,40 @@ class MatriculaCreateView(RepresentanteMixin, CreateView):
             form.fields['estudiante'].queryset = Estudiante.objects.filter(
                 representante=user
             )
+            # Sin filtro el select listaba todas las matrículas del sistema (y una
+            # consulta por opción para el nombre del estudiante)
+            form.fields['matricula_anterior'].queryset = Matricula.objects.filter(
+                estudiante__representante=user
+            ).select_related('estudiante')
         return form
 
     def form_valid(self, form):
+        # La ventana pudo cerrarse entre que se mostró el formulario y el envío
+        paralelo = form.cleaned_data['paralelo']
+        periodo  = paralelo.periodo
+        if not periodo.nivel_habilitado(paralelo.nivel_id):
+            apertura = periodo.proxima_apertura(paralelo.nivel_id)
+            mensaje  = f'Las matrículas para {paralelo.nivel} no están abiertas en este momento.'
+            if apertura:
+                mensaje += f' Próxima apertura: {apertura:%d/%m/%Y %H:%M}.'
+            form.add_error('paralelo', mensaje)
+            return self.form_invalid(form)
         form.instance.solicitante = self.request.user
         messages.success(self.request,
             'Solicitud de matrícula enviada correctamente.')
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        transaction.on_commit(lambda: notificar_solicitud_recibida(self.object), robust=True)
+        return response
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx['titulo'] = 'Nueva solicitud de matrícula'
         ctx['accion'] = 'Enviar solicitud'
         from apps.periodos.models import PeriodoAcademico
-        ctx['periodo_activo'] = PeriodoAcademico.objects.filter(es_activo=True).first()
+        periodo = PeriodoAcademico.objects.filter(es_activo=True).first()
+        ctx['periodo_activo'] = periodo
+        if periodo:
+            ctx['ventanas'] = periodo.ventanas.filter(is_active=True).select_related('nivel')
         return ctx
 
 
@@ -202,7 +254,8 @@ class MatriculaUpdateView(RepresentanteMixin, UpdateView):
         if not obj.es_editable:
             messages.error(self.request, 'Esta matrícula no puede editarse en su estado actual.')
             raise PermissionError('No editable')
-        return obj
+        # save() compara contra la versión que el representante tenía en pantalla
+        return aplicar_version_enviada(self.request, obj)
 
     def dispatch(self, request, *args, **kwargs):
         try:
@@ -213,14 +266,30 @@ class MatriculaUpdateView(RepresentanteMixin, UpdateView):
     def get_success_url(self):
         return reverse('matriculas:detalle', kwargs={'pk': self.object.pk})
 
+    def form_valid(self, form):
+        try:
+            return super().form_valid(form)
+        except ConflictoConcurrencia as e:
+            # Secretaría la cambió (p. ej. inició la revisión) mientras se editaba
+            messages.error(self.request, e.messages[0])
+            return redirect('matriculas:detalle', pk=self.object.pk)
+
     def get_form(self, form_class=None):
         form = super().get_form(form_class)
         from apps.periodos.models import PeriodoAcademico, Paralelo
         periodo = PeriodoAcademico.objects.filter(es_activo=True).first()
         if periodo:
+            # Niveles con la ventana abierta, más el paralelo actual: cerrada la
+            # ventana, el representante aún debe poder corregir lo que le pidió
+            # secretaría sin cambiar de paralelo
             form.fields['paralelo'].queryset = Paralelo.objects.filter(
-                periodo=periodo
+                Q(nivel_id__in=periodo.niveles_habilitados()) | Q(pk=self.object.paralelo_id),
+                periodo=periodo,
             ).select_related('nivel', 'periodo')
+            form.fields['paralelo'].error_messages['invalid_choice'] = (
+                'Las matrículas para ese nivel no están abiertas en este momento. '
+                'Revise el calendario por nivel.'
+            )
         else:
             form.fields['paralelo'].queryset = Paralelo.objects.none()
         user = self.request.user
@@ -229,6 +298,11 @@ class MatriculaUpdateView(RepresentanteMixin, UpdateView):
             form.fields['estudiante'].queryset = Estudiante.objects.filter(
                 representante=user
             )
+            # Sin filtro el select listaba todas las matrículas del sistema (y una
+            # consulta por opción para el nombre del estudiante)
+            form.fields['matricula_anterior'].queryset = Matricula.objects.filter(
+                estudiante__representante=user
+            ).select_related('estudiante')
         return form
 
     def get_context_data(self, **kwargs):
@@ -240,12 +314,13 @@ class MatriculaUpdateView(RepresentanteMixin, UpdateView):
         return ctx
 
 
-class MatriculaReenviarView(LoginRequiredMixin, View):
+class MatriculaReenviarView(LoginRequiredMixin, IdempotenteMixin, View):
     """El representante reenvía una solicitud rechazada."""
 
     def post(self, request, pk):
         matricula = get_object_or_404(Matricula, pk=pk, solicitante=request.user)
         try:
+            aplicar_version_enviada(request, matricula)
             matricula.reenviar(request.user)
             messages.success(request,
                 f'La solicitud {matricula.codigo} fue reenviada para revisión.')
@@ -280,13 +355,13 @@ class PanelSecretariaView(PersonalMixin, ListView):
         if estado:
             qs = qs.filter(estado=estado)
         if periodo:
-            qs = qs.filter(paralelo__periodo__id=periodo)
+            qs = qs.filter(periodo_id=periodo)
         if busqueda:
             qs = qs.filter(
                 Q(codigo__icontains=busqueda) |
                 Q(estudiante__nombres__icontains=busqueda) |
                 Q(estudiante__apellidos__icontains=busqueda) |
-                Q(estudiante__numero_identificacion__icontains=busqueda)
+                Q(estudiante__cedula__icontains=busqueda)
             )
         return qs.order_by('-fecha_solicitud')
 
@@ -295,21 +370,17 @@ class PanelSecretariaView(PersonalMixin, ListView):
         ctx['estados']         = Matricula.ESTADOS
         ctx['estado_filtrado'] = self.request.GET.get('estado', '')
         ctx['busqueda']        = self.request.GET.get('q', '')
-        ctx['conteo'] = {
-            'pendientes':  Matricula.objects.filter(estado=Matricula.ESTADO_PENDIENTE).count(),
-            'en_revision': Matricula.objects.filter(estado=Matricula.ESTADO_EN_REVISION).count(),
-            'aprobadas':   Matricula.objects.filter(estado=Matricula.ESTADO_APROBADA).count(),
-            'rechazadas':  Matricula.objects.filter(estado=Matricula.ESTADO_RECHAZADA).count(),
-        }
+        ctx['conteo'] = conteo_por_estado(self.request.GET.get('periodo'))
         return ctx
 
 
-class IniciarRevisionView(PersonalMixin, View):
+class IniciarRevisionView(PersonalMixin, IdempotenteMixin, View):
     """Secretaría toma una solicitud para revisarla."""
 
     def post(self, request, pk):
         matricula = get_object_or_404(Matricula, pk=pk)
         try:
+            aplicar_version_enviada(request, matricula)
             matricula.iniciar_revision(request.user)
             messages.success(request,
                 f'Matrícula {matricula.codigo} en revisión.')
@@ -318,13 +389,14 @@ class IniciarRevisionView(PersonalMixin, View):
         return redirect('matriculas:detalle', pk=pk)
 
 
-class AprobarMatriculaView(PersonalMixin, View):
+class AprobarMatriculaView(PersonalMixin, IdempotenteMixin, View):
     """Secretaría aprueba una matrícula en revisión."""
 
     def post(self, request, pk):
         matricula     = get_object_or_404(Matricula, pk=pk)
         observaciones = request.POST.get('observaciones', '')
         try:
+            aplicar_version_enviada(request, matricula)
             matricula.aprobar(request.user, observaciones)
             messages.success(request,
                 f'Matrícula {matricula.codigo} aprobada correctamente.')
@@ -333,7 +405,7 @@ class AprobarMatriculaView(PersonalMixin, View):
         return redirect('matriculas:detalle', pk=pk)
 
 
-class RechazarMatriculaView(PersonalMixin, View):
+class RechazarMatriculaView(PersonalMixin, IdempotenteMixin, View):
     """Secretaría rechaza una matrícula con un motivo."""
 
     def post(self, request, pk):
@@ -343,6 +415,7 @@ class RechazarMatriculaView(PersonalMixin, View):
             messages.error(request, 'Debe ingresar el motivo del rechazo.')
             return redirect('matriculas:detalle', pk=pk)
         try:
+            aplicar_version_enviada(request, matricula)
             matricula.rechazar(request.user, motivo)
             messages.warning(request,
                 f'Matrícula {matricula.codigo} rechazada.')
@@ -355,7 +428,7 @@ class RechazarMatriculaView(PersonalMixin, View):
 #  ADMINISTRACIÓN
 # ─────────────────────────────────────────────────────────────────────────────
 
-class AnularMatriculaView(AdminMixin, View):
+class AnularMatriculaView(AdminMixin, IdempotenteMixin, View):
     """Solo el administrador puede anular una matrícula aprobada."""
 
     def post(self, request, pk):
@@ -365,6 +438,7 @@ class AnularMatriculaView(AdminMixin, View):
             messages.error(request, 'Debe ingresar el motivo de anulación.')
             return redirect('matriculas:detalle', pk=pk)
         try:
+            aplicar_version_enviada(request, matricula)
             matricula.anular(request.user, motivo)
             messages.warning(request,
                 f'Matrícula {matricula.codigo} anulada.')
@@ -395,21 +469,200 @@ class HistorialMatriculaView(PersonalMixin, DetailView):
 #  API JSON
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _etag_estado(request, pk):
+    """Validador de MatriculaEstadoAPIView sin cargar la matrícula completa."""
+    fila = Matricula.objects.filter(pk=pk).values_list('version', 'updated_at').first()
+    if fila is None:
+        return None
+    # dias_en_proceso cambia con la fecha; el usuario distingue 200 de 403
+    return etag_de(pk, *fila, timezone.localdate(), request.user.pk)
+
+
 class MatriculaEstadoAPIView(LoginRequiredMixin, View):
-    """Devuelve el estado actual de una matrícula en JSON."""
+    """
+    Devuelve el estado actual de una matrícula en JSON.
+    Admite GET condicional: si el cliente envía el ETag vigente se responde 304.
+    """
 
+    @method_decorator(condition(etag_func=_etag_estado))
     def get(self, request, pk):
         matricula = get_object_or_404(Matricula, pk=pk)
         if not request.user.is_staff and matricula.solicitante != request.user:
             return JsonResponse({'error': 'No autorizado'}, status=403)
 
-        return JsonResponse({
+        response = JsonResponse({
             'pk':              matricula.pk,
             'codigo':          matricula.codigo,
             'estado':          matricula.estado,
             'estado_display':  matricula.get_estado_display(),
+            'version':         matricula.version,
             'es_editable':     matricula.es_editable,
             'esta_finalizada': matricula.esta_finalizada,
             'dias_en_proceso': matricula.dias_en_proceso,
             'fecha_solicitud': matricula.fecha_solicitud.isoformat(),
-        })
\ No newline at end of file
+        })
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class FeedCambiosView(View):
+    """
+    Feed incremental de eventos de matrícula para sistemas externos.
+
+        GET api/cambios/?since=<id>&limit=<n>
+
+    Devuelve {"eventos": [...], "siguiente": <id>, "hay_mas": bool}; el
+    cliente guarda `siguiente` y lo envía como `since` en la próxima
+    consulta. Acepta sesión de personal o `Authorization: Bearer <secreto>`
+    de una suscripción webhook activa (que además filtra por sus tipos).
+    """
+    LIMITE_DEFECTO = 100
+    LIMITE_MAXIMO  = 500
+
+    def get(self, request):
+        suscripcion = None
+        autorizacion = request.headers.get('Authorization', '')
+        if autorizacion.startswith('Bearer '):
+            suscripcion = SuscripcionWebhook.objects.filter(
+                secreto=autorizacion[7:].strip(), is_active=True,
+            ).first()
+            if suscripcion is None:
+                return JsonResponse({'error': 'Token inválido'}, status=401)
+        elif not (request.user.is_authenticated and request.user.is_staff):
+            return JsonResponse({'error': 'No autorizado'}, status=403)
+
+        try:
+            desde  = max(int(request.GET.get('since', 0)), 0)
+            limite = int(request.GET.get('limit', self.LIMITE_DEFECTO))
+        except ValueError:
+            return JsonResponse({'error': 'since y limit deben ser enteros'}, status=400)
+        limite = max(1, min(limite, self.LIMITE_MAXIMO))
+
+        eventos = eventos_visibles(desde)
+        if suscripcion is not None:
+            eventos = suscripcion.filtrar_eventos(eventos)
+        # Uno de más para saber si quedan eventos sin pedir un COUNT
+        lote    = list(eventos[:limite + 1])
+        hay_mas = len(lote) > limite
+        lote    = lote[:limite]
+
+        response = JsonResponse({
+            'eventos':   [e.como_dict() for e in lote],
+            'siguiente': lote[-1].pk if lote else desde,
+            'hay_mas':   hay_mas,
+        })
+        patch_cache_control(response, private=True, no_store=True)
+        return response
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  EVENTOS (SSE)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class MatriculaEventosView(View):
+    """
+    Flujo Server-Sent Events con los cambios de estado de una matrícula.
+    Reemplaza el sondeo de `api_estado`: la sesión y el permiso se validan
+    una sola vez al conectar y, mientras tanto, el cliente solo ocupa una
+    cola en el difusor del proceso (sin conexión a la base de datos).
+
+    Cada evento lleva como `id` el pk de HistorialMatricula; al reconectar,
+    el navegador envía Last-Event-ID y se reenvían los cambios posteriores.
+    Requiere servidor ASGI (config.asgi).
+    """
+    LATIDO_SEGUNDOS          = 20
+    DURACION_MAXIMA_SEGUNDOS = 600   # el navegador reconecta solo, con Last-Event-ID
+    RECONEXION_MS            = 3000
+
+    async def get(self, request, pk):
+        if not isinstance(request, ASGIRequest):
+            # Bajo WSGI un flujo infinito bloquearía un worker; 204 detiene al EventSource
+            return HttpResponse(status=204)
+
+        loop = asyncio.get_running_loop()
+        cola = asyncio.Queue()
+        # Se suscribe antes de leer el estado para no perder cambios intermedios
+        difusor.suscribir(pk, loop, cola)
+        try:
+            iniciales = await sync_to_async(self._eventos_iniciales)(request, pk)
+        except Exception:
+            difusor.desuscribir(pk, loop, cola)
+            raise
+        if iniciales is None:
+            difusor.desuscribir(pk, loop, cola)
+            return JsonResponse({'error': 'No autorizado'}, status=403)
+
+        response = StreamingHttpResponse(
+            self._flujo(pk, loop, cola, iniciales), content_type='text/event-stream',
+        )
+        response['Cache-Control']     = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def _eventos_iniciales(self, request, pk):
+        """Valida el acceso y arma los eventos a enviar al conectar."""
+        try:
+            if not request.user.is_authenticated:
+                return None
+            matricula = (Matricula.objects
+                         .filter(pk=pk)
+                         .values('solicitante_id', 'estado', 'version')
+                         .first())
+            if matricula is None or (not request.user.is_staff
+                                     and matricula['solicitante_id'] != request.user.pk):
+                return None
+
+            historial = HistorialMatricula.objects.filter(matricula_id=pk).order_by('pk')
+            ultimo = request.headers.get('Last-Event-ID', '')
+            if ultimo.isdigit():
+                # Reanudación: solo los cambios que el cliente no recibió
+                return [
+                    self._evento(h, pk, matricula['version'])
+                    for h in historial.filter(pk__gt=int(ultimo))
+                ]
+            h = historial.last()
+            return [{
+                'id':             h.pk if h else 0,
+                'matricula':      pk,
+                'estado':         matricula['estado'],
+                'estado_display': dict(Matricula.ESTADOS)[matricula['estado']],
+                'version':        matricula['version'],
+            }]
+        finally:
+            # El flujo puede durar minutos: no retener la conexión a la BD
+            connection.close()
+
+    @staticmethod
+    def _evento(historial, pk, version):
+        return {
+            'id':             historial.pk,
+            'matricula':      pk,
+            'estado':         historial.estado_nuevo,
+            'estado_display': dict(Matricula.ESTADOS).get(historial.estado_nuevo, historial.estado_nuevo),
+            'version':        version,
+        }
+
+    @staticmethod
+    def _formatear(evento):
+        return f"id: {evento['id']}\ndata: {json.dumps(evento)}\n\n"
+
+    async def _flujo(self, pk, loop, cola, iniciales):
+        ultimo = 0
+        limite = loop.time() + self.DURACION_MAXIMA_SEGUNDOS
+        try:
+            yield f'retry: {self.RECONEXION_MS}\n\n'
+            for evento in iniciales:
+                ultimo = evento['id']
+                yield self._formatear(evento)
+            while loop.time() < limite:
+                try:
+                    evento = await asyncio.wait_for(cola.get(), self.LATIDO_SEGUNDOS)
+                except asyncio.TimeoutError:
+                    yield ': latido\n\n'
+                    continue
+                if evento['id'] <= ultimo:
+                    continue
+                ultimo = evento['id']
+                yield self._formatear(evento)
+        finally:
+            difusor.desuscribir(pk, loop, cola)
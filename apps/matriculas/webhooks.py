@@ -0,0 +1,84 @@
+"""
+============================================================
+  WEBHOOKS: apps.matriculas
+  Feed de cambios y envío de eventos a sistemas externos
+============================================================
+
+Los eventos (EventoMatricula) se leen por cursor: "dame los posteriores
+al id N". Los ids se asignan al insertar pero las transacciones pueden
+confirmarse en otro orden, así que un id bajo podría hacerse visible
+después de uno alto ya entregado. Para no saltarlo, el feed y el
+despachador solo sirven eventos con más de RETRASO_SEGUNDOS de antigüedad,
+bastante más que lo que dura una transición.
+
+Cada envío es un POST JSON {"eventos": [...]} con las cabeceras:
+
+  X-SFQ-Timestamp: segundos desde epoch del envío
+  X-SFQ-Firma:     sha256=<hex>, HMAC-SHA256 con el secreto de la
+                   suscripción sobre "<timestamp>.<cuerpo>"
+
+El receptor debe verificar la firma, descartar timestamps viejos y tratar
+los eventos de forma idempotente por `id` (un reintento puede repetir un
+lote que llegó pero cuya respuesta se perdió).
+"""
+import hashlib
+import hmac
+import json
+import time
+import urllib.error
+import urllib.request
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import EventoMatricula
+
+TIMEOUT_SEGUNDOS   = 10
+ESPERA_BASE        = 30     # segundos antes del primer reintento
+ESPERA_MAXIMA      = 3600
+
+
+def retraso():
+    return getattr(settings, 'EVENTOS_RETRASO_SEGUNDOS', 5)
+
+
+def eventos_visibles(desde=0):
+    """Eventos posteriores al cursor `desde` ya asentados (ver docstring del módulo)."""
+    return (EventoMatricula.objects
+            .filter(pk__gt=desde, fecha__lte=timezone.now() - timedelta(seconds=retraso()))
+            .order_by('pk'))
+
+
+def firmar(secreto, timestamp, cuerpo):
+    mensaje = f'{timestamp}.'.encode() + cuerpo
+    return 'sha256=' + hmac.new(secreto.encode(), mensaje, hashlib.sha256).hexdigest()
+
+
+def entregar(suscripcion, eventos):
+    """
+    POST de un lote a la suscripción. Devuelve None si el receptor
+    respondió 2xx o el texto del error en caso contrario.
+    """
+    cuerpo    = json.dumps({'eventos': [e.como_dict() for e in eventos]}).encode()
+    timestamp = str(int(time.time()))
+    peticion  = urllib.request.Request(suscripcion.url, data=cuerpo, method='POST', headers={
+        'Content-Type':    'application/json',
+        'User-Agent':      'SFQ-Matriculas-Webhook/1.0',
+        'X-SFQ-Timestamp': timestamp,
+        'X-SFQ-Firma':     firmar(suscripcion.secreto, timestamp, cuerpo),
+    })
+    try:
+        with urllib.request.urlopen(peticion, timeout=TIMEOUT_SEGUNDOS) as respuesta:
+            if 200 <= respuesta.status < 300:
+                return None
+            return f'HTTP {respuesta.status}'
+    except urllib.error.HTTPError as e:
+        return f'HTTP {e.code}'
+    except (urllib.error.URLError, OSError) as e:
+        return str(getattr(e, 'reason', e))[:500]
+
+
+def espera_reintento(intentos_fallidos):
+    """Espera exponencial: 30 s, 60 s, 120 s… hasta una hora."""
+    return timedelta(seconds=min(ESPERA_BASE * 2 ** max(intentos_fallidos - 1, 0), ESPERA_MAXIMA))
@@ -1,7 +1,63 @@
 ﻿from django.contrib import admin
-from .models import Notificacion
+from django.utils import timezone
+from apps.core.admin import VersionadoAdminForm
+from .difusion import reanudables
+from .models import CorreoPendiente, Difusion, NovedadPendiente, Notificacion, PlantillaEmail
 
 @admin.register(Notificacion)
 class NotificacionAdmin(admin.ModelAdmin):
     list_display = ['titulo', 'destinatario', 'tipo', 'leida', 'created_at']
     list_filter = ['tipo', 'leida']
+
+
+@admin.register(PlantillaEmail)
+class PlantillaEmailAdmin(admin.ModelAdmin):
+    form = VersionadoAdminForm
+    list_display = ['evento', 'asunto', 'is_active', 'version', 'updated_at']
+    list_filter = ['is_active']
+    readonly_fields = ['version']
+
+
+@admin.register(Difusion)
+class DifusionAdmin(admin.ModelAdmin):
+    list_display = ['titulo', 'periodo', 'nivel', 'paralelo', 'estado_matricula', 'estado',
+                    'procesados', 'total_destinatarios', 'correos_encolados', 'created_at']
+    list_filter = ['estado', 'periodo']
+    readonly_fields = ['estado', 'total_destinatarios', 'procesados', 'correos_encolados',
+                       'ultimo_destinatario', 'fecha_inicio', 'fecha_fin', 'error', 'creada_por']
+    actions = ['accion_reanudar']
+
+    @admin.action(description='Reanudar difusiones fallidas o detenidas')
+    def accion_reanudar(self, request, queryset):
+        # Vuelven a la cola de `manage.py ejecutar_difusiones`, que retoma
+        # desde el último destinatario procesado
+        reanudadas = (reanudables().filter(pk__in=queryset.values('pk'))
+                      .exclude(estado=Difusion.ESTADO_PENDIENTE)
+                      .update(estado=Difusion.ESTADO_PENDIENTE, error=''))
+        self.message_user(request, f'{reanudadas} difusión(es) de nuevo en cola.')
+
+
+@admin.register(CorreoPendiente)
+class CorreoPendienteAdmin(admin.ModelAdmin):
+    list_display = ['asunto', 'destinatario', 'estado', 'intentos', 'proximo_intento',
+                    'fecha_creacion', 'fecha_envio']
+    list_filter = ['estado']
+    search_fields = ['destinatario', 'asunto']
+    readonly_fields = ['fecha_creacion', 'fecha_envio', 'ultimo_error']
+    actions = ['accion_reencolar']
+
+    @admin.action(description='Volver a encolar correos fallidos')
+    def accion_reencolar(self, request, queryset):
+        # `manage.py enviar_correos` los toma en su siguiente lote, con intentos desde cero
+        reencolados = queryset.filter(estado=CorreoPendiente.ESTADO_FALLIDO).update(
+            estado=CorreoPendiente.ESTADO_PENDIENTE, intentos=0,
+            proximo_intento=timezone.now(), ultimo_error='',
+        )
+        self.message_user(request, f'{reencolados} correo(s) de nuevo en cola.')
+
+
+@admin.register(NovedadPendiente)
+class NovedadPendienteAdmin(admin.ModelAdmin):
+    list_display = ['titulo', 'destinatario', 'evento', 'tipo', 'fecha']
+    list_filter = ['evento']
+    raw_id_fields = ['destinatario', 'matricula']
@@ -0,0 +1,11 @@
+"""
+Context processors del módulo de notificaciones
+"""
+
+
+def notificaciones(request):
+    """Insignia de no leídas del navbar: sale de request.user, sin consultas."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'NOTIFICACIONES_SIN_LEER': user.notificaciones_sin_leer}
@@ -0,0 +1,137 @@
+"""
+============================================================
+  DIFUSIÓN: apps.notificaciones
+  Mensajes masivos de secretaría a segmentos de representantes
+============================================================
+
+Una difusión resuelve sus destinatarios en UNA consulta (solicitantes
+distintos de las matrículas del segmento: un representante con varios
+hijos recibe un solo mensaje) y luego procesa lotes de LOTE personas,
+cada uno en su transacción:
+
+  - bulk_create de las notificaciones;
+  - un UPDATE que suma 1 al contador de no leídas de todo el lote;
+  - bulk_create de los correos en CorreoPendiente (los envía
+    `manage.py enviar_correos`, fuera de la petición).
+
+La ejecuta `manage.py ejecutar_difusiones`, nunca la petición que la
+crea. El avance queda en la difusión (procesados, ultimo_destinatario),
+así que si algo falla a mitad de camino `ejecutar_difusion` retoma donde
+quedó. Cada lote renueva updated_at: una difusión EN_CURSO sin avance
+durante ABANDONO es de un proceso que murió y otro puede tomarla.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.matriculas.models import Matricula
+from apps.usuarios.models import Usuario
+
+from .models import CorreoPendiente, Difusion, Notificacion
+
+logger = logging.getLogger(__name__)
+
+LOTE = 500
+
+# Sin avance en este tiempo, una difusión EN_CURSO se da por abandonada
+ABANDONO = timedelta(minutes=10)
+
+
+def reanudables():
+    """Difusiones que `ejecutar_difusion` puede tomar ahora mismo."""
+    return Difusion.objects.filter(
+        Q(estado__in=[Difusion.ESTADO_PENDIENTE, Difusion.ESTADO_FALLIDA])
+        | Q(estado=Difusion.ESTADO_EN_CURSO, updated_at__lt=timezone.now() - ABANDONO)
+    )
+
+
+def destinatarios(difusion):
+    """[(usuario_id, email)] del segmento, sin repetidos y ordenados por id."""
+    matriculas = Matricula.objects.filter(periodo_id=difusion.periodo_id)
+    if difusion.nivel_id:
+        matriculas = matriculas.filter(paralelo__nivel_id=difusion.nivel_id)
+    if difusion.paralelo_id:
+        matriculas = matriculas.filter(paralelo_id=difusion.paralelo_id)
+    if difusion.estado_matricula:
+        matriculas = matriculas.filter(estado=difusion.estado_matricula)
+    return list(
+        matriculas.filter(solicitante__is_active=True)
+        .order_by('solicitante_id')
+        .values_list('solicitante_id', 'solicitante__email')
+        .distinct()
+    )
+
+
+def ejecutar_difusion(difusion, lote=LOTE):
+    """
+    Procesa (o reanuda) la difusión. Devuelve False si otro proceso la
+    está ejecutando (con avance reciente) o si ya estaba completada.
+    """
+    ahora  = timezone.now()
+    tomada = reanudables().filter(pk=difusion.pk).update(
+        estado=Difusion.ESTADO_EN_CURSO, fecha_inicio=ahora, updated_at=ahora, error='',
+    )
+    if not tomada:
+        return False
+    difusion.refresh_from_db()
+
+    try:
+        personas = destinatarios(difusion)
+        difusion.total_destinatarios = len(personas)
+        difusion.save(update_fields=['total_destinatarios', 'updated_at'])
+
+        pendientes = [p for p in personas if p[0] > difusion.ultimo_destinatario]
+        for inicio in range(0, len(pendientes), lote):
+            _procesar_lote(difusion, pendientes[inicio:inicio + lote])
+    except Exception as e:
+        logger.exception('Falló la difusión %s', difusion.pk)
+        difusion.estado = Difusion.ESTADO_FALLIDA
+        difusion.error  = str(e)[:1000]
+        difusion.save(update_fields=['estado', 'error', 'updated_at'])
+        raise
+
+    difusion.estado    = Difusion.ESTADO_COMPLETADA
+    difusion.fecha_fin = timezone.now()
+    difusion.save(update_fields=['estado', 'fecha_fin', 'updated_at'])
+    return True
+
+
+@transaction.atomic
+def _procesar_lote(difusion, personas):
+    ids = [usuario_id for usuario_id, _ in personas]
+    Notificacion.objects.bulk_create([
+        Notificacion(
+            destinatario_id=usuario_id,
+            tipo=difusion.tipo,
+            titulo=difusion.titulo,
+            mensaje=difusion.mensaje,
+            url_accion=difusion.url_accion,
+            generada_por_id=difusion.creada_por_id,
+            difusion=difusion,
+        )
+        for usuario_id in ids
+    ])
+    # bulk_create no pasa por Notificacion.save(): el contador se ajusta aquí
+    Usuario.objects.filter(pk__in=ids).update(
+        notificaciones_sin_leer=F('notificaciones_sin_leer') + 1,
+    )
+
+    correos = []
+    if difusion.enviar_email:
+        cuerpo = difusion.mensaje
+        if difusion.url_accion:
+            cuerpo += f'\n\n{difusion.url_accion}'
+        correos = CorreoPendiente.objects.bulk_create([
+            CorreoPendiente(destinatario=email, asunto=f'[SFQ] {difusion.titulo}',
+                            cuerpo_texto=cuerpo, difusion=difusion)
+            for _, email in personas if email
+        ])
+
+    difusion.procesados          += len(ids)
+    difusion.correos_encolados   += len(correos)
+    difusion.ultimo_destinatario  = ids[-1]
+    difusion.save(update_fields=['procesados', 'correos_encolados',
+                                 'ultimo_destinatario', 'updated_at'])
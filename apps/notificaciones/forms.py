@@ -0,0 +1,56 @@
+"""
+============================================================
+  MÓDULO: notificaciones — forms.py
+============================================================
+"""
+from django import forms
+from django.core.exceptions import ValidationError
+
+from apps.core.catalogos import NIVELES
+from apps.periodos.models import Nivel, Paralelo, PeriodoAcademico
+from .models import Difusion
+
+
+W = {'class': 'form-control'}
+WS = {'class': 'form-select'}
+WC = {'class': 'form-check-input'}
+
+
+class DifusionForm(forms.ModelForm):
+
+    class Meta:
+        model  = Difusion
+        fields = ['titulo', 'mensaje', 'tipo', 'url_accion', 'enviar_email',
+                  'periodo', 'nivel', 'paralelo', 'estado_matricula']
+        widgets = {
+            'titulo':           forms.TextInput(attrs={**W, 'placeholder': 'Ej: Documentos pendientes'}),
+            'mensaje':          forms.Textarea(attrs={**W, 'rows': 5}),
+            'tipo':             forms.Select(attrs=WS),
+            'url_accion':       forms.TextInput(attrs={**W, 'placeholder': '/documentos/'}),
+            'enviar_email':     forms.CheckboxInput(attrs=WC),
+            'periodo':          forms.Select(attrs=WS),
+            'nivel':            forms.Select(attrs=WS),
+            'paralelo':         forms.Select(attrs=WS),
+            'estado_matricula': forms.Select(attrs=WS),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['periodo'].queryset  = PeriodoAcademico.objects.order_by('-fecha_inicio')
+        self.fields['periodo'].initial   = PeriodoAcademico.objects.filter(es_activo=True).first()
+        self.fields['nivel'].queryset    = Nivel.objects.order_by('orden')
+        self.fields['nivel'].choices     = NIVELES.opciones()
+        self.fields['paralelo'].queryset = (Paralelo.objects
+                                            .select_related('nivel', 'periodo')
+                                            .order_by('-periodo__fecha_inicio', 'nivel__orden', 'nombre'))
+
+    def clean(self):
+        cleaned  = super().clean()
+        periodo  = cleaned.get('periodo')
+        nivel    = cleaned.get('nivel')
+        paralelo = cleaned.get('paralelo')
+        if paralelo and periodo and paralelo.periodo_id != periodo.pk:
+            raise ValidationError({'paralelo': 'El paralelo no pertenece al período seleccionado.'})
+        if paralelo and nivel and paralelo.nivel_id != nivel.pk:
+            raise ValidationError({'paralelo': 'El paralelo no corresponde al nivel seleccionado.'})
+        return cleaned
@@ -0,0 +1,41 @@
+"""
+Ejecuta las difusiones que secretaría dejó en cola.
+
+Uso:
+    python manage.py ejecutar_difusiones [--continuo [--intervalo 10]]
+
+Toma las difusiones PENDIENTE y las EN_CURSO abandonadas (su proceso murió
+sin terminar; ver apps.notificaciones.difusion.ABANDONO) y las retoma
+desde el último destinatario procesado. Las FALLIDA no se reintentan
+solas: secretaría las vuelve a poner en cola desde el admin.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notificaciones.difusion import ejecutar_difusion, reanudables
+from apps.notificaciones.models import Difusion
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las difusiones pendientes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true',
+                            help='No termina: vuelve a revisar cada --intervalo segundos.')
+        parser.add_argument('--intervalo', type=float, default=10)
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            for difusion in (reanudables().exclude(estado=Difusion.ESTADO_FALLIDA)
+                             .order_by('created_at')):
+                try:
+                    total += ejecutar_difusion(difusion)
+                except Exception as e:
+                    # ejecutar_difusion ya la dejó FALLIDA: se sigue con las demás
+                    self.stderr.write(f'{difusion}: {e}')
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+        self.stdout.write(self.style.SUCCESS(f'{total} difusiones ejecutadas.'))
@@ -0,0 +1,107 @@
+"""
+Envía los correos encolados en CorreoPendiente.
+
+Uso:
+    python manage.py enviar_correos [--lote 100] [--max-intentos 8]
+        [--continuo [--intervalo 10]]
+
+Cada lote se toma con SELECT ... FOR UPDATE SKIP LOCKED (varios procesos
+pueden correr a la vez sin duplicar envíos) y se manda por una sola
+conexión SMTP, un correo a la vez: si el servidor rechaza uno a mitad del
+lote, los ya entregados quedan ENVIADO y no se repiten.
+
+Un correo que falla suma un intento y espera antes del siguiente: 1, 2,
+4… minutos, hasta ESPERA_MAXIMA. Con los valores por defecto la cola
+aguanta unas dos horas de caída del servidor SMTP antes de marcar algo
+FALLIDO; desde el admin se puede volver a encolar. Si un lote no entrega
+nada (servidor caído), el comando termina o, con --continuo, espera
+--intervalo segundos antes de seguir.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.notificaciones.models import CorreoPendiente
+
+ESPERA_BASE   = timedelta(minutes=1)
+ESPERA_MAXIMA = timedelta(hours=1)
+
+
+def espera(intentos):
+    """Tiempo hasta el siguiente intento tras `intentos` fallidos."""
+    return min(ESPERA_BASE * 2 ** (intentos - 1), ESPERA_MAXIMA)
+
+
+class Command(BaseCommand):
+    help = 'Envía por lotes los correos encolados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=100)
+        parser.add_argument('--max-intentos', type=int, default=8)
+        parser.add_argument('--continuo', action='store_true',
+                            help='No termina: vuelve a revisar la cola cada --intervalo segundos.')
+        parser.add_argument('--intervalo', type=float, default=10)
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            enviados = self._enviar_lote(options['lote'], options['max_intentos'])
+            total += enviados or 0
+            # Cola vacía, o un lote entero fallido: no tiene sentido insistir ya
+            if not enviados:
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+        self.stdout.write(self.style.SUCCESS(f'{total} correos enviados.'))
+
+    @transaction.atomic
+    def _enviar_lote(self, lote, max_intentos):
+        """Correos enviados en este lote, o None si no hay ninguno por enviar ahora."""
+        correos = list(CorreoPendiente.objects
+                       .select_for_update(skip_locked=True)
+                       .filter(estado=CorreoPendiente.ESTADO_PENDIENTE,
+                               proximo_intento__lte=timezone.now())
+                       .order_by('pk')[:lote])
+        if not correos:
+            return None
+
+        remitente = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@sfq.edu.ec')
+        conexion  = get_connection(fail_silently=False)
+        ahora     = timezone.now()
+        enviados  = []
+        try:
+            for correo in correos:
+                try:
+                    conexion.send_messages([self._mensaje(correo, remitente)])
+                except Exception as e:
+                    correo.intentos       += 1
+                    correo.ultimo_error    = str(e)[:500]
+                    correo.proximo_intento = timezone.now() + espera(correo.intentos)
+                    if correo.intentos >= max_intentos:
+                        correo.estado = CorreoPendiente.ESTADO_FALLIDO
+                    correo.save(update_fields=['intentos', 'ultimo_error', 'estado',
+                                               'proximo_intento'])
+                    # La sesión SMTP puede haber quedado rota: el siguiente envío abre otra
+                    conexion.close()
+                else:
+                    enviados.append(correo.pk)
+        finally:
+            conexion.close()
+
+        CorreoPendiente.objects.filter(pk__in=enviados).update(
+            estado=CorreoPendiente.ESTADO_ENVIADO, fecha_envio=ahora,
+        )
+        return len(enviados)
+
+    @staticmethod
+    def _mensaje(correo, remitente):
+        mensaje = EmailMultiAlternatives(correo.asunto, correo.cuerpo_texto, remitente,
+                                         [correo.destinatario])
+        if correo.cuerpo_html:
+            mensaje.attach_alternative(correo.cuerpo_html, 'text/html')
+        return mensaje
@@ -0,0 +1,33 @@
+"""
+Entrega las novedades retenidas cuya ventana de agrupación ya venció.
+
+Uso:
+    python manage.py enviar_resumenes [--continuo [--intervalo 60]]
+
+Cada destinatario recibe una sola notificación y un solo correo con todo
+lo acumulado (ver apps.notificaciones.resumen). Los correos quedan en la
+cola de `enviar_correos`.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.notificaciones.resumen import vaciar
+
+
+class Command(BaseCommand):
+    help = 'Agrupa y entrega las notificaciones retenidas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true',
+                            help='No termina: vuelve a revisar cada --intervalo segundos.')
+        parser.add_argument('--intervalo', type=float, default=60)
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            total += vaciar()
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+        self.stdout.write(self.style.SUCCESS(f'{total} resúmenes entregados.'))
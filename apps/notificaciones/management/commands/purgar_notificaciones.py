@@ -0,0 +1,46 @@
+"""
+Elimina por lotes las notificaciones leídas más antiguas que la retención.
+
+Uso:
+    python manage.py purgar_notificaciones [--dias 180] [--lote 5000] [--recalcular]
+
+La retención por defecto es NOTIFICACIONES_RETENCION_DIAS. Solo se borran
+notificaciones leídas, así que el contador de no leídas no cambia; con
+--recalcular además se resincroniza Usuario.notificaciones_sin_leer desde
+la tabla (útil tras borrados o cargas hechas fuera del ORM).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.notificaciones.models import Notificacion
+
+
+class Command(BaseCommand):
+    help = 'Elimina por lotes las notificaciones leídas antiguas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int,
+                            default=getattr(settings, 'NOTIFICACIONES_RETENCION_DIAS', 180))
+        parser.add_argument('--lote', type=int, default=5000,
+                            help='Filas por DELETE (default: 5000).')
+        parser.add_argument('--recalcular', action='store_true',
+                            help='Resincroniza los contadores de no leídas de todos los usuarios.')
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options['dias'])
+        viejas = Notificacion.objects.filter(leida=True, created_at__lt=limite).order_by('pk')
+        total = 0
+        while True:
+            # Lotes cortos: cada DELETE es una transacción breve que no bloquea la tabla
+            ids = list(viejas.values_list('pk', flat=True)[:options['lote']])
+            if not ids:
+                break
+            total += Notificacion.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'{total} notificaciones eliminadas.'))
+
+        if options['recalcular']:
+            usuarios = Notificacion.recalcular_contadores()
+            self.stdout.write(f'Contadores recalculados para {usuarios} usuarios.')
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:44
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def inicializar_contadores(apps, schema_editor):
+    """Carga Usuario.notificaciones_sin_leer con las no leídas existentes."""
+    Usuario      = apps.get_model('usuarios', 'Usuario')
+    Notificacion = apps.get_model('notificaciones', 'Notificacion')
+    no_leidas = (Notificacion.objects
+                 .filter(destinatario=OuterRef('pk'), leida=False)
+                 .values('destinatario')
+                 .annotate(total=Count('pk'))
+                 .values('total'))
+    Usuario.objects.update(notificaciones_sin_leer=Coalesce(Subquery(no_leidas), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0003_usuario_notificaciones_sin_leer'),
+        ('notificaciones', '0003_plantillaemail_alter_notificacion_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['destinatario', '-id'], name='notificacion_bandeja_idx'),
+        ),
+        migrations.RunPython(inicializar_contadores, migrations.RunPython.noop),
+    ]
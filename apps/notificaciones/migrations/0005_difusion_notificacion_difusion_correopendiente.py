@@ -0,0 +1,76 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodos', '0003_ventanamatricula'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notificaciones', '0004_notificacion_notificacion_bandeja_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Difusion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modificado el')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('titulo', models.CharField(max_length=200, verbose_name='Título')),
+                ('mensaje', models.TextField(verbose_name='Mensaje')),
+                ('tipo', models.CharField(choices=[('INFO', 'Información'), ('EXITO', 'Éxito'), ('ADVERTENCIA', 'Advertencia'), ('ERROR', 'Error')], default='INFO', max_length=15, verbose_name='Tipo')),
+                ('url_accion', models.CharField(blank=True, max_length=300, verbose_name='URL de acción')),
+                ('enviar_email', models.BooleanField(default=True, verbose_name='Enviar también por email')),
+                ('estado_matricula', models.CharField(blank=True, choices=[('PENDIENTE', 'Pendiente de revisión'), ('EN_REVISION', 'En revisión'), ('APROBADA', 'Aprobada'), ('RECHAZADA', 'Rechazada - Requiere correcciones'), ('ANULADA', 'Anulada')], max_length=15, verbose_name='Estado de la matrícula')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_CURSO', 'En curso'), ('COMPLETADA', 'Completada'), ('FALLIDA', 'Fallida (se puede reanudar)')], default='PENDIENTE', max_length=12, verbose_name='Estado')),
+                ('total_destinatarios', models.PositiveIntegerField(default=0, verbose_name='Destinatarios')),
+                ('procesados', models.PositiveIntegerField(default=0, verbose_name='Notificados')),
+                ('correos_encolados', models.PositiveIntegerField(default=0, verbose_name='Correos en cola')),
+                ('ultimo_destinatario', models.BigIntegerField(default=0, verbose_name='Último destinatario procesado')),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('creada_por', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='difusiones', to=settings.AUTH_USER_MODEL, verbose_name='Creada por')),
+                ('nivel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='periodos.nivel', verbose_name='Nivel')),
+                ('paralelo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='periodos.paralelo', verbose_name='Paralelo')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='periodos.periodoacademico', verbose_name='Período académico')),
+            ],
+            options={
+                'verbose_name': 'Difusión',
+                'verbose_name_plural': 'Difusiones',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='notificacion',
+            name='difusion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notificaciones', to='notificaciones.difusion', verbose_name='Difusión de origen'),
+        ),
+        migrations.CreateModel(
+            name='CorreoPendiente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('destinatario', models.EmailField(max_length=254, verbose_name='Destinatario')),
+                ('asunto', models.CharField(max_length=255, verbose_name='Asunto')),
+                ('cuerpo_texto', models.TextField(verbose_name='Cuerpo en texto plano')),
+                ('cuerpo_html', models.TextField(blank=True, verbose_name='Cuerpo en HTML')),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('ENVIADO', 'Enviado'), ('FALLIDO', 'Fallido')], default='PENDIENTE', max_length=10, verbose_name='Estado')),
+                ('intentos', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('ultimo_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Encolado el')),
+                ('fecha_envio', models.DateTimeField(blank=True, null=True, verbose_name='Enviado el')),
+                ('difusion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='correos', to='notificaciones.difusion', verbose_name='Difusión')),
+            ],
+            options={
+                'verbose_name': 'Correo pendiente',
+                'verbose_name_plural': 'Cola de correos',
+                'ordering': ['pk'],
+                'indexes': [models.Index(condition=models.Q(('estado', 'PENDIENTE')), fields=['id'], name='correo_pendiente_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0005_difusion_notificacion_difusion_correopendiente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plantillaemail',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Versión'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('matriculas', '0009_matricula_matricula_revision_abierta_idx'),
+        ('notificaciones', '0006_plantillaemail_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='plantillaemail',
+            name='cuerpo_html',
+            field=models.TextField(help_text='Variables disponibles: {{ nombre_representante }}, {{ nombre_estudiante }}, {{ codigo_matricula }}, {{ estado_matricula }}, {{ motivo }}, {{ nombre_institucion }}. El resumen recibe {{ novedades }} (titulo, mensaje, fecha) y {{ total }}', verbose_name='Cuerpo en HTML'),
+        ),
+        migrations.AlterField(
+            model_name='plantillaemail',
+            name='evento',
+            field=models.CharField(choices=[('SOLICITUD_RECIBIDA', 'Solicitud de matrícula recibida'), ('EN_REVISION', 'Matrícula en revisión'), ('APROBADA', 'Matrícula aprobada'), ('RECHAZADA', 'Matrícula rechazada'), ('DOC_RECHAZADO', 'Documento rechazado'), ('ANULADA', 'Matrícula anulada'), ('RESUMEN', 'Resumen de varias novedades')], max_length=30, unique=True, verbose_name='Evento'),
+        ),
+        migrations.CreateModel(
+            name='NovedadPendiente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('evento', models.CharField(choices=[('SOLICITUD_RECIBIDA', 'Solicitud de matrícula recibida'), ('EN_REVISION', 'Matrícula en revisión'), ('APROBADA', 'Matrícula aprobada'), ('RECHAZADA', 'Matrícula rechazada'), ('DOC_RECHAZADO', 'Documento rechazado'), ('ANULADA', 'Matrícula anulada'), ('RESUMEN', 'Resumen de varias novedades')], max_length=30, verbose_name='Evento')),
+                ('tipo', models.CharField(choices=[('INFO', 'Información'), ('EXITO', 'Éxito'), ('ADVERTENCIA', 'Advertencia'), ('ERROR', 'Error')], default='INFO', max_length=15, verbose_name='Tipo')),
+                ('titulo', models.CharField(max_length=200, verbose_name='Título')),
+                ('mensaje', models.TextField(verbose_name='Mensaje')),
+                ('motivo', models.TextField(blank=True, verbose_name='Motivo')),
+                ('fecha', models.DateTimeField(auto_now_add=True, verbose_name='Fecha')),
+                ('destinatario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='novedades_pendientes', to=settings.AUTH_USER_MODEL, verbose_name='Destinatario')),
+                ('matricula', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='novedades_pendientes', to='matriculas.matricula', verbose_name='Matrícula')),
+            ],
+            options={
+                'verbose_name': 'Novedad pendiente',
+                'verbose_name_plural': 'Novedades pendientes',
+                'ordering': ['pk'],
+                'indexes': [models.Index(fields=['destinatario', 'id'], name='notificacio_destina_eca67a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.9 on 2026-10-19 06:18
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones', '0007_alter_plantillaemail_cuerpo_html_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='correopendiente',
+            name='proximo_intento',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo intento'),
+        ),
+    ]
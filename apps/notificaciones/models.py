@@ -4,8 +4,13 @@
   Notificaciones internas del sistema + plantillas de email
 ============================================================
 """
-from django.db import models
-from apps.core.models import TimeStampedModel
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from apps.core.models import TimeStampedModel, VersionadoModel
+from apps.matriculas.models import Matricula
 from apps.usuarios.models import Usuario
 
 
@@ -78,6 +83,12 @@ class Notificacion(TimeStampedModel):
                           related_name='notificaciones',
                           verbose_name='Matrícula relacionada'
                       )
+    difusion        = models.ForeignKey(
+                          'notificaciones.Difusion', on_delete=models.SET_NULL,
+                          null=True, blank=True,
+                          related_name='notificaciones',
+                          verbose_name='Difusión de origen'
+                      )
 
     class Meta:
         verbose_name        = 'Notificación'
@@ -85,6 +96,8 @@ class Notificacion(TimeStampedModel):
         ordering            = ['-created_at']
         indexes             = [
             models.Index(fields=['destinatario', 'leida']),
+            # Bandeja paginada por clave: WHERE destinatario = … AND id < … ORDER BY id DESC
+            models.Index(fields=['destinatario', '-id'], name='notificacion_bandeja_idx'),
         ]
 
     def __str__(self):
@@ -98,18 +111,65 @@ class Notificacion(TimeStampedModel):
     def icono(self):
         return self.TIPO_ICONO.get(self.tipo, 'bi-bell')
 
+    # ─── Contador de no leídas (Usuario.notificaciones_sin_leer) ──────────────
+    def save(self, *args, **kwargs):
+        if not self._state.adding or self.leida:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            _ajustar_contador(self.destinatario_id, 1)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            if not self.leida:
+                _ajustar_contador(self.destinatario_id, -1)
+        return resultado
+
     def marcar_como_leida(self):
         if not self.leida:
-            from django.utils import timezone
+            Notificacion.marcar_leidas(self.destinatario_id, [self.pk])
             self.leida = True
             self.fecha_lectura = timezone.now()
-            self.save(update_fields=['leida', 'fecha_lectura'])
+
+    @classmethod
+    def marcar_leidas(cls, usuario_id, ids):
+        """
+        Marca como leídas las notificaciones `ids` del usuario que aún no lo
+        estaban y descuenta exactamente esas del contador. Devuelve cuántas.
+        """
+        with transaction.atomic():
+            marcadas = cls.objects.filter(
+                destinatario_id=usuario_id, pk__in=ids, leida=False,
+            ).update(leida=True, fecha_lectura=timezone.now())
+            if marcadas:
+                _ajustar_contador(usuario_id, -marcadas)
+        return marcadas
+
+    @staticmethod
+    def recalcular_contadores(usuarios=None):
+        """Resincroniza el contador desde la tabla (tras borrados masivos o SQL manual)."""
+        no_leidas = (Notificacion.objects
+                     .filter(destinatario=OuterRef('pk'), leida=False)
+                     .values('destinatario')
+                     .annotate(total=Count('pk'))
+                     .values('total'))
+        qs = Usuario.objects.all() if usuarios is None else Usuario.objects.filter(pk__in=usuarios)
+        return qs.update(notificaciones_sin_leer=Coalesce(Subquery(no_leidas), 0))
 
 
-class PlantillaEmail(TimeStampedModel):
+def _ajustar_contador(usuario_id, delta):
+    Usuario.objects.filter(pk=usuario_id).update(
+        notificaciones_sin_leer=Greatest(F('notificaciones_sin_leer') + delta, Value(0)),
+    )
+
+
+class PlantillaEmail(TimeStampedModel, VersionadoModel):
     """
     Plantillas de email configurables desde el panel de administración.
     Usa variables del tipo {{ nombre_estudiante }}, {{ codigo_matricula }}, etc.
+    Cada guardado sube `version`; apps.notificaciones.plantillas compila una
+    vez cada versión y la reutiliza para todos los destinatarios.
     """
     EVENTO_SOLICITUD_RECIBIDA = 'SOLICITUD_RECIBIDA'
     EVENTO_EN_REVISION        = 'EN_REVISION'
@@ -117,6 +177,7 @@ class PlantillaEmail(TimeStampedModel):
     EVENTO_RECHAZADA          = 'RECHAZADA'
     EVENTO_DOC_RECHAZADO      = 'DOC_RECHAZADO'
     EVENTO_ANULADA            = 'ANULADA'
+    EVENTO_RESUMEN            = 'RESUMEN'
 
     EVENTOS = [
         (EVENTO_SOLICITUD_RECIBIDA, 'Solicitud de matrícula recibida'),
@@ -125,6 +186,7 @@ class PlantillaEmail(TimeStampedModel):
         (EVENTO_RECHAZADA,          'Matrícula rechazada'),
         (EVENTO_DOC_RECHAZADO,      'Documento rechazado'),
         (EVENTO_ANULADA,            'Matrícula anulada'),
+        (EVENTO_RESUMEN,            'Resumen de varias novedades'),
     ]
 
     evento          = models.CharField(max_length=30, choices=EVENTOS,
@@ -135,7 +197,8 @@ class PlantillaEmail(TimeStampedModel):
                                            'Variables disponibles: {{ nombre_representante }}, '
                                            '{{ nombre_estudiante }}, {{ codigo_matricula }}, '
                                            '{{ estado_matricula }}, {{ motivo }}, '
-                                           '{{ nombre_institucion }}'
+                                           '{{ nombre_institucion }}. El resumen recibe '
+                                           '{{ novedades }} (titulo, mensaje, fecha) y {{ total }}'
                                        ))
     cuerpo_texto    = models.TextField(blank=True, verbose_name='Cuerpo en texto plano',
                                        help_text='Versión sin HTML para clientes de email básicos')
@@ -147,6 +210,59 @@ class PlantillaEmail(TimeStampedModel):
     def __str__(self):
         return f'Email: {self.get_evento_display()}'
 
+    def clean(self):
+        from django.template import TemplateSyntaxError
+        from .plantillas import compilar
+        for campo in ('asunto', 'cuerpo_html', 'cuerpo_texto'):
+            try:
+                compilar(getattr(self, campo))
+            except TemplateSyntaxError as e:
+                raise ValidationError({campo: f'Error en la plantilla: {e}'})
+
+    def save(self, *args, **kwargs):
+        from .plantillas import invalidar
+        super().save(*args, **kwargs)
+        transaction.on_commit(invalidar)
+
+    def delete(self, *args, **kwargs):
+        from .plantillas import invalidar
+        resultado = super().delete(*args, **kwargs)
+        transaction.on_commit(invalidar)
+        return resultado
+
+
+
+class NovedadPendiente(models.Model):
+    """
+    Notificación retenida para agruparla con las siguientes del mismo
+    destinatario (apps.notificaciones.resumen). Se vacía como una sola
+    notificación y un solo correo cuando vence la ventana o la matrícula
+    llega a un estado final.
+    """
+    destinatario = models.ForeignKey(Usuario, on_delete=models.CASCADE,
+                                     related_name='novedades_pendientes',
+                                     verbose_name='Destinatario')
+    matricula    = models.ForeignKey('matriculas.Matricula', on_delete=models.CASCADE,
+                                     related_name='novedades_pendientes',
+                                     verbose_name='Matrícula')
+    evento       = models.CharField(max_length=30, choices=PlantillaEmail.EVENTOS,
+                                    verbose_name='Evento')
+    tipo         = models.CharField(max_length=15, choices=Notificacion.TIPOS,
+                                    default=Notificacion.TIPO_INFO, verbose_name='Tipo')
+    titulo       = models.CharField(max_length=200, verbose_name='Título')
+    mensaje      = models.TextField(verbose_name='Mensaje')
+    motivo       = models.TextField(blank=True, verbose_name='Motivo')
+    fecha        = models.DateTimeField(auto_now_add=True, verbose_name='Fecha')
+
+    class Meta:
+        verbose_name        = 'Novedad pendiente'
+        verbose_name_plural = 'Novedades pendientes'
+        ordering            = ['pk']
+        indexes             = [models.Index(fields=['destinatario', 'id'])]
+
+    def __str__(self):
+        return f'{self.titulo} → {self.destinatario_id}'
+
 
 """
 ============================================================
@@ -184,4 +300,120 @@ Los reportes se exportan a:
 
 No se requieren modelos adicionales para el módulo de reportes.
 ============================================================
-"""
\ No newline at end of file
+"""
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Difusiones masivas y cola de correos
+# ─────────────────────────────────────────────────────────────────────────────
+
+class Difusion(TimeStampedModel):
+    """
+    Mensaje de secretaría a todos los representantes de un segmento
+    (período y, opcionalmente, nivel, paralelo o estado de la matrícula).
+    Lo ejecuta apps.notificaciones.difusion: crea las notificaciones por
+    lotes con bulk_create y encola los correos en CorreoPendiente.
+    """
+    ESTADO_PENDIENTE  = 'PENDIENTE'
+    ESTADO_EN_CURSO   = 'EN_CURSO'
+    ESTADO_COMPLETADA = 'COMPLETADA'
+    ESTADO_FALLIDA    = 'FALLIDA'
+
+    ESTADOS = [
+        (ESTADO_PENDIENTE,  'Pendiente'),
+        (ESTADO_EN_CURSO,   'En curso'),
+        (ESTADO_COMPLETADA, 'Completada'),
+        (ESTADO_FALLIDA,    'Fallida (se puede reanudar)'),
+    ]
+
+    # ─── Contenido ────────────────────────────────────────────────────────────
+    titulo           = models.CharField(max_length=200, verbose_name='Título')
+    mensaje          = models.TextField(verbose_name='Mensaje')
+    tipo             = models.CharField(max_length=15, choices=Notificacion.TIPOS,
+                                        default=Notificacion.TIPO_INFO, verbose_name='Tipo')
+    url_accion       = models.CharField(max_length=300, blank=True, verbose_name='URL de acción')
+    enviar_email     = models.BooleanField(default=True, verbose_name='Enviar también por email')
+
+    # ─── Segmento ─────────────────────────────────────────────────────────────
+    periodo          = models.ForeignKey('periodos.PeriodoAcademico', on_delete=models.CASCADE,
+                                         related_name='+', verbose_name='Período académico')
+    nivel            = models.ForeignKey('periodos.Nivel', on_delete=models.SET_NULL,
+                                         null=True, blank=True, related_name='+',
+                                         verbose_name='Nivel')
+    paralelo         = models.ForeignKey('periodos.Paralelo', on_delete=models.SET_NULL,
+                                         null=True, blank=True, related_name='+',
+                                         verbose_name='Paralelo')
+    estado_matricula = models.CharField(max_length=15, choices=Matricula.ESTADOS, blank=True,
+                                        verbose_name='Estado de la matrícula')
+    creada_por       = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True,
+                                         related_name='difusiones', verbose_name='Creada por')
+
+    # ─── Progreso ─────────────────────────────────────────────────────────────
+    estado              = models.CharField(max_length=12, choices=ESTADOS,
+                                           default=ESTADO_PENDIENTE, verbose_name='Estado')
+    total_destinatarios = models.PositiveIntegerField(default=0, verbose_name='Destinatarios')
+    procesados          = models.PositiveIntegerField(default=0, verbose_name='Notificados')
+    correos_encolados   = models.PositiveIntegerField(default=0, verbose_name='Correos en cola')
+    ultimo_destinatario = models.BigIntegerField(default=0, verbose_name='Último destinatario procesado')
+    fecha_inicio        = models.DateTimeField(null=True, blank=True, verbose_name='Inicio')
+    fecha_fin           = models.DateTimeField(null=True, blank=True, verbose_name='Fin')
+    error               = models.TextField(blank=True, verbose_name='Error')
+
+    class Meta:
+        verbose_name        = 'Difusión'
+        verbose_name_plural = 'Difusiones'
+        ordering            = ['-created_at']
+
+    def __str__(self):
+        return f'{self.titulo} ({self.get_estado_display()})'
+
+    @property
+    def progreso(self):
+        if not self.total_destinatarios:
+            return 100 if self.estado == self.ESTADO_COMPLETADA else 0
+        return round(100 * self.procesados / self.total_destinatarios)
+
+
+class CorreoPendiente(models.Model):
+    """
+    Cola de salida de correos. La llenan las difusiones y los resúmenes y
+    la vacía `manage.py enviar_correos`, reutilizando una conexión SMTP por
+    lote. Un envío fallido se reintenta desde `proximo_intento`, con espera
+    creciente; tras el último intento queda FALLIDO hasta que se reencole.
+    """
+    ESTADO_PENDIENTE = 'PENDIENTE'
+    ESTADO_ENVIADO   = 'ENVIADO'
+    ESTADO_FALLIDO   = 'FALLIDO'
+
+    ESTADOS = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_ENVIADO,   'Enviado'),
+        (ESTADO_FALLIDO,   'Fallido'),
+    ]
+
+    destinatario  = models.EmailField(verbose_name='Destinatario')
+    asunto        = models.CharField(max_length=255, verbose_name='Asunto')
+    cuerpo_texto  = models.TextField(verbose_name='Cuerpo en texto plano')
+    cuerpo_html   = models.TextField(blank=True, verbose_name='Cuerpo en HTML')
+    difusion      = models.ForeignKey(Difusion, on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='correos', verbose_name='Difusión')
+    estado        = models.CharField(max_length=10, choices=ESTADOS,
+                                     default=ESTADO_PENDIENTE, verbose_name='Estado')
+    intentos      = models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')
+    proximo_intento = models.DateTimeField(default=timezone.now, verbose_name='Próximo intento')
+    ultimo_error  = models.TextField(blank=True, verbose_name='Último error')
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name='Encolado el')
+    fecha_envio   = models.DateTimeField(null=True, blank=True, verbose_name='Enviado el')
+
+    class Meta:
+        verbose_name        = 'Correo pendiente'
+        verbose_name_plural = 'Cola de correos'
+        ordering            = ['pk']
+        indexes             = [
+            # El despachador solo recorre los pendientes
+            models.Index(fields=['id'], condition=models.Q(estado='PENDIENTE'),
+                         name='correo_pendiente_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.asunto} → {self.destinatario}'
@@ -0,0 +1,227 @@
+"""
+============================================================
+  PLANTILLAS: apps.notificaciones
+  Motor de correos a partir de PlantillaEmail
+============================================================
+
+Las fuentes de las plantillas activas se leen con una sola consulta y cada
+proceso guarda su copia, junto con la `version` de cada plantilla. Cada
+(plantilla, versión) se compila una vez y el Template se reutiliza para
+todos los mensajes: un envío masivo no vuelve a parsear la plantilla por
+destinatario.
+
+Como en apps.core.catalogos, la copia se revalida cada REVISION_SEGUNDOS
+con una huella barata (COUNT, MAX(updated_at) y SUM(version); cada
+guardado sube `version`). Así un cambio hecho en el admin llega también a
+los otros workers y a los procesos de `enviar_resumenes` o
+`ejecutar_difusiones`. El proceso que guarda o elimina una PlantillaEmail
+descarta su copia al confirmar la transacción, sin esperar. Los eventos
+sin plantilla activa usan PREDETERMINADAS.
+
+El motor no tiene loaders: una plantilla editada en el admin no puede
+incluir archivos del servidor con {% include %} ni {% extends %}.
+"""
+import html as _html
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+from django.template import Context, Engine
+from django.utils.html import strip_tags
+
+from apps.core import metricas
+
+REVISION_SEGUNDOS = 5
+
+# Sin loaders ni context processors; el escapado lo decide el Context al renderizar
+_motor = Engine()
+
+Compilada = namedtuple('Compilada', 'asunto html texto')
+Fuentes   = namedtuple('Fuentes', 'huella revisada por_evento')
+
+# (evento, plantilla_id, version) -> Compilada (cache por proceso)
+_compiladas = {}
+_candado    = threading.Lock()
+
+_fuentes_actuales = None
+_candado_fuentes  = threading.Lock()
+
+# evento -> (asunto, cuerpo_html, cuerpo_texto) si no hay plantilla activa
+PREDETERMINADAS = {
+    'SOLICITUD_RECIBIDA': (
+        '[SFQ] Solicitud recibida - {{ codigo_matricula }}',
+        '',
+        'Estimado/a {{ nombre_representante }}:\n\n'
+        'La solicitud de matrícula de {{ nombre_estudiante }} ha sido registrada.\n'
+        'Código: {{ codigo_matricula }}\n'
+        'Estado: {{ estado_matricula }}\n\n'
+        'Le notificaremos cuando haya novedades.\n\n{{ nombre_institucion }}',
+    ),
+    'EN_REVISION': (
+        '[SFQ] Matrícula en revisión - {{ codigo_matricula }}',
+        '',
+        'Estimado/a {{ nombre_representante }}:\n\n'
+        'La matrícula de {{ nombre_estudiante }} ({{ codigo_matricula }}) '
+        'está siendo revisada por secretaría.\n\n{{ nombre_institucion }}',
+    ),
+    'APROBADA': (
+        '[SFQ] Matrícula aprobada - {{ codigo_matricula }}',
+        '',
+        '¡Felicitaciones! La matrícula de {{ nombre_estudiante }} ha sido aprobada.\n\n'
+        'Ingrese al sistema para descargar el certificado.\n\n{{ nombre_institucion }}',
+    ),
+    'RECHAZADA': (
+        '[SFQ] Matrícula requiere correcciones - {{ codigo_matricula }}',
+        '',
+        'Estimado/a {{ nombre_representante }}:\n\n'
+        'La solicitud de matrícula de {{ nombre_estudiante }} requiere correcciones.\n'
+        'Motivo: {{ motivo }}\n\n'
+        'Ingrese al sistema para corregirla y reenviarla.\n\n{{ nombre_institucion }}',
+    ),
+    'DOC_RECHAZADO': (
+        '[SFQ] Documento rechazado - {{ codigo_matricula }}',
+        '',
+        'Estimado/a {{ nombre_representante }}:\n\n'
+        'Un documento de la matrícula de {{ nombre_estudiante }} fue rechazado.\n'
+        'Motivo: {{ motivo }}\n\n'
+        'Ingrese al sistema para subirlo nuevamente.\n\n{{ nombre_institucion }}',
+    ),
+    'ANULADA': (
+        '[SFQ] Matrícula anulada - {{ codigo_matricula }}',
+        '',
+        'Estimado/a {{ nombre_representante }}:\n\n'
+        'La matrícula de {{ nombre_estudiante }} ({{ codigo_matricula }}) fue anulada.\n'
+        '{% if motivo %}Motivo: {{ motivo }}\n{% endif %}\n{{ nombre_institucion }}',
+    ),
+    'RESUMEN': (
+        '[SFQ] {{ total }} novedades de su matrícula',
+        '',
+        'Estimado/a {{ nombre_representante }}:\n\n'
+        'Hay novedades en sus solicitudes de matrícula:\n\n'
+        '{% for novedad in novedades %}- {{ novedad.fecha|date:"d/m H:i" }} '
+        '{{ novedad.titulo }}: {{ novedad.mensaje }}\n{% endfor %}\n'
+        'Ingrese al sistema para ver el detalle.\n\n{{ nombre_institucion }}',
+    ),
+}
+
+
+def compilar(fuente):
+    """Template de la fuente; lanza TemplateSyntaxError si no es válida."""
+    return _motor.from_string(fuente or '')
+
+
+def invalidar():
+    """Descarta la copia de este proceso; se llama al guardar o eliminar plantillas."""
+    global _fuentes_actuales
+    _fuentes_actuales = None
+
+
+def _huella(modelo):
+    datos = modelo.objects.aggregate(n=Count('pk'), ultimo=Max('updated_at'),
+                                     versiones=Sum('version'))
+    return datos['n'], datos['ultimo'], datos['versiones']
+
+
+def _fuentes():
+    """evento -> {id, version, asunto, cuerpo_html, cuerpo_texto} de las plantillas activas."""
+    global _fuentes_actuales
+    actuales = _fuentes_actuales
+    if actuales is not None and time.monotonic() - actuales.revisada < REVISION_SEGUNDOS:
+        return actuales.por_evento
+    with _candado_fuentes:
+        actuales = _fuentes_actuales
+        if actuales is not None and time.monotonic() - actuales.revisada < REVISION_SEGUNDOS:
+            return actuales.por_evento
+        from .models import PlantillaEmail
+        huella  = _huella(PlantillaEmail)
+        vigente = actuales is not None and actuales.huella == huella
+        metricas.cache_consultada('plantillas', vigente)
+        if vigente:
+            actuales = actuales._replace(revisada=time.monotonic())
+        else:
+            actuales = Fuentes(huella, time.monotonic(), {
+                fila['evento']: fila
+                for fila in PlantillaEmail.objects.filter(is_active=True).values(
+                    'evento', 'id', 'version', 'asunto', 'cuerpo_html', 'cuerpo_texto',
+                )
+            })
+        _fuentes_actuales = actuales
+    return actuales.por_evento
+
+
+def plantilla(evento):
+    """Compilada del evento: la plantilla activa en su versión actual o la predeterminada."""
+    fuente = _fuentes().get(evento)
+    if fuente is None:
+        clave = (evento, None, 0)
+        asunto, html, texto = PREDETERMINADAS[evento]
+    else:
+        clave = (evento, fuente['id'], fuente['version'])
+        asunto, html, texto = fuente['asunto'], fuente['cuerpo_html'], fuente['cuerpo_texto']
+
+    compilada = _compiladas.get(clave)
+    if compilada is None:
+        compilada = Compilada(
+            asunto=compilar(asunto),
+            html=compilar(html) if html.strip() else None,
+            texto=compilar(texto) if texto.strip() else None,
+        )
+        with _candado:
+            # Las versiones anteriores del evento ya no se van a usar
+            for vieja in [c for c in _compiladas if c[0] == evento]:
+                del _compiladas[vieja]
+            _compiladas[clave] = compilada
+    return compilada
+
+
+def contexto_matricula(matricula, motivo=''):
+    """Variables disponibles en las plantillas (ver PlantillaEmail.cuerpo_html)."""
+    return {
+        'nombre_representante': matricula.solicitante.get_full_name() or matricula.solicitante.username,
+        'nombre_estudiante':    matricula.estudiante.nombre_completo,
+        'codigo_matricula':     matricula.codigo,
+        'estado_matricula':     matricula.get_estado_display(),
+        'motivo':               motivo,
+        'nombre_institucion':   settings.SCHOOL_NAME,
+    }
+
+
+def renderizar(evento, contextos):
+    """
+    [(asunto, cuerpo_texto, cuerpo_html)] para cada contexto, con la
+    plantilla del evento compilada una sola vez.
+    """
+    compilada = plantilla(evento)
+    mensajes  = []
+    for datos in contextos:
+        # Solo el HTML se escapa; asunto y texto plano van tal cual
+        plano = Context(datos, autoescape=False)
+        # Una sola línea: el asunto va en una cabecera del correo
+        asunto = ' '.join(compilada.asunto.render(plano).split())
+        html   = compilada.html.render(Context(datos)) if compilada.html else ''
+        if compilada.texto:
+            texto = compilada.texto.render(plano)
+        else:
+            texto = _html.unescape(strip_tags(html))
+        mensajes.append((asunto[:255], texto, html))
+    return mensajes
+
+
+def encolar_correos(evento, destinos):
+    """
+    Encola en CorreoPendiente un correo por cada (email, contexto) de
+    `destinos`. Los destinos sin email se omiten. Devuelve cuántos se encolaron.
+    """
+    from .models import CorreoPendiente
+    destinos = [(email, datos) for email, datos in destinos if email]
+    if not destinos:
+        return 0
+    mensajes = renderizar(evento, [datos for _, datos in destinos])
+    correos  = CorreoPendiente.objects.bulk_create([
+        CorreoPendiente(destinatario=email, asunto=asunto,
+                        cuerpo_texto=texto, cuerpo_html=html)
+        for (email, _), (asunto, texto, html) in zip(destinos, mensajes)
+    ])
+    return len(correos)
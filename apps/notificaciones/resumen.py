@@ -0,0 +1,148 @@
+"""
+============================================================
+  RESUMEN: apps.notificaciones
+  Agrupación de notificaciones por destinatario
+============================================================
+
+Una revisión produce varias novedades seguidas (en revisión, documentos
+rechazados, rechazo). En lugar de una notificación y un correo por cada
+una, `agregar` las retiene en NovedadPendiente y `vaciar` las entrega
+juntas: una sola notificación y un solo correo por destinatario.
+
+Se vacía un destinatario cuando:
+
+  - su novedad más antigua supera NOTIFICACIONES_AGRUPAR_MINUTOS
+    (`manage.py enviar_resumenes`, en cron o con --continuo), o
+  - llega un evento final (aprobada, rechazada, anulada): el representante
+    tiene que enterarse ya, y se lleva lo acumulado hasta ese momento.
+
+Con NOTIFICACIONES_AGRUPAR_MINUTOS = 0 no se retiene nada.
+Una sola novedad se entrega como siempre, con la plantilla de su evento;
+dos o más usan la plantilla RESUMEN.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from apps.usuarios.models import Usuario
+
+from .models import NovedadPendiente, Notificacion, PlantillaEmail
+from .plantillas import contexto_matricula, encolar_correos
+
+EVENTOS_FINALES = {
+    PlantillaEmail.EVENTO_APROBADA,
+    PlantillaEmail.EVENTO_RECHAZADA,
+    PlantillaEmail.EVENTO_ANULADA,
+}
+
+# El tipo del resumen es el más grave de sus novedades
+GRAVEDAD = [Notificacion.TIPO_INFO, Notificacion.TIPO_EXITO,
+            Notificacion.TIPO_ADVERTENCIA, Notificacion.TIPO_ERROR]
+
+LOTE = 200
+
+
+def ventana():
+    return timedelta(minutes=getattr(settings, 'NOTIFICACIONES_AGRUPAR_MINUTOS', 10))
+
+
+def agregar(matricula, evento, tipo, titulo, mensaje, motivo=''):
+    """Retiene una novedad para el solicitante de la matrícula."""
+    novedad = NovedadPendiente(
+        destinatario_id=matricula.solicitante_id, matricula=matricula, evento=evento,
+        tipo=tipo, titulo=titulo, mensaje=mensaje, motivo=motivo,
+    )
+    if not ventana():
+        _entregar([(matricula.solicitante, [novedad])])
+        return
+    novedad.save()
+    if evento in EVENTOS_FINALES:
+        transaction.on_commit(lambda: vaciar([matricula.solicitante_id]))
+
+
+def destinatarios_vencidos():
+    """Ids de los destinatarios cuya novedad más antigua ya cumplió la ventana."""
+    return list(NovedadPendiente.objects
+                .values('destinatario_id')
+                .annotate(primera=Min('fecha'))
+                .filter(primera__lte=timezone.now() - ventana())
+                .values_list('destinatario_id', flat=True))
+
+
+def vaciar(destinatarios=None):
+    """
+    Entrega lo retenido de `destinatarios` (por defecto, los vencidos).
+    Devuelve cuántos destinatarios recibieron su notificación.
+    """
+    if destinatarios is None:
+        destinatarios = destinatarios_vencidos()
+    destinatarios = sorted(set(destinatarios))
+    total = 0
+    for i in range(0, len(destinatarios), LOTE):
+        total += _vaciar_lote(destinatarios[i:i + LOTE])
+    return total
+
+
+@transaction.atomic
+def _vaciar_lote(ids):
+    # SKIP LOCKED: si otro proceso ya está vaciando a alguien, se lo deja
+    novedades = list(NovedadPendiente.objects
+                     .select_for_update(skip_locked=True, of=('self',))
+                     .filter(destinatario_id__in=ids)
+                     .select_related('destinatario', 'matricula__estudiante')
+                     .order_by('destinatario_id', 'pk'))
+    if not novedades:
+        return 0
+    grupos = defaultdict(list)
+    for novedad in novedades:
+        grupos[novedad.destinatario_id].append(novedad)
+    _entregar([(grupo[0].destinatario, grupo) for grupo in grupos.values()])
+    NovedadPendiente.objects.filter(pk__in=[n.pk for n in novedades]).delete()
+    return len(grupos)
+
+
+def _entregar(grupos):
+    """Una notificación y un correo por cada (destinatario, [novedades])."""
+    notificaciones = []
+    correos        = defaultdict(list)   # evento -> [(email, contexto)]
+    for destinatario, grupo in grupos:
+        if len(grupo) == 1:
+            novedad = grupo[0]
+            notificaciones.append(Notificacion(
+                destinatario=destinatario, tipo=novedad.tipo, titulo=novedad.titulo,
+                mensaje=novedad.mensaje, url_accion=f'/matriculas/{novedad.matricula_id}/',
+                matricula=novedad.matricula,
+            ))
+            correos[novedad.evento].append(
+                (destinatario.email, contexto_matricula(novedad.matricula, novedad.motivo)))
+            continue
+
+        matriculas = {n.matricula_id for n in grupo}
+        unica      = grupo[-1].matricula if len(matriculas) == 1 else None
+        notificaciones.append(Notificacion(
+            destinatario=destinatario,
+            tipo=max((n.tipo for n in grupo), key=GRAVEDAD.index),
+            titulo=f'{len(grupo)} novedades de su matrícula',
+            mensaje='\n'.join(f'• {n.titulo}: {n.mensaje}' for n in grupo),
+            url_accion=f'/matriculas/{unica.pk}/' if unica else '/matriculas/',
+            matricula=unica,
+        ))
+        contexto = contexto_matricula(unica) if unica else {
+            'nombre_representante': destinatario.get_full_name() or destinatario.username,
+            'nombre_institucion':   settings.SCHOOL_NAME,
+        }
+        contexto['novedades'] = [{'titulo': n.titulo, 'mensaje': n.mensaje, 'fecha': n.fecha}
+                                 for n in grupo]
+        contexto['total'] = len(grupo)
+        correos[PlantillaEmail.EVENTO_RESUMEN].append((destinatario.email, contexto))
+
+    Notificacion.objects.bulk_create(notificaciones)
+    # bulk_create no pasa por save(): una notificación nueva por destinatario
+    Usuario.objects.filter(pk__in=[d.pk for d, _ in grupos]).update(
+        notificaciones_sin_leer=F('notificaciones_sin_leer') + 1)
+    for evento, destinos in correos.items():
+        encolar_correos(evento, destinos)
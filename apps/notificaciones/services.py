@@ -1,54 +1,93 @@
 ﻿"""
 Servicio de notificaciones: email + notificaciones internas
+
+Cada función pasa su novedad por apps.notificaciones.resumen, la única
+entrada: las de un mismo representante se agrupan en un resumen, que crea
+la notificación interna y encola el correo renderizado con la
+PlantillaEmail del evento; los envía `manage.py enviar_correos`, fuera de
+la petición.
+
+Las transiciones de Matricula y el rechazo de un DocumentoMatricula las
+llaman con transaction.on_commit: un cambio revertido no avisa a nadie.
 """
-from .models import Notificacion
-from apps.core.utils import enviar_email_sistema
+from apps.matriculas.models import Matricula
+
+from .models import Notificacion, PlantillaEmail
+from .resumen import agregar as _notificar
 
 
 def notificar_solicitud_recibida(matricula):
     """Notifica al representante que su solicitud fue recibida"""
-    Notificacion.objects.create(
-        destinatario=matricula.solicitante,
-        tipo=Notificacion.TIPO_INFO,
-        titulo='Solicitud de matrÃ­cula recibida',
-        mensaje=f'Su solicitud de matrÃ­cula para {matricula.estudiante.nombre_completo} '
-                f'ha sido recibida. CÃ³digo: {matricula.codigo}',
-        url_accion=f'/matriculas/{matricula.pk}/'
+    _notificar(
+        matricula, PlantillaEmail.EVENTO_SOLICITUD_RECIBIDA, Notificacion.TIPO_INFO,
+        'Solicitud de matrícula recibida',
+        f'Su solicitud de matrícula para {matricula.estudiante.nombre_completo} '
+        f'ha sido recibida. Código: {matricula.codigo}',
     )
-    enviar_email_sistema(
-        destinatario=matricula.solicitante.email,
-        asunto=f'[SFQ] Solicitud recibida - {matricula.codigo}',
-        mensaje=f'Su solicitud de matrÃ­cula ha sido registrada exitosamente.\n'
-                f'CÃ³digo: {matricula.codigo}\n'
-                f'Estado: Pendiente de revisiÃ³n\n\n'
-                f'Le notificaremos cuando haya novedades.'
+
+
+def notificar_en_revision(matricula):
+    """Notifica al representante que secretaría está revisando la matrícula"""
+    _notificar(
+        matricula, PlantillaEmail.EVENTO_EN_REVISION, Notificacion.TIPO_INFO,
+        'Matrícula en revisión',
+        f'La matrícula de {matricula.estudiante.nombre_completo} está siendo revisada.',
     )
 
 
 def notificar_matricula_aprobada(matricula):
-    """Notifica al representante que la matrÃ­cula fue aprobada"""
-    Notificacion.objects.create(
-        destinatario=matricula.solicitante,
-        tipo=Notificacion.TIPO_EXITO,
-        titulo='Â¡MatrÃ­cula aprobada!',
-        mensaje=f'La matrÃ­cula de {matricula.estudiante.nombre_completo} '
-                f'ha sido APROBADA. Puede descargar el certificado.',
-        url_accion=f'/matriculas/{matricula.pk}/'
-    )
-    enviar_email_sistema(
-        destinatario=matricula.solicitante.email,
-        asunto=f'[SFQ] MatrÃ­cula aprobada - {matricula.codigo}',
-        mensaje=f'Â¡Felicitaciones! La matrÃ­cula de {matricula.estudiante.nombre_completo} '
-                f'ha sido aprobada.\n\nIngrese al sistema para descargar el certificado.'
+    """Notifica al representante que la matrícula fue aprobada"""
+    _notificar(
+        matricula, PlantillaEmail.EVENTO_APROBADA, Notificacion.TIPO_EXITO,
+        '¡Matrícula aprobada!',
+        f'La matrícula de {matricula.estudiante.nombre_completo} '
+        f'ha sido APROBADA. Puede descargar el certificado.',
     )
 
 
 def notificar_matricula_rechazada(matricula):
-    """Notifica al representante que la matrÃ­cula fue rechazada"""
-    Notificacion.objects.create(
-        destinatario=matricula.solicitante,
-        tipo=Notificacion.TIPO_ADVERTENCIA,
-        titulo='MatrÃ­cula requiere correcciones',
-        mensaje=f'Su solicitud requiere correcciones. Motivo: {matricula.motivo_rechazo}',
-        url_accion=f'/matriculas/{matricula.pk}/'
+    """Notifica al representante que la matrícula fue rechazada"""
+    _notificar(
+        matricula, PlantillaEmail.EVENTO_RECHAZADA, Notificacion.TIPO_ADVERTENCIA,
+        'Matrícula requiere correcciones',
+        f'Su solicitud requiere correcciones. Motivo: {matricula.motivo_rechazo}',
+        motivo=matricula.motivo_rechazo,
     )
+
+
+def notificar_documento_rechazado(documento):
+    """Notifica al representante que un documento de la matrícula fue rechazado"""
+    matricula = documento.matricula
+    _notificar(
+        matricula, PlantillaEmail.EVENTO_DOC_RECHAZADO, Notificacion.TIPO_ADVERTENCIA,
+        f'Documento rechazado: {documento.tipo.nombre}',
+        f'El documento "{documento.tipo.nombre}" de {matricula.estudiante.nombre_completo} '
+        f'fue rechazado. Motivo: {documento.observacion}',
+        motivo=documento.observacion,
+    )
+
+
+def notificar_matricula_anulada(matricula):
+    """Notifica al representante que la matrícula fue anulada"""
+    _notificar(
+        matricula, PlantillaEmail.EVENTO_ANULADA, Notificacion.TIPO_ERROR,
+        'Matrícula anulada',
+        f'La matrícula de {matricula.estudiante.nombre_completo} fue anulada. '
+        f'Motivo: {matricula.motivo_anulacion}',
+        motivo=matricula.motivo_anulacion,
+    )
+
+
+def notificar_transicion(matricula):
+    """Avisa al representante del estado al que acaba de pasar la matrícula."""
+    aviso = {
+        # A PENDIENTE solo se vuelve cuando el representante reenvía la solicitud
+        Matricula.ESTADO_PENDIENTE:   notificar_solicitud_recibida,
+        Matricula.ESTADO_EN_REVISION: notificar_en_revision,
+        Matricula.ESTADO_APROBADA:    notificar_matricula_aprobada,
+        Matricula.ESTADO_RECHAZADA:   notificar_matricula_rechazada,
+        Matricula.ESTADO_ANULADA:     notificar_matricula_anulada,
+    }.get(matricula.estado)
+    if aviso:
+        aviso(matricula)
+
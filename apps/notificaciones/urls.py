@@ -5,4 +5,6 @@ app_name = 'notificaciones'
 
 urlpatterns = [
     path('', views.lista_notificaciones, name='lista'),
+    path('difusiones/', views.DifusionListView.as_view(), name='difusiones'),
+    path('difusiones/nueva/', views.DifusionCreateView.as_view(), name='difusion-nueva'),
 ]
@@ -1,11 +1,76 @@
-﻿from django.shortcuts import render
+﻿from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .models import Notificacion
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.shortcuts import render
+from django.urls import reverse_lazy
+from django.views.generic import CreateView, ListView
+
+from apps.core.idempotencia import IdempotenteMixin
+from .forms import DifusionForm
+from .models import Difusion, Notificacion
+
+POR_PAGINA = 20
 
 
 @login_required
 def lista_notificaciones(request):
-    notificaciones = Notificacion.objects.filter(destinatario=request.user)
-    # Marcar como leÃ­das
-    notificaciones.filter(leida=False).update(leida=True)
-    return render(request, 'notificaciones/lista.html', {'notificaciones': notificaciones})
+    """
+    Bandeja paginada por clave (?antes=<id>): cada página es un
+    WHERE id < … ORDER BY id DESC LIMIT, sin OFFSET ni COUNT.
+    Solo se marcan como leídas las notificaciones que se muestran.
+    """
+    notificaciones = Notificacion.objects.filter(destinatario=request.user).order_by('-pk')
+    antes = request.GET.get('antes', '')
+    if antes.isdigit():
+        notificaciones = notificaciones.filter(pk__lt=int(antes))
+
+    pagina = list(notificaciones[:POR_PAGINA + 1])
+    hay_mas = len(pagina) > POR_PAGINA
+    pagina = pagina[:POR_PAGINA]
+
+    # Los objetos conservan leida=False para resaltarlas en esta vista
+    marcadas = Notificacion.marcar_leidas(request.user.pk, [n.pk for n in pagina if not n.leida])
+    # La insignia del navbar de esta misma respuesta ya refleja la lectura
+    request.user.notificaciones_sin_leer = max(request.user.notificaciones_sin_leer - marcadas, 0)
+
+    return render(request, 'notificaciones/lista.html', {
+        'notificaciones': pagina,
+        'siguiente':      pagina[-1].pk if hay_mas else None,
+        'primera_pagina': not antes,
+    })
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+#  Difusiones (secretaría)
+# ─────────────────────────────────────────────────────────────────────────────
+
+class SecretariaRequeridaMixin(LoginRequiredMixin, UserPassesTestMixin):
+    def test_func(self):
+        return self.request.user.es_secretaria
+
+
+class DifusionListView(SecretariaRequeridaMixin, ListView):
+    model               = Difusion
+    template_name       = 'notificaciones/difusion_lista.html'
+    context_object_name = 'difusiones'
+    paginate_by         = 20
+
+    def get_queryset(self):
+        return Difusion.objects.select_related('periodo', 'nivel', 'paralelo', 'creada_por')
+
+
+class DifusionCreateView(SecretariaRequeridaMixin, IdempotenteMixin, CreateView):
+    model         = Difusion
+    form_class    = DifusionForm
+    template_name = 'notificaciones/difusion_formulario.html'
+    success_url   = reverse_lazy('notificaciones:difusiones')
+
+    def form_valid(self, form):
+        # Queda PENDIENTE: la ejecuta `manage.py ejecutar_difusiones`
+        form.instance.creada_por = self.request.user
+        response = super().form_valid(form)
+        messages.success(
+            self.request,
+            'Difusión en cola: el avance se ve en esta lista.',
+        )
+        return response
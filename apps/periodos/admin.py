@@ -6,7 +6,7 @@
 from django.contrib import admin
 from django.utils import timezone
 from django.utils.html import format_html
-from .models import PeriodoAcademico, Nivel, Paralelo
+from .models import PeriodoAcademico, Nivel, Paralelo, VentanaMatricula
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -92,9 +92,9 @@ class PeriodoAcademicoAdmin(admin.ModelAdmin):
     @admin.display(description='Matrículas')
     def total_matriculas(self, obj):
         from apps.matriculas.models import Matricula
-        total    = Matricula.objects.filter(paralelo__periodo=obj).count()
+        total    = Matricula.objects.filter(periodo=obj).count()
         aprobadas = Matricula.objects.filter(
-            paralelo__periodo=obj, estado=Matricula.ESTADO_APROBADA
+            periodo=obj, estado=Matricula.ESTADO_APROBADA
         ).count()
         return format_html('{} total / <strong>{} aprobadas</strong>', total, aprobadas)
 
@@ -180,8 +180,16 @@ class ParaleloInline(admin.TabularInline):
         return format_html('<span style="color:{};">{}%</span>', color, pct)
 
 
-# Añadir el inline al PeriodoAcademicoAdmin
-PeriodoAcademicoAdmin.inlines = [ParaleloInline]
+class VentanaMatriculaInline(admin.TabularInline):
+    """Ventanas escalonadas por nivel o subnivel (ver planificar_ventanas)."""
+    model  = VentanaMatricula
+    extra  = 0
+    fields = ['nivel', 'subnivel', 'fecha_inicio', 'fecha_fin',
+              'hora_inicio', 'hora_fin', 'is_active']
+
+
+# Añadir los inlines al PeriodoAcademicoAdmin
+PeriodoAcademicoAdmin.inlines = [ParaleloInline, VentanaMatriculaInline]
 
 
 @admin.register(Paralelo)
@@ -224,6 +232,10 @@ class ParaleloAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Las columnas de cupo leen la anotación en lugar de contar por fila
+        return super().get_queryset(request).con_ocupacion()
+
     @admin.display(description='Cupo disp.')
     def badge_cupo_disponible(self, obj):
         disp  = obj.cupo_disponible
@@ -238,9 +250,10 @@ class ParaleloAdmin(admin.ModelAdmin):
         return format_html(
             '<div style="background:#eee;border-radius:4px;width:80px;">'
             '<div style="background:{};border-radius:4px;width:{}%;'
-            'text-align:center;color:white;font-size:11px;">{:.0f}%</div>'
+            'text-align:center;color:white;font-size:11px;">{}%</div>'
             '</div>',
-            color, min(pct, 100), pct
+            # format_html escapa los argumentos antes de formatear: el redondeo va aparte
+            color, min(pct, 100), f'{pct:.0f}'
         )
 
     @admin.display(description='¿Lleno?', boolean=True)
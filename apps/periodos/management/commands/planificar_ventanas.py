@@ -0,0 +1,150 @@
+"""
+Propone ventanas de matrícula escalonadas por nivel a partir del volumen
+histórico de solicitudes, para repartir el pico de tráfico entre días.
+
+Uso:
+    python manage.py planificar_ventanas <periodo_id>
+        [--referencia <periodo_id>] [--franjas 08:00-12:00,14:00-18:00]
+        [--fines-de-semana] [--hasta-el-cierre] [--aplicar]
+
+Cada nivel con paralelos en el período recibe una franja (día u hora)
+de apertura. Se asignan de mayor a menor volumen a la franja con menos
+carga acumulada (reparto voraz LPT). El volumen sale de las solicitudes
+del período de referencia (por defecto, el anterior del mismo régimen);
+los niveles sin historial usan el cupo total de sus paralelos.
+
+Sin --aplicar solo muestra la propuesta. Con --aplicar reemplaza las
+ventanas por nivel del período. Con --hasta-el-cierre cada ventana queda
+abierta desde su franja hasta el fin de matrículas (escalona solo la
+apertura). Sin esa opción el nivel solo matricula en su franja y luego
+en el período extraordinario.
+"""
+import heapq
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from apps.matriculas.models import Matricula
+from apps.periodos.models import Nivel, Paralelo, PeriodoAcademico, VentanaMatricula
+
+
+class Command(BaseCommand):
+    help = 'Propone (y opcionalmente aplica) ventanas de matrícula escalonadas por nivel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('periodo_id', type=int)
+        parser.add_argument('--referencia', type=int,
+                            help='Período cuyo volumen de solicitudes se usa como histórico.')
+        parser.add_argument('--franjas', default='',
+                            help='Franjas horarias diarias, ej: 08:00-12:00,14:00-18:00.')
+        parser.add_argument('--fines-de-semana', action='store_true',
+                            help='Incluye sábados y domingos.')
+        parser.add_argument('--hasta-el-cierre', action='store_true',
+                            help='Cada ventana dura desde su franja hasta el fin de matrículas.')
+        parser.add_argument('--aplicar', action='store_true',
+                            help='Guarda la propuesta reemplazando las ventanas por nivel.')
+
+    def handle(self, *args, **options):
+        try:
+            periodo = PeriodoAcademico.objects.get(pk=options['periodo_id'])
+        except PeriodoAcademico.DoesNotExist:
+            raise CommandError(f'No existe el período {options["periodo_id"]}.')
+
+        if options['franjas'] and options['hasta_el_cierre']:
+            raise CommandError('--franjas y --hasta-el-cierre no se pueden combinar.')
+        franjas = self._leer_franjas(options['franjas'])
+        dias    = self._dias_habiles(periodo, options['fines_de_semana'])
+        if not dias:
+            raise CommandError('El período no tiene días hábiles de matrícula.')
+        casillas = [(dia, franja) for dia in dias for franja in franjas]
+
+        volumen = self._volumen_por_nivel(periodo, options['referencia'])
+        if not volumen:
+            raise CommandError('El período no tiene paralelos: no hay niveles que planificar.')
+
+        # Reparto voraz: el nivel de mayor volumen va a la casilla menos cargada
+        # (a igual carga, la más temprana)
+        carga = [(0, i) for i in range(len(casillas))]
+        heapq.heapify(carga)
+        asignacion = []
+        niveles = Nivel.objects.in_bulk(volumen.keys())
+        for nivel_id, cantidad in sorted(volumen.items(), key=lambda x: (-x[1], niveles[x[0]].orden)):
+            acumulado, i = heapq.heappop(carga)
+            asignacion.append((niveles[nivel_id], cantidad, casillas[i]))
+            heapq.heappush(carga, (acumulado + cantidad, i))
+
+        asignacion.sort(key=lambda x: (x[2][0], x[2][1][0] or datetime.min.time(), x[0].orden))
+        self._mostrar(asignacion, carga, casillas)
+
+        if options['aplicar']:
+            self._aplicar(periodo, asignacion, options['hasta_el_cierre'])
+
+    # ─── Entradas ─────────────────────────────────────────────────────────────
+    def _leer_franjas(self, texto):
+        if not texto:
+            return [(None, None)]
+        franjas = []
+        for parte in texto.split(','):
+            try:
+                inicio, fin = (datetime.strptime(h.strip(), '%H:%M').time() for h in parte.split('-'))
+            except ValueError:
+                raise CommandError(f'Franja inválida: "{parte}". Use HH:MM-HH:MM.')
+            if inicio >= fin:
+                raise CommandError(f'Franja inválida: "{parte}". El inicio debe ser anterior al fin.')
+            franjas.append((inicio, fin))
+        return franjas
+
+    def _dias_habiles(self, periodo, fines_de_semana):
+        dias, dia = [], periodo.fecha_inicio_matriculas
+        while dia <= periodo.fecha_fin_matriculas:
+            if fines_de_semana or dia.weekday() < 5:
+                dias.append(dia)
+            dia += timedelta(days=1)
+        return dias
+
+    def _volumen_por_nivel(self, periodo, referencia_id):
+        """{nivel_id: solicitudes esperadas} para los niveles con paralelos en el período."""
+        cupos = dict(
+            Paralelo.objects.filter(periodo=periodo)
+            .values_list('nivel_id').annotate(cupo=Sum('cupo_maximo'))
+        )
+        if referencia_id is None:
+            referencia = (PeriodoAcademico.objects
+                          .filter(regimen=periodo.regimen, fecha_inicio__lt=periodo.fecha_inicio)
+                          .order_by('-fecha_inicio').first())
+            referencia_id = referencia.pk if referencia else None
+        historico = {}
+        if referencia_id is not None:
+            historico = dict(
+                Matricula.objects.filter(periodo_id=referencia_id)
+                .values_list('paralelo__nivel_id').annotate(total=Count('pk'))
+            )
+            self.stdout.write(f'Volumen histórico del período {referencia_id}.')
+        return {nivel_id: historico.get(nivel_id) or cupo for nivel_id, cupo in cupos.items()}
+
+    # ─── Salida ───────────────────────────────────────────────────────────────
+    def _mostrar(self, asignacion, carga, casillas):
+        for nivel, cantidad, (dia, (hora_inicio, hora_fin)) in asignacion:
+            franja = f' {hora_inicio:%H:%M}-{hora_fin:%H:%M}' if hora_inicio else ''
+            self.stdout.write(f'  {dia:%a %d/%m}{franja}  {nivel.nombre:<20} ~{cantidad} solicitudes')
+        maximo = max(c for c, _ in carga)
+        total  = sum(c for c, _ in carga)
+        self.stdout.write(
+            f'Pico por franja: ~{maximo} solicitudes '
+            f'(sin escalonar: ~{total} el primer día; {len(casillas)} franjas disponibles).'
+        )
+
+    @transaction.atomic
+    def _aplicar(self, periodo, asignacion, hasta_el_cierre):
+        VentanaMatricula.objects.filter(periodo=periodo, nivel__isnull=False).delete()
+        for nivel, _, (dia, (hora_inicio, hora_fin)) in asignacion:
+            VentanaMatricula(
+                periodo=periodo, nivel=nivel,
+                fecha_inicio=dia,
+                fecha_fin=periodo.fecha_fin_matriculas if hasta_el_cierre else dia,
+                hora_inicio=hora_inicio,
+                hora_fin=hora_fin,
+            ).save()
+        self.stdout.write(self.style.SUCCESS(f'{len(asignacion)} ventanas guardadas.'))
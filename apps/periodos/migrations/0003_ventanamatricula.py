@@ -0,0 +1,39 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodos', '0002_alter_periodoacademico_options_nivel_subnivel_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentanaMatricula',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado el')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modificado el')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('subnivel', models.CharField(blank=True, choices=[('PREPARATORIA', 'Preparatoria (1ro EGB)'), ('BASICA_ELEMENTAL', 'Básica Elemental (2do-4to EGB)'), ('BASICA_MEDIA', 'Básica Media (5to-7mo EGB)'), ('BASICA_SUPERIOR', 'Básica Superior (8vo-10mo EGB)'), ('BGU', 'Bachillerato General Unificado (BGU)')], max_length=20, verbose_name='Sub-nivel educativo')),
+                ('fecha_inicio', models.DateField(verbose_name='Desde')),
+                ('fecha_fin', models.DateField(verbose_name='Hasta')),
+                ('hora_inicio', models.TimeField(blank=True, help_text='Opcional: franja diaria', null=True, verbose_name='Hora de apertura')),
+                ('hora_fin', models.TimeField(blank=True, null=True, verbose_name='Hora de cierre')),
+                ('nivel', models.ForeignKey(blank=True, help_text='Deje vacío para aplicar a todo el subnivel', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ventanas', to='periodos.nivel', verbose_name='Nivel')),
+                ('periodo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventanas', to='periodos.periodoacademico', verbose_name='Período académico')),
+            ],
+            options={
+                'verbose_name': 'Ventana de matrícula',
+                'verbose_name_plural': 'Ventanas de matrícula',
+                'ordering': ['periodo', 'fecha_inicio', 'hora_inicio'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ventanamatricula',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('nivel__isnull', False), ('subnivel', '')), models.Q(('nivel__isnull', True), models.Q(('subnivel', ''), _negated=True)), _connector='OR'), name='ventana_nivel_o_subnivel', violation_error_message='Indique un nivel o un subnivel, no ambos.'),
+        ),
+    ]
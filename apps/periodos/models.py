@@ -4,13 +4,33 @@
   Años lectivos, niveles educativos, paralelos y cupos
 ============================================================
 """
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import connection, models, transaction
 from django.utils import timezone
 from apps.core.models import TimeStampedModel
 
 
+# Calendario de ventanas por período (ver PeriodoAcademico.calendario_ventanas).
+# La clave lleva el updated_at del período: la cache es local a cada proceso,
+# así que invalidar es tocar esa columna y cada worker arma una clave nueva
+# en su siguiente lectura. Las claves viejas vencen por TTL.
+CACHE_VENTANAS     = 'periodos:ventanas:{}:{}'
+CACHE_VENTANAS_TTL = 300
+
+
+def invalidar_calendario(periodo_ids=None):
+    """Invalida el calendario cacheado de los períodos indicados (o de todos) en todos los procesos."""
+    periodos = PeriodoAcademico.objects.all()
+    if periodo_ids is not None:
+        periodos = periodos.filter(pk__in=periodo_ids)
+    periodos.update(updated_at=timezone.now())
+
+
 class PeriodoAcademico(TimeStampedModel):
     """
     Año lectivo (ej: 2024-2025 Sierra).
@@ -70,6 +90,12 @@ class PeriodoAcademico(TimeStampedModel):
         if self.es_activo:
             PeriodoAcademico.objects.exclude(pk=self.pk).update(es_activo=False)
         super().save(*args, **kwargs)
+        # La secuencia de códigos del año se crea aquí, fuera de la ruta de
+        # las solicitudes de matrícula (apps.core.utils.reservar_codigos_matricula)
+        if connection.vendor == 'postgresql' and self.fecha_inicio:
+            from apps.core.utils import crear_secuencia_codigos
+            anio = self.fecha_inicio.year
+            transaction.on_commit(lambda: crear_secuencia_codigos(anio))
 
     @property
     def matriculas_abiertas(self):
@@ -89,7 +115,85 @@ class PeriodoAcademico(TimeStampedModel):
 
     @property
     def puede_matricular(self):
-        return self.matriculas_abiertas or self.matriculas_extraordinarias_abiertas
+        """Hay al menos un nivel del período que puede matricular ahora."""
+        if self.matriculas_extraordinarias_abiertas:
+            return True
+        if not self.matriculas_abiertas:
+            return False
+        if not self.calendario_ventanas()['tramos']:
+            return True
+        return bool(self.niveles_habilitados())
+
+    # ─── Ventanas escalonadas por nivel ──────────────────────────────────────
+    def calendario_ventanas(self):
+        """
+        {'tramos': {nivel_id: [(fecha_inicio, fecha_fin, hora_inicio, hora_fin)]},
+         'niveles': [nivel_id de los paralelos del período]}
+
+        Las ventanas de un nivel prevalecen sobre las de su subnivel; un
+        nivel sin ventanas usa la ventana general del período. Se cachea
+        por CACHE_VENTANAS_TTL y se invalida al guardar ventanas, niveles
+        o paralelos (ver CACHE_VENTANAS).
+        """
+        clave      = CACHE_VENTANAS.format(self.pk, self.updated_at.timestamp())
+        calendario = cache.get(clave)
+        if calendario is None:
+            por_nivel, por_subnivel = defaultdict(list), defaultdict(list)
+            for nivel_id, subnivel, *tramo in self.ventanas.filter(is_active=True).values_list(
+                'nivel_id', 'subnivel', 'fecha_inicio', 'fecha_fin', 'hora_inicio', 'hora_fin',
+            ):
+                if nivel_id:
+                    por_nivel[nivel_id].append(tuple(tramo))
+                else:
+                    por_subnivel[subnivel].append(tuple(tramo))
+
+            tramos = {}
+            if por_subnivel:
+                for nivel_id, subnivel in Nivel.objects.values_list('pk', 'subnivel'):
+                    if subnivel in por_subnivel:
+                        tramos[nivel_id] = por_subnivel[subnivel]
+            tramos.update(por_nivel)
+
+            calendario = {
+                'tramos':  tramos,
+                'niveles': list(self.paralelos.values_list('nivel_id', flat=True).distinct()),
+            }
+            cache.set(clave, calendario, CACHE_VENTANAS_TTL)
+        return calendario
+
+    def nivel_habilitado(self, nivel_id, momento=None):
+        """¿Puede matricularse ahora un estudiante en este nivel?"""
+        if self.matriculas_extraordinarias_abiertas:
+            return True
+        if not self.matriculas_abiertas:
+            return False
+        tramos = self.calendario_ventanas()['tramos'].get(nivel_id)
+        if tramos is None:
+            return True
+        momento = timezone.localtime(momento)
+        return any(_tramo_abierto(tramo, momento) for tramo in tramos)
+
+    def niveles_habilitados(self, momento=None):
+        """Niveles (con paralelos en el período) que pueden matricular ahora."""
+        return {
+            nivel_id for nivel_id in self.calendario_ventanas()['niveles']
+            if self.nivel_habilitado(nivel_id, momento)
+        }
+
+    def proxima_apertura(self, nivel_id, momento=None):
+        """Próximo inicio de ventana del nivel (datetime local) o None."""
+        momento = timezone.localtime(momento)
+        candidatos = []
+        for fecha_inicio, fecha_fin, hora_inicio, hora_fin in \
+                self.calendario_ventanas()['tramos'].get(nivel_id, []):
+            dia = max(fecha_inicio, momento.date())
+            if dia == momento.date() and momento.time() >= (hora_fin or time.max):
+                dia += timedelta(days=1)
+            if dia > fecha_fin:
+                continue
+            inicio = timezone.make_aware(datetime.combine(dia, hora_inicio or time.min))
+            candidatos.append(max(inicio, momento))
+        return min(candidatos, default=None)
 
     @classmethod
     def get_activo(cls):
@@ -97,6 +201,14 @@ class PeriodoAcademico(TimeStampedModel):
         return cls.objects.filter(es_activo=True, is_active=True).first()
 
 
+def _tramo_abierto(tramo, momento):
+    fecha_inicio, fecha_fin, hora_inicio, hora_fin = tramo
+    if not fecha_inicio <= momento.date() <= fecha_fin:
+        return False
+    ahora = momento.time()
+    return (hora_inicio is None or ahora >= hora_inicio) and (hora_fin is None or ahora < hora_fin)
+
+
 class Nivel(TimeStampedModel):
     """
     Grado o curso educativo.
@@ -134,6 +246,29 @@ class Nivel(TimeStampedModel):
     def __str__(self):
         return self.nombre
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Las ventanas por subnivel dependen del subnivel de cada nivel
+        invalidar_calendario()
+
+
+class ParaleloQuerySet(models.QuerySet):
+
+    def con_ocupacion(self):
+        """
+        Anota `total_aprobados` en la misma consulta: las propiedades de
+        cupo lo usan en lugar de contar las matrículas de cada paralelo.
+        """
+        from apps.matriculas.models import Matricula
+        return self.annotate(total_aprobados=models.Count(
+            'matriculas',
+            filter=models.Q(matriculas__estado=Matricula.ESTADO_APROBADA,
+                            matriculas__is_active=True),
+        ))
+
+    def con_cupo(self):
+        return self.con_ocupacion().filter(total_aprobados__lt=models.F('cupo_maximo'))
+
 
 class Paralelo(TimeStampedModel):
     """
@@ -160,6 +295,8 @@ class Paralelo(TimeStampedModel):
                                     verbose_name='Jornada')
     observaciones = models.TextField(blank=True, verbose_name='Observaciones')
 
+    objects = ParaleloQuerySet.as_manager()
+
     class Meta:
         verbose_name        = 'Paralelo'
         verbose_name_plural = 'Paralelos'
@@ -169,9 +306,20 @@ class Paralelo(TimeStampedModel):
     def __str__(self):
         return f'{self.nivel} - Paralelo {self.nombre} ({self.periodo})'
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidar_calendario([self.periodo_id])
+        # Mantener la copia desnormalizada Matricula.periodo
+        from apps.matriculas.models import Matricula
+        Matricula.objects.filter(paralelo=self).exclude(
+            periodo_id=self.periodo_id
+        ).update(periodo_id=self.periodo_id)
+
     @property
     def matriculados_aprobados(self):
         """Número de estudiantes con matrícula APROBADA en este paralelo."""
+        if hasattr(self, 'total_aprobados'):    # ParaleloQuerySet.con_ocupacion
+            return self.total_aprobados
         from apps.matriculas.models import Matricula
         return Matricula.objects.filter(
             paralelo=self,
@@ -191,4 +339,64 @@ class Paralelo(TimeStampedModel):
     def porcentaje_ocupacion(self):
         if self.cupo_maximo == 0:
             return 0
-        return round((self.matriculados_aprobados / self.cupo_maximo) * 100, 1)
\ No newline at end of file
+        return round((self.matriculados_aprobados / self.cupo_maximo) * 100, 1)
+
+class VentanaMatricula(TimeStampedModel):
+    """
+    Ventana de matrícula escalonada para un nivel o un subnivel completo,
+    dentro de la ventana ordinaria del período. Opcionalmente restringida
+    a una franja horaria diaria. Un nivel sin ventanas usa la del período.
+    """
+    periodo     = models.ForeignKey(PeriodoAcademico, on_delete=models.CASCADE,
+                                    related_name='ventanas',
+                                    verbose_name='Período académico')
+    nivel       = models.ForeignKey(Nivel, on_delete=models.CASCADE, null=True, blank=True,
+                                    related_name='ventanas',
+                                    verbose_name='Nivel',
+                                    help_text='Deje vacío para aplicar a todo el subnivel')
+    subnivel    = models.CharField(max_length=20, choices=Nivel.SUBNIVELES, blank=True,
+                                   verbose_name='Sub-nivel educativo')
+    fecha_inicio = models.DateField(verbose_name='Desde')
+    fecha_fin    = models.DateField(verbose_name='Hasta')
+    hora_inicio  = models.TimeField(null=True, blank=True, verbose_name='Hora de apertura',
+                                    help_text='Opcional: franja diaria')
+    hora_fin     = models.TimeField(null=True, blank=True, verbose_name='Hora de cierre')
+
+    class Meta:
+        verbose_name        = 'Ventana de matrícula'
+        verbose_name_plural = 'Ventanas de matrícula'
+        ordering            = ['periodo', 'fecha_inicio', 'hora_inicio']
+        constraints = [
+            models.CheckConstraint(
+                check=(models.Q(nivel__isnull=False, subnivel='')
+                       | models.Q(nivel__isnull=True) & ~models.Q(subnivel='')),
+                name='ventana_nivel_o_subnivel',
+                violation_error_message='Indique un nivel o un subnivel, no ambos.',
+            ),
+        ]
+
+    def __str__(self):
+        destino = self.nivel or self.get_subnivel_display()
+        return f'{destino}: {self.fecha_inicio:%d/%m} - {self.fecha_fin:%d/%m} ({self.periodo})'
+
+    def clean(self):
+        if self.fecha_inicio and self.fecha_fin and self.fecha_inicio > self.fecha_fin:
+            raise ValidationError('La fecha de inicio de la ventana debe ser anterior al fin.')
+        if self.hora_inicio and self.hora_fin and self.hora_inicio >= self.hora_fin:
+            raise ValidationError('La hora de apertura debe ser anterior a la de cierre.')
+        periodo = self.periodo if self.periodo_id else None
+        if periodo and self.fecha_inicio and self.fecha_fin and not (
+            periodo.fecha_inicio_matriculas <= self.fecha_inicio
+            and self.fecha_fin <= periodo.fecha_fin_matriculas
+        ):
+            raise ValidationError('La ventana debe estar dentro del período de matrículas ordinarias.')
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidar_calendario([self.periodo_id])
+
+    def delete(self, *args, **kwargs):
+        periodo_id = self.periodo_id
+        resultado = super().delete(*args, **kwargs)
+        invalidar_calendario([periodo_id])
+        return resultado
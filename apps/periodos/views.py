@@ -8,6 +8,7 @@ from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.db.models import Count
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.views.generic import (
     ListView, DetailView, CreateView, UpdateView, DeleteView
 )
@@ -248,12 +249,15 @@ try:
     from rest_framework.decorators import action
     from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
     from rest_framework.response import Response
+    from apps.core.api import RespuestaCondicionalMixin
+    from apps.core.utils import sello_queryset
+    from apps.matriculas.models import Matricula
     from .serializers import (
         PeriodoAcademicoSerializer, NivelSerializer,
         ParaleloSerializer, ParaleloDetalleSerializer,
     )
 
-    class PeriodoAcademicoViewSet(viewsets.ModelViewSet):
+    class PeriodoAcademicoViewSet(RespuestaCondicionalMixin, viewsets.ModelViewSet):
         queryset           = PeriodoAcademico.objects.all()
         serializer_class   = PeriodoAcademicoSerializer
         permission_classes = [IsAuthenticated]
@@ -261,28 +265,46 @@ try:
         search_fields      = ['nombre']
         ordering_fields    = ['fecha_inicio', 'nombre']
 
+        def validador_condicional(self, queryset):
+            # matriculas_abiertas / puede_matricular dependen de la fecha
+            return super().validador_condicional(queryset) + [timezone.localdate()]
+
         @action(detail=False, methods=['get'])
         def activo(self, request):
-            periodo = PeriodoAcademico.get_activo()
-            if not periodo:
-                return Response({'detail': 'No hay período activo.'}, status=404)
-            return Response(PeriodoAcademicoSerializer(periodo, context={'request': request}).data)
+            def construir():
+                periodo = PeriodoAcademico.get_activo()
+                if not periodo:
+                    return Response({'detail': 'No hay período activo.'}, status=404)
+                return Response(PeriodoAcademicoSerializer(periodo, context={'request': request}).data)
+
+            validador = self.validador_condicional(PeriodoAcademico.objects.filter(es_activo=True))
+            return self.responder_condicional(request, validador, construir)
 
         @action(detail=True, methods=['get'])
         def paralelos(self, request, pk=None):
-            periodo    = self.get_object()
-            qs         = periodo.paralelos.select_related('nivel').order_by('nivel__orden', 'nombre')
-            serializer = ParaleloDetalleSerializer(qs, many=True, context={'request': request})
-            return Response(serializer.data)
-
-    class NivelViewSet(viewsets.ModelViewSet):
+            def construir():
+                periodo    = self.get_object()
+                qs         = periodo.paralelos.select_related('nivel').order_by('nivel__orden', 'nombre')
+                serializer = ParaleloDetalleSerializer(qs, many=True, context={'request': request})
+                return Response(serializer.data)
+
+            # El cupo depende de las matrículas del período
+            validador = [
+                sello_queryset(Paralelo.objects.filter(periodo_id=pk)),
+                sello_queryset(Matricula.objects.filter(periodo_id=pk)),
+                sello_queryset(Nivel.objects.all()),
+            ]
+            return self.responder_condicional(request, validador, construir)
+
+    class NivelViewSet(RespuestaCondicionalMixin, viewsets.ModelViewSet):
         queryset           = Nivel.objects.all()
         serializer_class   = NivelSerializer
         permission_classes = [IsAuthenticated]
 
-    class ParaleloViewSet(viewsets.ModelViewSet):
-        queryset           = Paralelo.objects.select_related('periodo', 'nivel').all()
-        permission_classes = [IsAuthenticated]
+    class ParaleloViewSet(RespuestaCondicionalMixin, viewsets.ModelViewSet):
+        queryset             = Paralelo.objects.select_related('periodo', 'nivel').all()
+        permission_classes   = [IsAuthenticated]
+        modelos_relacionados = (PeriodoAcademico, Nivel)
 
         def get_serializer_class(self):
             if self.action in ('retrieve', 'con_cupo'):
@@ -296,15 +318,28 @@ try:
                 qs = qs.filter(periodo_id=periodo_id)
             return qs
 
+        def validador_condicional(self, queryset):
+            validador = super().validador_condicional(queryset)
+            if self.action in ('retrieve', 'con_cupo'):
+                # El detalle incluye el cupo, que depende de las matrículas aprobadas
+                paralelos = queryset.values('pk')
+                validador.append(sello_queryset(Matricula.objects.filter(paralelo__in=paralelos)))
+            return validador
+
         @action(detail=False, methods=['get'], url_path='con-cupo')
         def con_cupo(self, request):
             activo = PeriodoAcademico.get_activo()
             if not activo:
                 return Response({'detail': 'No hay período activo.'}, status=404)
-            paralelos  = self.get_queryset().filter(periodo=activo)
-            con_cupo   = [p for p in paralelos if not p.cupo_lleno]
-            serializer = ParaleloDetalleSerializer(con_cupo, many=True, context={'request': request})
-            return Response(serializer.data)
+
+            def construir():
+                # El cupo se cuenta en la misma consulta, no una vez por paralelo
+                con_cupo   = self.get_queryset().filter(periodo=activo).con_cupo()
+                serializer = ParaleloDetalleSerializer(con_cupo, many=True, context={'request': request})
+                return Response(serializer.data)
+
+            validador = self.validador_condicional(self.get_queryset().filter(periodo=activo))
+            return self.responder_condicional(request, validador, construir)
 
 except ImportError:
     pass
\ No newline at end of file
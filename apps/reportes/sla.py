@@ -0,0 +1,197 @@
+"""
+============================================================
+  SLA: apps.reportes
+  Tiempos del proceso de matrícula calculados en SQL
+============================================================
+
+Todo se agrega en PostgreSQL sobre HistorialMatricula: cada transición
+cierra un tramo en `estado_anterior`, cuya duración es la distancia a la
+transición previa de la misma matrícula (LAG sobre la ventana por
+matrícula; el primer tramo empieza en fecha_solicitud). Los percentiles
+salen de percentile_cont. Nada se carga fila por fila en Python.
+
+El resultado por período se guarda en caché (SLA_TTL segundos; los
+períodos ya cerrados, un día).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from apps.core import metricas
+from apps.core.catalogos import NIVELES
+from apps.matriculas.models import HistorialMatricula, Matricula
+from apps.periodos.models import Paralelo
+from apps.usuarios.models import Usuario
+
+CACHE_SLA          = 'reportes:sla:{}'
+SLA_TTL            = 600
+SLA_TTL_CERRADO    = 24 * 3600
+
+# Tramos cerrados de cada matrícula del período: estado, quién lo cerró y duración
+_TRAMOS = f"""
+    WITH tramos AS (
+        SELECT h.matricula_id,
+               h.usuario_id,
+               h.estado_anterior AS estado,
+               h.estado_nuevo,
+               EXTRACT(EPOCH FROM h.fecha - COALESCE(
+                   LAG(h.fecha) OVER (PARTITION BY h.matricula_id ORDER BY h.fecha, h.id),
+                   m.fecha_solicitud
+               )) / 3600.0 AS horas
+        FROM {HistorialMatricula._meta.db_table} h
+        JOIN {Matricula._meta.db_table} m ON m.id = h.matricula_id
+        WHERE m.periodo_id = %(periodo)s
+    )
+"""
+
+_PERCENTILES = """
+    COUNT(*),
+    AVG({col}),
+    PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY {col}),
+    PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY {col})
+"""
+
+SQL_TIEMPO_EN_ESTADO = _TRAMOS + f"""
+    SELECT estado, {_PERCENTILES.format(col='horas')}
+    FROM tramos
+    GROUP BY estado
+"""
+
+# Revisiones cerradas (EN_REVISION → APROBADA/RECHAZADA) por quien las resolvió
+SQL_POR_SECRETARIA = _TRAMOS + f"""
+    SELECT usuario_id,
+           COUNT(*) FILTER (WHERE estado_nuevo = 'APROBADA'),
+           COUNT(*) FILTER (WHERE estado_nuevo = 'RECHAZADA'),
+           {_PERCENTILES.format(col='horas')}
+    FROM tramos
+    WHERE estado = 'EN_REVISION'
+    GROUP BY usuario_id
+"""
+
+# Espera hasta la primera revisión: total, por nivel y por día de solicitud
+SQL_PRIMERA_REVISION = f"""
+    WITH primera AS (
+        SELECT DISTINCT ON (h.matricula_id)
+               p.nivel_id,
+               (m.fecha_solicitud AT TIME ZONE %(zona)s)::date AS dia,
+               EXTRACT(EPOCH FROM h.fecha - m.fecha_solicitud) / 3600.0 AS horas
+        FROM {HistorialMatricula._meta.db_table} h
+        JOIN {Matricula._meta.db_table} m ON m.id = h.matricula_id
+        JOIN {Paralelo._meta.db_table} p   ON p.id = m.paralelo_id
+        WHERE m.periodo_id = %(periodo)s AND h.estado_nuevo = 'EN_REVISION'
+        ORDER BY h.matricula_id, h.fecha, h.id
+    )
+    SELECT GROUPING(nivel_id, dia), nivel_id, dia, {_PERCENTILES.format(col='horas')}
+    FROM primera
+    GROUP BY GROUPING SETS ((), (nivel_id), (dia))
+"""
+
+# Vueltas de rechazo por matrícula (0 = nunca rechazada)
+SQL_CICLOS_RECHAZO = f"""
+    SELECT rechazos, COUNT(*)
+    FROM (
+        SELECT m.id, COUNT(h.id) AS rechazos
+        FROM {Matricula._meta.db_table} m
+        LEFT JOIN {HistorialMatricula._meta.db_table} h
+               ON h.matricula_id = m.id AND h.estado_nuevo = 'RECHAZADA'
+        WHERE m.periodo_id = %(periodo)s
+        GROUP BY m.id
+    ) por_matricula
+    GROUP BY rechazos
+    ORDER BY rechazos
+"""
+
+
+def _consultar(sql, **parametros):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, parametros)
+        return cursor.fetchall()
+
+
+def _redondear(horas):
+    return round(float(horas), 1) if horas is not None else None
+
+
+def _metricas(n, promedio, p50, p90):
+    return {'n': n, 'promedio_h': _redondear(promedio),
+            'p50_h': _redondear(p50), 'p90_h': _redondear(p90)}
+
+
+def calcular_sla(periodo):
+    """Métricas de tiempos del período (sin caché)."""
+    base = {'periodo': periodo.pk}
+
+    tiempo_en_estado = [
+        {'estado': estado, **_metricas(*resto)}
+        for estado, *resto in _consultar(SQL_TIEMPO_EN_ESTADO, **base)
+    ]
+
+    filas = _consultar(SQL_POR_SECRETARIA, **base)
+    nombres = {u.pk: u.get_full_name() or u.username
+               for u in Usuario.objects.filter(pk__in=[f[0] for f in filas if f[0]])}
+    por_secretaria = sorted((
+        {'usuario': usuario_id, 'nombre': nombres.get(usuario_id, '—'),
+         'aprobadas': aprobadas, 'rechazadas': rechazadas, **_metricas(*resto)}
+        for usuario_id, aprobadas, rechazadas, *resto in filas
+    ), key=lambda x: -x['n'])
+
+    primera = {'total': _metricas(0, None, None, None), 'por_nivel': [], 'por_dia': []}
+    niveles = {n.pk: n.nombre for n in NIVELES.todos()}
+    for agrupacion, nivel_id, dia, *resto in _consultar(
+            SQL_PRIMERA_REVISION, zona=settings.TIME_ZONE, **base):
+        # GROUPING(nivel_id, dia): 3 = total, 1 = por nivel, 2 = por día
+        if agrupacion == 3:
+            primera['total'] = _metricas(*resto)
+        elif agrupacion == 1:
+            primera['por_nivel'].append({'nivel': nivel_id, 'nombre': niveles.get(nivel_id),
+                                         **_metricas(*resto)})
+        else:
+            primera['por_dia'].append({'dia': dia.isoformat(), **_metricas(*resto)})
+    primera['por_nivel'].sort(key=lambda x: x['nombre'] or '')
+    primera['por_dia'].sort(key=lambda x: x['dia'])
+
+    distribucion = dict(_consultar(SQL_CICLOS_RECHAZO, **base))
+    total = sum(distribucion.values())
+    ciclos_rechazo = {
+        'distribucion': distribucion,
+        'promedio':     round(sum(k * v for k, v in distribucion.items()) / total, 2) if total else None,
+        'maximo':       max(distribucion, default=None),
+    }
+
+    return {
+        'periodo':          periodo.pk,
+        'generado':         timezone.now().isoformat(),
+        'tiempo_en_estado': tiempo_en_estado,
+        'primera_revision': primera,
+        'por_secretaria':   por_secretaria,
+        'ciclos_rechazo':   ciclos_rechazo,
+    }
+
+
+def sla_periodo(periodo):
+    """calcular_sla con caché por período."""
+    clave = CACHE_SLA.format(periodo.pk)
+    datos = cache.get(clave)
+    metricas.cache_consultada('sla', datos is not None)
+    if datos is None:
+        datos = calcular_sla(periodo)
+        cerrado = periodo.fecha_fin < timezone.localdate()
+        cache.set(clave, datos, SLA_TTL_CERRADO if cerrado else SLA_TTL)
+    return datos
+
+
+def revisiones_estancadas(periodo, dias, limite=50):
+    """Solicitudes que llevan más de `dias` días en revisión (sin caché: es la alerta)."""
+    qs = Matricula.objects.filter(periodo=periodo).estancadas_en_revision(dias)
+    ahora = timezone.now()
+    return {
+        'dias':  dias,
+        'total': qs.count(),
+        'matriculas': [
+            {'pk': pk, 'codigo': codigo, 'revisado_por': revisor,
+             'dias_en_revision': (ahora - fecha).days}
+            for pk, codigo, revisor, fecha in qs.values_list(
+                'pk', 'codigo', 'revisado_por__username', 'fecha_revision')[:limite]
+        ],
+    }
@@ -6,4 +6,5 @@ app_name = 'reportes'
 urlpatterns = [
     path('', views.dashboard_reportes, name='dashboard'),
     path('matriculados/', views.reporte_matriculados, name='matriculados'),
+    path('api/sla/', views.sla_json, name='sla'),
 ]
@@ -1,12 +1,16 @@
 ﻿"""
 Reportes, estadÃ­sticas y exportaciÃ³n de datos
 """
-from django.shortcuts import render
+from django.shortcuts import get_object_or_404, render
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from apps.matriculas.models import Matricula
 from apps.periodos.models import PeriodoAcademico, Paralelo
 
+from .sla import revisiones_estancadas, sla_periodo
+
+DIAS_REVISION_ESTANCADA = 3
+
 
 @login_required
 def dashboard_reportes(request):
@@ -15,7 +19,7 @@ def dashboard_reportes(request):
 
     stats = {}
     if periodo_activo:
-        matriculas = Matricula.objects.filter(paralelo__periodo=periodo_activo)
+        matriculas = Matricula.objects.filter(periodo=periodo_activo)
         stats = {
             'total': matriculas.count(),
             'aprobadas': matriculas.filter(estado=Matricula.ESTADO_APROBADA).count(),
@@ -42,3 +46,32 @@ def reporte_matriculados(request):
         'periodo': periodo_activo,
         'paralelos': paralelos,
     })
+
+
+@login_required
+def sla_json(request):
+    """
+    Tiempos del proceso (por estado, secretaría, nivel y día) y alerta de
+    revisiones estancadas. Parámetros: ?periodo=<id>&dias=<n>.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+    try:
+        dias = int(request.GET.get('dias', DIAS_REVISION_ESTANCADA))
+    except ValueError:
+        return JsonResponse({'error': 'dias debe ser un entero'}, status=400)
+    if request.GET.get('periodo'):
+        try:
+            periodo_id = int(request.GET['periodo'])
+        except ValueError:
+            return JsonResponse({'error': 'periodo debe ser un entero'}, status=400)
+        periodo = get_object_or_404(PeriodoAcademico, pk=periodo_id)
+    else:
+        periodo = PeriodoAcademico.objects.filter(es_activo=True).first()
+        if periodo is None:
+            return JsonResponse({'error': 'No hay período activo'}, status=404)
+
+    return JsonResponse({
+        **sla_periodo(periodo),
+        'estancadas': revisiones_estancadas(periodo, max(dias, 0)),
+    })
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0002_usuario_ciudad_usuario_sector_usuario_telefono_alt_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='notificaciones_sin_leer',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Notificaciones sin leer'),
+        ),
+    ]
@@ -75,6 +75,12 @@ class Usuario(AbstractUser):
     ultimo_acceso_ip     = models.GenericIPAddressField(blank=True, null=True,
                                                         verbose_name='Última IP de acceso')
 
+    # ─── Notificaciones ──────────────────────────────────────────────────────
+    # Contador desnormalizado: lo mantiene Notificacion en la misma transacción
+    # y el context processor lo lee de request.user sin consultas adicionales
+    notificaciones_sin_leer = models.PositiveIntegerField(default=0, editable=False,
+                                                          verbose_name='Notificaciones sin leer')
+
     class Meta:
         verbose_name        = 'Usuario'
         verbose_name_plural = 'Usuarios'
@@ -392,12 +392,9 @@ class DashboardAdminView(LoginRequiredMixin, TemplateView):
         periodo_activo  = PeriodoAcademico.get_activo()
         ctx['periodo']  = periodo_activo
         if periodo_activo:
-            matriculas = Matricula.objects.filter(paralelo__periodo=periodo_activo)
-            ctx['total_matriculas']     = matriculas.count()
-            ctx['pendientes']           = matriculas.filter(estado=Matricula.ESTADO_PENDIENTE).count()
-            ctx['en_revision']          = matriculas.filter(estado=Matricula.ESTADO_EN_REVISION).count()
-            ctx['aprobadas']            = matriculas.filter(estado=Matricula.ESTADO_APROBADA).count()
-            ctx['rechazadas']           = matriculas.filter(estado=Matricula.ESTADO_RECHAZADA).count()
+            from apps.matriculas.views import conteo_por_estado
+            ctx.update(conteo_por_estado(periodo_activo.pk))
+            ctx['total_matriculas']     = Matricula.objects.filter(periodo=periodo_activo).count()
         ctx['total_usuarios']       = Usuario.objects.filter(is_active=True).count()
         ctx['total_representantes'] = Usuario.objects.filter(rol=Usuario.ROL_REPRESENTANTE).count()
         return ctx
@@ -0,0 +1,15 @@
+"""
+============================================================
+  BENCHMARKS: rutas críticas de SFQ Matrículas
+============================================================
+
+Mide latencia (p50/p95/p99) y consultas por petición de las vistas más
+usadas sobre datos sintéticos (generar_datos_sinteticos) a varias
+escalas, y compara el resultado con benchmarks/linea_base.json:
+
+    python -m benchmarks.ejecutar --escalas 1000,5000
+    python -m benchmarks.ejecutar --escalas 1000,5000 --guardar-linea-base
+
+Cada escala usa una base de pruebas recién migrada (test_<DB_NAME>) que
+se elimina al terminar; la base de desarrollo no se toca.
+"""
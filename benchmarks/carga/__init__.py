@@ -0,0 +1,34 @@
+"""
+============================================================
+  CARGA: simulación del día de matrículas
+============================================================
+
+Generador de carga de lazo abierto contra un servidor en marcha: las
+sesiones llegan como procesos de Poisson independientes, con la tasa
+configurada para cada perfil, y no esperan a que terminen las anteriores
+(así la cola que se forma en el servidor se ve en la latencia, en lugar
+de frenar al generador).
+
+Perfiles:
+
+  registro     RegistroView, login y tablero del representante nuevo.
+  padre        Login, formulario de matrícula, solicitud, subida de los
+               documentos que pide la matrícula y sondeo del estado
+               (GET condicional con ETag, como el navegador).
+  secretaria   Login, cola de PENDIENTES, detalle, iniciar revisión,
+               documentos y aprobación de algunas solicitudes.
+
+1. Preparar la base (el período activo, cuentas con un estudiante sin
+   matrícula, secretarias) con el mismo settings que el servidor:
+
+    python -m benchmarks.carga preparar --padres 2000 --secretarias 10 --abrir-ventana
+
+2. Levantar el servidor a medir (gunicorn, runserver...) y lanzar:
+
+    python -m benchmarks.carga ejecutar --url http://127.0.0.1:8000 \\
+        --duracion 600 --tasa-padres 2 --tasa-registros 0.3 --tasa-secretarias 0.2
+
+El paso 2 usa solo la biblioteca estándar: puede correr desde otra
+máquina. Informa cada 10 s y al final: peticiones por segundo, p50/p95/
+p99 por paso, errores por código y flujos completos o interrumpidos.
+"""
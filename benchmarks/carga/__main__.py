@@ -0,0 +1,116 @@
+"""
+Uso:
+    python -m benchmarks.carga preparar [--padres 2000] [--secretarias 10]
+        [--clave sinteticos] [--abrir-ventana] [--forzar]
+
+    python -m benchmarks.carga ejecutar --url http://127.0.0.1:8000
+        [--duracion 300] [--rampa 30] [--tasa-padres 1] [--tasa-registros 0.2]
+        [--tasa-secretarias 0.1] [--cuentas-padres 2000] [--cuentas-secretarias 10]
+        [--pensar 3] [--sondeos 3] [--intervalo-sondeo 5] [--revisiones 3]
+        [--panel /matriculas/?estado=PENDIENTE] [--max-usuarios 500]
+        [--timeout 30] [--semilla N] [--salida resultado.json]
+
+Las tasas son llegadas de sesiones por segundo. Con --pensar 3 y el resto
+por defecto, una sesión de padre dura ~1 minuto y hace ~15 peticiones.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from .flujos import PERFILES, Contexto
+from .motor import Generador
+
+
+def _preparar(args):
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+    import django
+    django.setup()
+    from .preparar import preparar
+    preparar(args)
+
+
+def _informar(segundos, generador):
+    peticiones, errores = generador.estadisticas.total()
+    print(f'  {segundos:6.0f} s  {peticiones:7d} peticiones  {errores:5d} errores  '
+          f'{generador.en_curso:4d} sesiones en curso', flush=True)
+
+
+def _ejecutar(args):
+    tasas = {'padre': args.tasa_padres, 'registro': args.tasa_registros,
+             'secretaria': args.tasa_secretarias}
+    generador = Generador(args.url, PERFILES, Contexto(args), args.duracion, args.rampa,
+                          args.max_usuarios, args.semilla, args.timeout)
+    print(f'Carga contra {args.url} durante {args.duracion} s: '
+          + ', '.join(f'{p} {t}/s' for p, t in tasas.items()))
+    resumen = generador.ejecutar(tasas, informar=_informar)
+
+    print(f'\n{resumen["peticiones"]} peticiones en {resumen["segundos"]} s '
+          f'({resumen["por_segundo"]}/s), {resumen["errores"]} errores '
+          f'({resumen["tasa_error"]:.2%}); p50 {resumen["p50_ms"]} ms, '
+          f'p95 {resumen["p95_ms"]} ms, p99 {resumen["p99_ms"]} ms\n')
+    print(f'  {"paso":<22} {"n":>7} {"err":>5} {"p50":>8} {"p95":>8} {"p99":>8} {"max":>8}')
+    for paso, d in resumen['pasos'].items():
+        print(f'  {paso:<22} {d["peticiones"]:>7} {d["errores"]:>5} {d["p50_ms"]:>8} '
+              f'{d["p95_ms"]:>8} {d["p99_ms"]:>8} {d["max_ms"]:>8}')
+    print(f'\n  Flujos: {resumen["flujos"]}')
+    if resumen['motivos']:
+        print('  Interrupciones más frecuentes:')
+        for motivo, n in resumen['motivos'].items():
+            print(f'    {n:5d}  {motivo}')
+    if resumen['descartadas']:
+        print(f'  Llegadas descartadas por --max-usuarios: {resumen["descartadas"]}')
+
+    if args.salida:
+        resumen['parametros'] = {k: v for k, v in vars(args).items() if k != 'funcion'}
+        Path(args.salida).write_text(json.dumps(resumen, indent=2, ensure_ascii=False) + '\n',
+                                     encoding='utf-8')
+        print(f'\nResultado en {args.salida}')
+    return 1 if resumen['peticiones'] == 0 else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.carga',
+                                     description='Simulación de carga del día de matrículas.')
+    sub = parser.add_subparsers(required=True)
+
+    p = sub.add_parser('preparar', help='Crea las cuentas de prueba (requiere Django).')
+    p.add_argument('--padres', type=int, default=2000)
+    p.add_argument('--secretarias', type=int, default=10)
+    p.add_argument('--clave', default='sinteticos')
+    p.add_argument('--abrir-ventana', action='store_true',
+                   help='Abre las matrículas del período activo por 7 días si están cerradas.')
+    p.add_argument('--forzar', action='store_true', help='Permite correr con DEBUG=False.')
+    p.set_defaults(funcion=_preparar)
+
+    e = sub.add_parser('ejecutar', help='Lanza la carga contra un servidor en marcha.')
+    e.add_argument('--url', required=True)
+    e.add_argument('--duracion', type=float, default=300, help='Segundos de llegadas.')
+    e.add_argument('--rampa', type=float, default=30, help='Segundos de subida lineal.')
+    e.add_argument('--tasa-padres', type=float, default=1.0)
+    e.add_argument('--tasa-registros', type=float, default=0.2)
+    e.add_argument('--tasa-secretarias', type=float, default=0.1)
+    e.add_argument('--cuentas-padres', type=int, default=2000)
+    e.add_argument('--cuentas-secretarias', type=int, default=10)
+    e.add_argument('--clave', default='sinteticos')
+    e.add_argument('--pensar', type=float, default=3, help='Media del tiempo entre pasos (s).')
+    e.add_argument('--sondeos', type=int, default=3)
+    e.add_argument('--intervalo-sondeo', type=float, default=5)
+    e.add_argument('--revisiones', type=int, default=3,
+                   help='Solicitudes que aprueba cada sesión de secretaría.')
+    # PanelSecretariaView comparte el queryset con la lista del personal
+    e.add_argument('--panel', default='/matriculas/?estado=PENDIENTE')
+    e.add_argument('--max-usuarios', type=int, default=500)
+    e.add_argument('--timeout', type=float, default=30)
+    e.add_argument('--semilla', type=int)
+    e.add_argument('--salida')
+    e.set_defaults(funcion=_ejecutar)
+
+    args = parser.parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
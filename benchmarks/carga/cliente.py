@@ -0,0 +1,91 @@
+"""
+============================================================
+  CARGA: sesión HTTP de un usuario virtual
+============================================================
+
+Cookies propias (sesión y CSRF), sin seguir redirecciones: un 302 tras un
+POST es la respuesta esperada y su Location se usa en el paso siguiente.
+Cada petición se registra en Estadisticas con su etiqueta.
+"""
+import http.cookiejar
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import namedtuple
+
+Respuesta = namedtuple('Respuesta', 'estado cuerpo cabeceras')
+
+
+class FlujoInterrumpido(Exception):
+    """Un paso falló: el resto del flujo no tiene sentido."""
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Sesion:
+
+    def __init__(self, base, estadisticas, timeout=30):
+        self.base         = base.rstrip('/')
+        self.estadisticas = estadisticas
+        self.timeout      = timeout
+        self.cookies      = http.cookiejar.CookieJar()
+        self.opener       = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SinRedirecciones)
+
+    @property
+    def csrf(self):
+        return next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+
+    def get(self, etiqueta, ruta, cabeceras=None, esperados=(200,)):
+        return self._pedir(etiqueta, 'GET', ruta, None, cabeceras or {}, esperados)
+
+    def post(self, etiqueta, ruta, datos=None, archivos=None, esperados=(302,)):
+        datos = {'csrfmiddlewaretoken': self.csrf, **(datos or {})}
+        cabeceras = {'X-CSRFToken': self.csrf, 'Referer': self.base + ruta}
+        if archivos:
+            cuerpo, tipo = _multipart(datos, archivos)
+        else:
+            cuerpo, tipo = urllib.parse.urlencode(datos).encode(), 'application/x-www-form-urlencoded'
+        cabeceras['Content-Type'] = tipo
+        return self._pedir(etiqueta, 'POST', ruta, cuerpo, cabeceras, esperados)
+
+    def _pedir(self, etiqueta, metodo, ruta, cuerpo, cabeceras, esperados):
+        peticion = urllib.request.Request(self.base + ruta, data=cuerpo, method=metodo,
+                                          headers=cabeceras)
+        inicio = time.perf_counter()
+        try:
+            with self.opener.open(peticion, timeout=self.timeout) as r:
+                respuesta = Respuesta(r.status, r.read(), r.headers)
+        except urllib.error.HTTPError as e:
+            respuesta = Respuesta(e.code, e.read(), e.headers)
+        except (urllib.error.URLError, OSError) as e:
+            self.estadisticas.registrar(etiqueta, time.perf_counter() - inicio, 0)
+            raise FlujoInterrumpido(f'{etiqueta}: {e}') from e
+        self.estadisticas.registrar(etiqueta, time.perf_counter() - inicio, respuesta.estado,
+                                    error=respuesta.estado not in esperados)
+        if respuesta.estado not in esperados:
+            raise FlujoInterrumpido(f'{etiqueta}: HTTP {respuesta.estado}')
+        return respuesta
+
+    def ubicacion(self, respuesta):
+        """Ruta del Location de una redirección."""
+        return urllib.parse.urlsplit(respuesta.cabeceras.get('Location', '')).path
+
+
+def _multipart(datos, archivos):
+    limite = uuid.uuid4().hex
+    partes = []
+    for nombre, valor in datos.items():
+        partes.append(f'--{limite}\r\nContent-Disposition: form-data; name="{nombre}"\r\n\r\n'
+                      f'{valor}\r\n'.encode())
+    for nombre, (archivo, contenido, tipo) in archivos.items():
+        partes.append(f'--{limite}\r\nContent-Disposition: form-data; name="{nombre}"; '
+                      f'filename="{archivo}"\r\nContent-Type: {tipo}\r\n\r\n'.encode()
+                      + contenido + b'\r\n')
+    partes.append(f'--{limite}--\r\n'.encode())
+    return b''.join(partes), f'multipart/form-data; boundary={limite}'
@@ -0,0 +1,141 @@
+"""
+============================================================
+  CARGA: flujos de cada perfil
+============================================================
+
+Cada flujo es la secuencia de páginas que recorre una persona real, con
+tiempos de lectura exponenciales entre pasos (media --pensar). Las rutas
+y los campos son los de las vistas y formularios del proyecto.
+"""
+import itertools
+import re
+import threading
+import time
+
+from .cliente import FlujoInterrumpido
+
+PDF = (b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n'
+       b'2 0 obj<</Type/Pages/Kids[]/Count 0>>endobj\ntrailer<</Root 1 0 R>>\n%%EOF\n')
+
+_OPCIONES  = re.compile(r'<option value="(\d+)"')
+_SUBIDAS   = re.compile(r'/documentos/matricula/\d+/subir/(\d+)/')
+_DETALLES  = re.compile(r'href="/matriculas/(\d+)/"')
+
+
+class Contexto:
+    """Parámetros de la ejecución compartidos por todos los usuarios virtuales."""
+
+    def __init__(self, args):
+        self.clave      = args.clave
+        self.pensar     = args.pensar
+        self.sondeos    = args.sondeos
+        self.intervalo  = args.intervalo_sondeo
+        self.panel      = args.panel
+        self.revisiones = args.revisiones
+        self.ejecucion  = time.strftime('%m%d%H%M%S')
+        self.secretarias = args.cuentas_secretarias
+        self._padres    = iter(range(args.cuentas_padres))
+        self._registros = itertools.count()
+        self._candado   = threading.Lock()
+
+    def siguiente_padre(self):
+        """Cuenta preparada aún sin usar, o None si se agotaron."""
+        with self._candado:
+            return next(self._padres, None)
+
+    def siguiente_registro(self):
+        with self._candado:
+            return next(self._registros)
+
+
+def _pausa(ctx, rng):
+    if ctx.pensar:
+        time.sleep(rng.expovariate(1 / ctx.pensar))
+
+
+def _opciones(html, campo):
+    bloque = re.search(rf'<select[^>]*name="{campo}"[^>]*>(.*?)</select>', html, re.S)
+    return _OPCIONES.findall(bloque.group(1)) if bloque else []
+
+
+def _login(sesion, ctx, rng, usuario):
+    sesion.get('login_form', '/usuarios/login/')
+    _pausa(ctx, rng)
+    sesion.post('login', '/usuarios/login/', {'username': usuario, 'password': ctx.clave})
+
+
+# ─── Perfiles ─────────────────────────────────────────────────────────────────
+
+def registro(sesion, ctx, rng):
+    """Representante nuevo: crea su cuenta e inicia sesión."""
+    n = ctx.siguiente_registro()
+    usuario = f'carga-reg-{ctx.ejecucion}-{n}'
+    sesion.get('registro_form', '/usuarios/registro/')
+    _pausa(ctx, rng)
+    sesion.post('registro', '/usuarios/registro/', {
+        'username': usuario, 'first_name': 'Representante', 'last_name': f'Carga {n}',
+        'email': f'{usuario}@carga.invalid', 'password1': ctx.clave, 'password2': ctx.clave,
+        'ciudad': 'Quito',
+    })
+    _login(sesion, ctx, rng, usuario)
+    sesion.get('tablero_representante', '/usuarios/dashboard/representante/')
+
+
+def padre(sesion, ctx, rng):
+    """Representante con un estudiante: solicita la matrícula, sube documentos y sondea."""
+    n = ctx.siguiente_padre()
+    if n is None:
+        raise FlujoInterrumpido('cuentas de padres agotadas (preparar --padres)')
+    _login(sesion, ctx, rng, f'carga-p{n}')
+    sesion.get('tablero_representante', '/usuarios/dashboard/representante/')
+    _pausa(ctx, rng)
+
+    html = sesion.get('matricula_form', '/matriculas/nueva/').cuerpo.decode()
+    estudiantes, paralelos = _opciones(html, 'estudiante'), _opciones(html, 'paralelo')
+    if not estudiantes or not paralelos:
+        raise FlujoInterrumpido('formulario de matrícula sin estudiantes o sin paralelos abiertos')
+    _pausa(ctx, rng)
+    respuesta = sesion.post('matricula_crear', '/matriculas/nueva/', {
+        'estudiante': estudiantes[0], 'paralelo': rng.choice(paralelos), 'tipo': 'NUEVA',
+    })
+    detalle = sesion.ubicacion(respuesta)
+    pk = re.search(r'/matriculas/(\d+)/', detalle)
+    if not pk:
+        raise FlujoInterrumpido('la solicitud no redirigió al detalle (formulario inválido)')
+    pk = pk.group(1)
+    sesion.get('matricula_detalle', detalle)
+
+    documentos = sesion.get('documentos_lista', f'/documentos/matricula/{pk}/').cuerpo.decode()
+    for tipo in dict.fromkeys(_SUBIDAS.findall(documentos)):
+        _pausa(ctx, rng)
+        ruta = f'/documentos/matricula/{pk}/subir/{tipo}/'
+        sesion.get('documento_form', ruta)
+        sesion.post('documento_subir', ruta,
+                    archivos={'archivo': (f'documento_{tipo}.pdf', PDF, 'application/pdf')})
+
+    etag = None
+    for _ in range(ctx.sondeos):
+        time.sleep(rng.expovariate(1 / ctx.intervalo))
+        respuesta = sesion.get('estado_sondeo', f'/matriculas/api/estado/{pk}/',
+                               cabeceras={'If-None-Match': etag} if etag else None,
+                               esperados=(200, 304))
+        etag = respuesta.cabeceras.get('ETag', etag)
+
+
+def secretaria(sesion, ctx, rng):
+    """Secretaría: toma solicitudes pendientes, revisa sus documentos y las aprueba."""
+    _login(sesion, ctx, rng, f'carga-s{rng.randrange(ctx.secretarias)}')
+    html = sesion.get('panel', ctx.panel).cuerpo.decode()
+    pendientes = list(dict.fromkeys(_DETALLES.findall(html)))
+    rng.shuffle(pendientes)
+    for pk in pendientes[:ctx.revisiones]:
+        _pausa(ctx, rng)
+        sesion.get('matricula_detalle', f'/matriculas/{pk}/')
+        sesion.post('iniciar_revision', f'/matriculas/{pk}/iniciar-revision/')
+        sesion.get('documentos_lista', f'/documentos/matricula/{pk}/')
+        _pausa(ctx, rng)
+        sesion.post('aprobar', f'/matriculas/{pk}/aprobar/')
+        sesion.get('panel', ctx.panel)
+
+
+PERFILES = {'registro': registro, 'padre': padre, 'secretaria': secretaria}
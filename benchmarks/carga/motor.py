@@ -0,0 +1,155 @@
+"""
+============================================================
+  CARGA: llegadas de Poisson y estadísticas
+============================================================
+"""
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from .cliente import FlujoInterrumpido, Sesion
+
+
+def percentil(valores, p):
+    return valores[max(math.ceil(p / 100 * len(valores)) - 1, 0)] if valores else 0.0
+
+
+class Estadisticas:
+    """Latencias por etiqueta de paso, códigos de estado, errores y flujos."""
+
+    def __init__(self):
+        self._candado  = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.errores   = defaultdict(Counter)
+        self.estados   = Counter()
+        self.flujos    = defaultdict(Counter)
+        self.motivos   = Counter()
+        self.descartadas = Counter()
+
+    def registrar(self, etiqueta, segundos, estado, error=False):
+        with self._candado:
+            self.latencias[etiqueta].append(segundos)
+            self.estados[estado] += 1
+            if error or estado == 0:
+                self.errores[etiqueta][estado] += 1
+
+    def flujo(self, perfil, completo, motivo=None):
+        with self._candado:
+            self.flujos[perfil]['completos' if completo else 'interrumpidos'] += 1
+            if motivo:
+                self.motivos[motivo] += 1
+
+    def total(self):
+        with self._candado:
+            return sum(self.estados.values()), sum(sum(c.values()) for c in self.errores.values())
+
+    def resumen(self, segundos):
+        with self._candado:
+            pasos = {}
+            for etiqueta, valores in sorted(self.latencias.items()):
+                ordenados = sorted(valores)
+                errores = sum(self.errores[etiqueta].values())
+                pasos[etiqueta] = {
+                    'peticiones': len(ordenados),
+                    'errores':    errores,
+                    'tasa_error': round(errores / len(ordenados), 4),
+                    'p50_ms':     round(percentil(ordenados, 50) * 1000, 1),
+                    'p95_ms':     round(percentil(ordenados, 95) * 1000, 1),
+                    'p99_ms':     round(percentil(ordenados, 99) * 1000, 1),
+                    'max_ms':     round(ordenados[-1] * 1000, 1),
+                }
+            todas = sorted(v for valores in self.latencias.values() for v in valores)
+            peticiones = len(todas)
+            errores = sum(p['errores'] for p in pasos.values())
+            return {
+                'segundos':       round(segundos, 1),
+                'peticiones':     peticiones,
+                'por_segundo':    round(peticiones / segundos, 2) if segundos else 0,
+                'errores':        errores,
+                'tasa_error':     round(errores / peticiones, 4) if peticiones else 0,
+                'p50_ms':         round(percentil(todas, 50) * 1000, 1),
+                'p95_ms':         round(percentil(todas, 95) * 1000, 1),
+                'p99_ms':         round(percentil(todas, 99) * 1000, 1),
+                'estados':        {str(k): v for k, v in sorted(self.estados.items())},
+                'pasos':          pasos,
+                'flujos':         {k: dict(v) for k, v in self.flujos.items()},
+                'motivos':        dict(self.motivos.most_common(10)),
+                'descartadas':    dict(self.descartadas),
+            }
+
+
+class Generador:
+    """
+    Lanza sesiones de cada perfil según un proceso de Poisson de tasa
+    `tasa` (llegadas por segundo), con rampa lineal opcional al inicio.
+    Si ya hay `max_usuarios` sesiones en curso la llegada se descarta y se
+    cuenta: el generador está saturado y el resultado subestima la carga.
+    """
+
+    def __init__(self, base, perfiles, ctx, duracion, rampa=0, max_usuarios=500,
+                 semilla=None, timeout=30):
+        self.base, self.perfiles, self.ctx = base, perfiles, ctx
+        self.duracion, self.rampa, self.timeout = duracion, rampa, timeout
+        self.max_usuarios = max_usuarios
+        self.semilla      = semilla
+        self.estadisticas = Estadisticas()
+        self._en_curso    = 0
+        self._candado     = threading.Lock()
+        self._fin         = threading.Event()
+
+    @property
+    def en_curso(self):
+        return self._en_curso
+
+    def _sesion(self, perfil, flujo, rng):
+        try:
+            flujo(Sesion(self.base, self.estadisticas, self.timeout), self.ctx, rng)
+            self.estadisticas.flujo(perfil, True)
+        except FlujoInterrumpido as e:
+            self.estadisticas.flujo(perfil, False, str(e))
+        except Exception as e:   # un fallo del generador no debe detener la prueba
+            self.estadisticas.flujo(perfil, False, f'{type(e).__name__}: {e}')
+        finally:
+            with self._candado:
+                self._en_curso -= 1
+
+    def _llegadas(self, perfil, tasa, pool, inicio, rng):
+        flujo, t = self.perfiles[perfil], 0.0
+        while True:
+            t += rng.expovariate(tasa)
+            if t >= self.duracion or self._fin.wait(max(inicio + t - time.monotonic(), 0)):
+                return
+            if self.rampa and t < self.rampa and rng.random() > t / self.rampa:
+                continue
+            with self._candado:
+                if self._en_curso >= self.max_usuarios:
+                    self.estadisticas.descartadas[perfil] += 1
+                    continue
+                self._en_curso += 1
+            pool.submit(self._sesion, perfil, flujo, random.Random(rng.random()))
+
+    def ejecutar(self, tasas, informar=None, cada=10):
+        """Corre la prueba; `informar(segundos, generador)` se llama cada `cada` segundos."""
+        rng = random.Random(self.semilla)
+        inicio = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_usuarios) as pool:
+            hilos = [threading.Thread(target=self._llegadas, daemon=True,
+                                      args=(perfil, tasa, pool, inicio, random.Random(rng.random())))
+                     for perfil, tasa in tasas.items() if tasa > 0]
+            for hilo in hilos:
+                hilo.start()
+            try:
+                while any(h.is_alive() for h in hilos):
+                    if self._fin.wait(cada):
+                        break
+                    if informar:
+                        informar(time.monotonic() - inicio, self)
+            except KeyboardInterrupt:
+                self._fin.set()
+            for hilo in hilos:
+                hilo.join()
+            # Las sesiones en curso terminan (el pool espera al salir del with)
+        return self.estadisticas.resumen(time.monotonic() - inicio)
@@ -0,0 +1,76 @@
+"""
+============================================================
+  CARGA: preparación de la base
+============================================================
+
+Crea (o reutiliza) las cuentas carga-p<n>, cada una con un estudiante, y
+las secretarias carga-s<n>, todas con la misma contraseña. Borra lo que
+dejó una prueba anterior: las matrículas de esas cuentas en el período
+activo y los representantes registrados por el perfil `registro`.
+"""
+from datetime import timedelta
+
+
+def preparar(args):
+    from django.conf import settings
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+    from django.utils import timezone
+
+    from apps.core.management.commands.generar_datos_sinteticos import cedula_valida
+    from apps.estudiantes.models import Estudiante
+    from apps.matriculas.models import Matricula
+    from apps.periodos.models import PeriodoAcademico
+    from apps.usuarios.models import Usuario
+
+    if not settings.DEBUG and not args.forzar:
+        raise SystemExit('DEBUG=False: use --forzar si realmente quiere preparar esta base.')
+    periodo = PeriodoAcademico.get_activo()
+    if periodo is None:
+        raise SystemExit('No hay período activo: cargue datos con generar_datos_sinteticos.')
+
+    hoy = timezone.localdate()
+    if args.abrir_ventana and not periodo.matriculas_abiertas:
+        periodo.fecha_inicio_matriculas = hoy
+        periodo.fecha_fin_matriculas    = hoy + timedelta(days=7)
+        periodo.save()
+        print(f'Matrículas de {periodo} abiertas hasta {periodo.fecha_fin_matriculas}.')
+    elif not periodo.matriculas_abiertas:
+        print(f'Aviso: las matrículas de {periodo} están cerradas; el perfil padre fallará '
+              f'(use --abrir-ventana).')
+
+    clave = make_password(args.clave)
+    with transaction.atomic():
+        borradas, _ = Matricula.objects.filter(
+            periodo=periodo, solicitante__username__startswith='carga-p').delete()
+        registrados, _ = Usuario.objects.filter(username__startswith='carga-reg-').delete()
+
+        existentes = set(Usuario.objects.filter(username__startswith='carga-')
+                         .values_list('username', flat=True))
+        secretarias = [
+            Usuario(username=f'carga-s{n}', email=f'carga-s{n}@carga.invalid',
+                    first_name='Secretaria', last_name=f'Carga {n}', password=clave,
+                    rol=Usuario.ROL_SECRETARIA, is_staff=True, is_verified=True)
+            for n in range(args.secretarias) if f'carga-s{n}' not in existentes
+        ]
+        padres = [
+            Usuario(username=f'carga-p{n}', email=f'carga-p{n}@carga.invalid',
+                    first_name='Representante', last_name=f'Carga {n}', password=clave,
+                    rol=Usuario.ROL_REPRESENTANTE, is_verified=True)
+            for n in range(args.padres) if f'carga-p{n}' not in existentes
+        ]
+        Usuario.objects.bulk_create(secretarias + padres, batch_size=2000)
+        Usuario.objects.filter(username__startswith='carga-').update(password=clave)
+        # Cédulas del final del espacio sintético: no chocan con generar_datos_sinteticos
+        Estudiante.objects.bulk_create([
+            Estudiante(nombres='Estudiante', apellidos=f'Carga {p.username[7:]}',
+                       cedula=cedula_valida(143_000_000 + int(p.username[7:])),
+                       fecha_nacimiento=hoy.replace(year=hoy.year - 6), genero='F',
+                       representante=p)
+            for p in padres
+        ], batch_size=2000)
+
+    print(f'{len(padres)} padres y {len(secretarias)} secretarias creados; '
+          f'{borradas} filas de matrículas previas y {registrados} de registros previos borradas. '
+          f'Use --cuentas-padres {args.padres} --cuentas-secretarias {args.secretarias} '
+          f'al ejecutar.')
@@ -0,0 +1,311 @@
+"""
+============================================================
+  BENCHMARKS: ejecutor y comparación con la línea base
+============================================================
+
+Uso:
+    python -m benchmarks.ejecutar [--escalas 1000,5000] [--iteraciones 30]
+        [--calentamiento 3] [--anios 3] [--archivar] [--procesos 4]
+        [--solo panel_secretaria,...] [--salida archivo.json]
+        [--linea-base benchmarks/linea_base.json] [--tolerancia 0.25]
+        [--guardar-linea-base] [--sin-comparar]
+
+Por cada escala crea la base de pruebas, la migra, genera los datos con
+generar_datos_sinteticos (semilla fija), ejecuta los escenarios con
+django.test.Client y DEBUG=False, y destruye la base. El resultado se
+guarda en JSON (por defecto benchmarks/resultados/<fecha>.json).
+
+Con --archivar, antes de medir se pasan todos los períodos cerrados por
+`archivar_periodo`, como se haría en producción al cerrar cada año. La
+línea base de diez años se registra así:
+
+    python -m benchmarks.ejecutar --anios 10 --archivar \
+        --linea-base benchmarks/linea_base_10_anios.json --guardar-linea-base
+
+Sus consultas deben coincidir con las de linea_base.json (tres años sin
+archivar) y sus tiempos quedar en el mismo orden: tras archivar, las
+tablas calientes solo guardan el año activo, sin importar cuántos años
+cerrados haya.
+
+Comparación con la línea base, por escala y escenario:
+
+  - consultas: cualquier aumento del máximo es una regresión; no dependen
+    de la máquina, así que la comparación vale en cualquier entorno;
+  - tiempos: p50 o p95 más de `--tolerancia` por encima de la línea base.
+    Solo son comparables en la misma máquina: si el entorno difiere se
+    informan pero no cuentan como regresión.
+
+Sale con código 1 si hay regresiones. Para actualizar la línea base tras
+una mejora (o un cambio aceptado), correr con --guardar-linea-base en la
+máquina de referencia y confirmar el JSON junto con el cambio.
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+LINEA_BASE = Path(__file__).resolve().parent / 'linea_base.json'
+RESULTADOS = Path(__file__).resolve().parent / 'resultados'
+CLAVE = 'sinteticos'
+SEMILLA = 1
+
+
+def configurar_django():
+    sys.path.insert(0, str(RAIZ))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+    import django
+    django.setup()
+    # Las advertencias de N+1 del middleware se repetirían en cada iteración;
+    # el resultado ya informa las consultas de cada escenario
+    logging.getLogger('apps.core.instrumentacion').setLevel(logging.ERROR)
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano de una lista ordenada."""
+    return valores[max(math.ceil(p / 100 * len(valores)) - 1, 0)]
+
+
+def entorno():
+    import django
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute('SHOW server_version' if connection.vendor == 'postgresql'
+                       else 'SELECT 1')
+        version_db = cursor.fetchone()[0]
+    return {
+        'python':   platform.python_version(),
+        'django':   django.get_version(),
+        'base':     f'{connection.vendor} {version_db}',
+        'sistema':  platform.platform(terse=True),
+        'cpu':      platform.processor() or platform.machine(),
+        'nucleos':  os.cpu_count(),
+    }
+
+
+# ─── Medición ─────────────────────────────────────────────────────────────────
+
+def medir(escenario, datos, iteraciones, calentamiento):
+    from apps.core.instrumentacion import registrar_consultas
+
+    peticion = escenario.preparar(datos)
+    if escenario.iteraciones:
+        iteraciones = min(iteraciones, escenario.iteraciones)
+    for i in range(calentamiento):
+        peticion(i)
+
+    tiempos, consultas = [], []
+    for i in range(calentamiento, calentamiento + iteraciones):
+        with registrar_consultas() as registro:
+            inicio = time.perf_counter()
+            response = peticion(i)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        if response.status_code not in escenario.estados:
+            raise RuntimeError(f'{escenario.nombre}: respuesta {response.status_code}, '
+                               f'se esperaba {escenario.estados}')
+        consultas.append(registro.total)
+
+    tiempos.sort()
+    consultas.sort()
+    return {
+        'iteraciones':       iteraciones,
+        'p50_ms':            round(percentil(tiempos, 50), 2),
+        'p95_ms':            round(percentil(tiempos, 95), 2),
+        'p99_ms':            round(percentil(tiempos, 99), 2),
+        'max_ms':            round(tiempos[-1], 2),
+        'media_ms':          round(sum(tiempos) / len(tiempos), 2),
+        'consultas_mediana': percentil(consultas, 50),
+        'consultas_max':     consultas[-1],
+    }
+
+
+def ejecutar_escala(escala, args, escenarios):
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection
+    from django.template import TemplateDoesNotExist
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    from .escenarios import Datos
+
+    nombre_original = connection.settings_dict['NAME']
+    print(f'\n── Escala {escala} estudiantes ──')
+    _descartar_caches()
+    setup_test_environment(debug=False)
+    nombre = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    # Los procesos del generador creados con 'spawn' releen la configuración
+    os.environ['DB_NAME'] = nombre
+    try:
+        inicio = time.monotonic()
+        call_command('generar_datos_sinteticos', estudiantes=escala, anios=args.anios,
+                     procesos=args.procesos, semilla=SEMILLA, clave=CLAVE, forzar=True,
+                     stdout=open(os.devnull, 'w'))
+        print(f'  datos generados en {time.monotonic() - inicio:.0f} s')
+        if args.archivar:
+            inicio = time.monotonic()
+            cerrados = _archivar_cerrados()
+            print(f'  {cerrados} períodos cerrados archivados en {time.monotonic() - inicio:.0f} s')
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        datos = Datos(CLAVE)
+        resultado = {'escenarios': {}, 'omitidos': {}, 'filas': _filas()}
+        for escenario in escenarios:
+            try:
+                medicion = medir(escenario, datos, args.iteraciones, args.calentamiento)
+            except (ImportError, TemplateDoesNotExist) as e:
+                # DRF no instalado o una vista cuya plantilla falta en el árbol
+                motivo = f'{type(e).__name__}: {e}'
+                resultado['omitidos'][escenario.nombre] = motivo
+                print(f'  {escenario.nombre:<22} omitido ({motivo})')
+                continue
+            resultado['escenarios'][escenario.nombre] = medicion
+            print(f'  {escenario.nombre:<22} p50 {medicion["p50_ms"]:>8.1f} ms   '
+                  f'p95 {medicion["p95_ms"]:>8.1f} ms   p99 {medicion["p99_ms"]:>8.1f} ms   '
+                  f'{medicion["consultas_max"]:>3} consultas')
+        return resultado
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        os.environ['DB_NAME'] = nombre_original
+        teardown_test_environment()
+        settings.DATABASES['default']['NAME'] = nombre_original
+
+
+def _descartar_caches():
+    """Las caches del proceso guardan pk de la base anterior, que se reutilizan."""
+    from django.core.cache import cache
+    from apps.core import catalogos, configuracion, utils
+    from apps.notificaciones import plantillas
+    cache.clear()
+    plantillas.invalidar()
+    catalogos.NIVELES.descartar()
+    catalogos.TIPOS_DOCUMENTO.descartar()
+    configuracion.descartar()
+    utils._ANIO_POR_PERIODO.clear()
+
+
+def _archivar_cerrados():
+    """Archiva los períodos no activos, del más antiguo al más reciente."""
+    from django.core.management import call_command
+    from apps.periodos.models import PeriodoAcademico
+    cerrados = list(PeriodoAcademico.objects.filter(es_activo=False)
+                    .order_by('fecha_inicio').values_list('pk', flat=True))
+    for periodo_id in cerrados:
+        # Las renovaciones del año siguiente referencian las matrículas archivadas
+        call_command('archivar_periodo', periodo_id, desvincular=True,
+                     stdout=open(os.devnull, 'w'))
+    return len(cerrados)
+
+
+def _filas():
+    from apps.documentos.models import DocumentoMatricula
+    from apps.estudiantes.models import Estudiante
+    from apps.matriculas.models import HistorialMatricula, Matricula, MatriculaArchivada
+    from apps.notificaciones.models import Notificacion
+    return {modelo._meta.model_name: modelo.objects.count()
+            for modelo in (Estudiante, Matricula, HistorialMatricula,
+                           DocumentoMatricula, Notificacion, MatriculaArchivada)}
+
+
+# ─── Comparación ──────────────────────────────────────────────────────────────
+
+def comparar(actual, base, tolerancia):
+    """Imprime la comparación y devuelve la cantidad de regresiones."""
+    mismo_entorno = all(actual['entorno'].get(k) == base['entorno'].get(k)
+                        for k in ('cpu', 'nucleos', 'sistema', 'base'))
+    print(f'\n── Comparación con la línea base del {base["fecha"][:10]} ──')
+    if not mismo_entorno:
+        print('  Entorno distinto al de la línea base: los tiempos se informan pero '
+              'solo las consultas cuentan como regresión.')
+    regresiones = 0
+    for escala, medido in actual['escalas'].items():
+        referencia = base['escalas'].get(escala)
+        if referencia is None:
+            print(f'  escala {escala}: sin línea base')
+            continue
+        for nombre, m in medido['escenarios'].items():
+            r = referencia['escenarios'].get(nombre)
+            if r is None:
+                print(f'  {escala:>7} {nombre:<22} sin línea base')
+                continue
+            avisos = []
+            if m['consultas_max'] > r['consultas_max']:
+                avisos.append(f'consultas {r["consultas_max"]} → {m["consultas_max"]}')
+                regresiones += 1
+            for campo in ('p50_ms', 'p95_ms'):
+                if m[campo] > r[campo] * (1 + tolerancia):
+                    avisos.append(f'{campo} {r[campo]:.1f} → {m[campo]:.1f}')
+                    regresiones += mismo_entorno
+            cambio = (m['p95_ms'] / r['p95_ms'] - 1) * 100 if r['p95_ms'] else 0
+            print(f'  {escala:>7} {nombre:<22} p95 {cambio:+6.1f}%   consultas '
+                  f'{r["consultas_max"]:>3} → {m["consultas_max"]:<3}'
+                  + (f'   REGRESIÓN: {"; ".join(avisos)}' if avisos else ''))
+    return regresiones
+
+
+# ─── Punto de entrada ─────────────────────────────────────────────────────────
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de las rutas críticas.')
+    parser.add_argument('--escalas', default='1000,5000',
+                        help='Estudiantes por escala, separados por coma (default: 1000,5000).')
+    parser.add_argument('--iteraciones', type=int, default=30)
+    parser.add_argument('--calentamiento', type=int, default=3)
+    parser.add_argument('--anios', type=int, default=3)
+    parser.add_argument('--archivar', action='store_true',
+                        help='Archiva los períodos cerrados antes de medir.')
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--solo', help='Escenarios a ejecutar, separados por coma.')
+    parser.add_argument('--salida', help='Archivo JSON de resultados.')
+    parser.add_argument('--linea-base', default=str(LINEA_BASE))
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help='Aumento de p50/p95 tolerado, como fracción (default: 0.25).')
+    parser.add_argument('--guardar-linea-base', action='store_true',
+                        help='Escribe el resultado como nueva línea base.')
+    parser.add_argument('--sin-comparar', action='store_true')
+    args = parser.parse_args(argv)
+
+    configurar_django()
+    from .escenarios import ESCENARIOS
+
+    escenarios = ESCENARIOS
+    if args.solo:
+        nombres = set(args.solo.split(','))
+        escenarios = [e for e in ESCENARIOS if e.nombre in nombres]
+        if desconocidos := nombres - {e.nombre for e in escenarios}:
+            parser.error(f'escenarios desconocidos: {", ".join(sorted(desconocidos))}')
+
+    resultado = {
+        'fecha':      datetime.now().isoformat(timespec='seconds'),
+        'entorno':    entorno(),
+        'parametros': {'iteraciones': args.iteraciones, 'calentamiento': args.calentamiento,
+                       'anios': args.anios, 'archivado': args.archivar,
+                       'semilla': SEMILLA},
+        'escalas':    {},
+    }
+    for escala in sorted(int(e) for e in args.escalas.split(',')):
+        resultado['escalas'][str(escala)] = ejecutar_escala(escala, args, escenarios)
+
+    destino = Path(args.linea_base if args.guardar_linea_base else
+                   args.salida or RESULTADOS / f'{datetime.now():%Y%m%d-%H%M%S}.json')
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    destino.write_text(json.dumps(resultado, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    print(f'\nResultados en {destino}')
+
+    if args.guardar_linea_base or args.sin_comparar or not Path(args.linea_base).exists():
+        return 0
+    base = json.loads(Path(args.linea_base).read_text(encoding='utf-8'))
+    regresiones = comparar(resultado, base, args.tolerancia)
+    print(f'\n{regresiones} regresiones.' if regresiones else '\nSin regresiones.')
+    return 1 if regresiones else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+============================================================
+  BENCHMARKS: escenarios
+============================================================
+
+Cada escenario recibe los Datos de la escala y devuelve una función
+`peticion(i)` que ejecuta la i-ésima petición y devuelve la respuesta.
+La preparación (login, elección de registros) no se mide.
+"""
+from collections import namedtuple
+
+from django.test import Client
+from django.urls import reverse
+
+Escenario = namedtuple('Escenario', 'nombre descripcion preparar estados iteraciones')
+
+ESCENARIOS = []
+
+
+def escenario(nombre, descripcion, estados=(200,), iteraciones=None):
+    """Registra un escenario. `iteraciones` limita las del escenario (p. ej. login)."""
+    def registrar(preparar):
+        ESCENARIOS.append(Escenario(nombre, descripcion, preparar, tuple(estados), iteraciones))
+        return preparar
+    return registrar
+
+
+class Datos:
+    """Usuarios y registros de la escala cargada, elegidos una vez tras la carga."""
+
+    def __init__(self, clave):
+        from apps.matriculas.models import Matricula
+        from apps.periodos.models import PeriodoAcademico
+        from apps.usuarios.models import Usuario
+
+        self.clave   = clave
+        self.periodo = PeriodoAcademico.get_activo()
+        self.admin   = Usuario.objects.create_superuser(
+            'bench-admin', 'bench-admin@sinteticos.invalid', clave, rol=Usuario.ROL_ADMIN)
+        self.secretaria = (Usuario.objects.filter(rol=Usuario.ROL_SECRETARIA, is_staff=True)
+                           .order_by('pk').first())
+        self.representantes = list(Usuario.objects.filter(rol=Usuario.ROL_REPRESENTANTE)
+                                   .order_by('pk').values_list('username', flat=True)[:200])
+        actuales = Matricula.objects.filter(periodo=self.periodo).order_by('pk')
+        self.matriculas  = list(actuales.values_list('pk', flat=True)[:200])
+        self.en_revision = list(actuales.filter(estado=Matricula.ESTADO_EN_REVISION)
+                                .values_list('pk', flat=True))
+        # Un apellido frecuente: la búsqueda devuelve varias páginas
+        self.apellido = (actuales.values_list('estudiante__apellidos', flat=True)
+                         .first() or 'García').split()[0]
+
+    def cliente(self, usuario):
+        cliente = Client()
+        cliente.force_login(usuario)
+        return cliente
+
+
+# ─── Secretaría ───────────────────────────────────────────────────────────────
+
+@escenario('panel_secretaria', 'PanelSecretariaView, primera página sin filtros')
+def panel_secretaria(datos):
+    cliente, url = datos.cliente(datos.secretaria), reverse('matriculas:panel_secretaria')
+    return lambda i: cliente.get(url)
+
+
+@escenario('busqueda_matriculas', 'MatriculaListView con ?q=<apellido> (icontains sin índice)')
+def busqueda_matriculas(datos):
+    cliente, url = datos.cliente(datos.secretaria), reverse('matriculas:lista')
+    return lambda i: cliente.get(url, {'q': datos.apellido})
+
+
+@escenario('documentos_matricula', 'DocumentosMatriculaView de matrículas del período activo')
+def documentos_matricula(datos):
+    cliente = datos.cliente(datos.secretaria)
+    urls = [reverse('documentos:lista', args=[pk]) for pk in datos.matriculas]
+    return lambda i: cliente.get(urls[i % len(urls)])
+
+
+@escenario('aprobar', 'AprobarMatriculaView sobre matrículas EN_REVISION distintas',
+           estados=(302,))
+def aprobar(datos):
+    cliente = datos.cliente(datos.secretaria)
+    urls = [reverse('matriculas:aprobar', args=[pk]) for pk in datos.en_revision]
+
+    def peticion(i):
+        if i >= len(urls):
+            raise RuntimeError(f'Solo hay {len(urls)} matrículas EN_REVISION para aprobar.')
+        return cliente.post(urls[i])
+    return peticion
+
+
+# ─── Administración y reportes ────────────────────────────────────────────────
+
+@escenario('dashboard_admin', 'DashboardAdminView con período activo')
+def dashboard_admin(datos):
+    cliente, url = datos.cliente(datos.admin), reverse('usuarios:dashboard-admin')
+    return lambda i: cliente.get(url)
+
+
+@escenario('nomina_matriculados', 'Reporte de matriculados por paralelo del período activo')
+def nomina_matriculados(datos):
+    cliente, url = datos.cliente(datos.admin), reverse('reportes:matriculados')
+    return lambda i: cliente.get(url)
+
+
+@escenario('paralelos_con_cupo', 'ParaleloViewSet.con_cupo (API, sin If-None-Match)')
+def paralelos_con_cupo(datos):
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from apps.periodos.views import ParaleloViewSet
+
+    vista   = ParaleloViewSet.as_view({'get': 'con_cupo'})
+    fabrica = APIRequestFactory()
+
+    def peticion(i):
+        request = fabrica.get('/api/paralelos/con-cupo/', HTTP_ACCEPT='application/json')
+        force_authenticate(request, user=datos.admin)
+        return vista(request).render()
+    return peticion
+
+
+# ─── Representantes ───────────────────────────────────────────────────────────
+
+@escenario('login', 'LoginView con credenciales válidas (incluye el hash de la contraseña)',
+           estados=(302,), iteraciones=20)
+def login(datos):
+    url = reverse('usuarios:login')
+    return lambda i: Client().post(url, {
+        'username': datos.representantes[i % len(datos.representantes)],
+        'password': datos.clave,
+    })
@@ -0,0 +1,123 @@
+"""
+============================================================
+  GUNICORN: perfil de producción de SFQ Matrículas
+============================================================
+
+    gunicorn -c config/gunicorn.py config.wsgi                  # páginas y API
+    GUNICORN_ASGI=1 gunicorn -c config/gunicorn.py config.asgi  # flujos SSE
+
+WSGI (por defecto): workers gthread, 2 × núcleos + 1 procesos con
+GUNICORN_THREADS hilos cada uno. Un hilo esperando a PostgreSQL o a la
+subida de un documento no bloquea al proceso. Cada hilo puede tener su
+conexión persistente (CONN_MAX_AGE): workers × hilos debe caber en el
+max_connections de PostgreSQL junto con el resto de servicios.
+
+ASGI (GUNICORN_ASGI=1): workers de uvicorn, uno por núcleo, solo para
+MatriculaEventosView. Cada cliente SSE es una cola en el difusor, no un
+hilo. Las vistas síncronas bajo ASGI comparten un único hilo por proceso:
+nginx envía aquí solo /matriculas/api/eventos/.
+
+preload_app carga Django una vez en el proceso maestro y los workers lo
+heredan por fork (memoria compartida y arranque rápido). Nada abre
+conexiones ni hilos al importar: el hilo LISTEN del difusor nace con el
+primer suscriptor. max_requests con jitter recicla los workers de forma
+escalonada para acotar el crecimiento de memoria sin reiniciarlos todos
+a la vez.
+
+Métricas: cada worker vuelca sus valores en METRICAS_DIR. Al morir un
+worker (reciclado o caída) el maestro suma su archivo a acumulado.json,
+así los contadores de /metricas/ no retroceden y el directorio no crece.
+
+Variables de entorno (todas opcionales):
+
+    GUNICORN_BIND            0.0.0.0:8000
+    GUNICORN_WORKERS         2 × núcleos + 1 (WSGI) o núcleos (ASGI)
+    GUNICORN_WORKERS_MAX     8, tope del cálculo automático
+    GUNICORN_THREADS         4
+    GUNICORN_TIMEOUT         60
+    GUNICORN_MAX_REQUESTS    1000
+    FORWARDED_ALLOW_IPS      127.0.0.1 (la IP de nginx si está en otra máquina)
+"""
+import os
+import shutil
+import tempfile
+
+
+def _entero(nombre, defecto):
+    return int(os.environ.get(nombre) or defecto)
+
+
+def _nucleos():
+    try:
+        return len(os.sched_getaffinity(0))   # respeta el límite de CPU del contenedor
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+ASGI    = os.environ.get('GUNICORN_ASGI', '').lower() in ('1', 'true', 'si', 'sí')
+NUCLEOS = _nucleos()
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.production')
+os.environ.setdefault('METRICAS_DIR', os.path.join(
+    tempfile.gettempdir(), f'sfq-metricas-{"asgi" if ASGI else "wsgi"}'))
+
+
+# ─── Procesos ─────────────────────────────────────────────────────────────────
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+if ASGI:
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers      = _entero('GUNICORN_WORKERS', NUCLEOS)
+else:
+    worker_class = 'gthread'
+    workers      = _entero('GUNICORN_WORKERS',
+                           min(2 * NUCLEOS + 1, _entero('GUNICORN_WORKERS_MAX', 8)))
+    threads      = _entero('GUNICORN_THREADS', 4)
+
+preload_app = True
+
+max_requests        = _entero('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = max_requests // 10
+
+
+# ─── Tiempos ──────────────────────────────────────────────────────────────────
+# nginx recibe el cuerpo completo de las subidas antes de pasarlas (20 MB
+# como máximo), así que `timeout` cubre el procesamiento, no la red del
+# cliente. graceful_timeout deja terminar las subidas en curso al recargar;
+# los flujos SSE se cortan y el navegador reconecta con Last-Event-ID.
+
+timeout          = _entero('GUNICORN_TIMEOUT', 60)
+graceful_timeout = 30
+keepalive        = 5     # mayor que 0: nginx reutiliza las conexiones al upstream
+
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1')
+
+accesslog = '-'
+errorlog  = '-'
+access_log_format = '%(h)s "%(r)s" %(s)s %(b)s %(M)sms'
+
+
+# ─── Ganchos ──────────────────────────────────────────────────────────────────
+
+def on_starting(server):
+    """Vacía METRICAS_DIR: los archivos de una ejecución anterior no son de estos procesos."""
+    carpeta = os.environ['METRICAS_DIR']
+    shutil.rmtree(carpeta, ignore_errors=True)
+    os.makedirs(carpeta, exist_ok=True)
+
+
+def pre_fork(server, worker):
+    # Una conexión abierta por el maestro no debe compartirse entre procesos
+    from django.db import connections
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    from apps.core import metricas
+    metricas.volcar(forzar=True)
+
+
+def child_exit(server, worker):
+    from apps.core import metricas
+    metricas.absorber(worker.pid)
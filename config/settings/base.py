@@ -44,10 +44,12 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'apps.core.instrumentacion.InstrumentacionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.admision.SalaEsperaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'axes.middleware.AxesMiddleware',
@@ -67,6 +69,8 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'apps.core.context_processors.school_info',
+                'apps.core.context_processors.configuracion',
+                'apps.notificaciones.context_processors.notificaciones',
             ],
         },
     },
@@ -133,3 +137,61 @@ AUTHENTICATION_BACKENDS = [
 # Axes - protecciÃ³n contra fuerza bruta
 AXES_FAILURE_LIMIT = 5
 AXES_COOLOFF_TIME = 1  # horas
+
+# DRF - ConflictoConcurrencia se responde con 409
+REST_FRAMEWORK = {
+    'EXCEPTION_HANDLER': 'apps.core.api.manejador_excepciones',
+}
+
+# Sala de espera (apps.core.admision): cupo = usuarios admitidos a la vez por clase
+ADMISION = {
+    'ACTIVA':        config('ADMISION_ACTIVA', default=True, cast=bool),
+    'DURACION_PASE': 900,   # segundos que dura la admisión de un usuario
+    'ABANDONO':      60,    # un turno sin sondeos en este lapso deja de contar
+    'SONDEO':        5,     # intervalo de sondeo de la página de espera
+    'CLASES': {
+        'matricula': {
+            'cupo':   config('ADMISION_CUPO_MATRICULA', default=150, cast=int),
+            'vistas': ['matriculas:crear', 'matriculas:editar', 'matriculas:reenviar'],
+        },
+        'documentos': {
+            'cupo':   config('ADMISION_CUPO_DOCUMENTOS', default=150, cast=int),
+            'vistas': ['documentos:lista', 'documentos:subir', 'documentos:eliminar'],
+        },
+        'paneles': {
+            'cupo':   config('ADMISION_CUPO_PANELES', default=300, cast=int),
+            'vistas': ['usuarios:dashboard-representante', 'matriculas:lista'],
+        },
+    },
+}
+
+# Claves de idempotencia de los POST (apps.core.idempotencia)
+IDEMPOTENCIA_TTL_HORAS = 24
+
+# Feed de cambios y webhooks (apps.matriculas.webhooks): antigüedad mínima de un
+# evento para servirlo, así no se saltan ids de transacciones aún sin confirmar
+EVENTOS_RETRASO_SEGUNDOS = 5
+
+# Notificaciones leídas más antiguas que esto se eliminan (purgar_notificaciones)
+NOTIFICACIONES_RETENCION_DIAS = 180
+
+# Novedades de un mismo representante dentro de esta ventana se entregan en un
+# solo resumen (apps.notificaciones.resumen); 0 = sin agrupar
+NOTIFICACIONES_AGRUPAR_MINUTOS = 10
+
+# Cada cuánto un proceso verifica si cambió ConfiguracionSistema (apps.core.configuracion)
+CONFIGURACION_REVISION_SEGUNDOS = 5
+
+# Consultas por petición (apps.core.instrumentacion): sobre estos umbrales se
+# registra una advertencia; el personal recibe la cabecera Server-Timing
+INSTRUMENTACION = {
+    'ACTIVA':           config('INSTRUMENTACION_ACTIVA', default=True, cast=bool),
+    'MAX_CONSULTAS':    50,
+    'MAX_REPETICIONES': 10,
+    'MAX_MS_DB':        500,
+}
+
+# Métricas (apps.core.metricas, /metricas/): con varios workers cada proceso
+# vuelca sus valores en este directorio. El token permite leerlas sin sesión.
+METRICAS_DIR   = config('METRICAS_DIR', default='') or None
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
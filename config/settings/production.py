@@ -22,6 +22,14 @@ CSRF_COOKIE_SECURE = False
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Conexiones persistentes: una por hilo de gunicorn (config/gunicorn.py).
+# El servicio ASGI usa DB_CONN_MAX_AGE=0: allí las vistas síncronas corren
+# en hilos de asgiref y una conexión persistente quedaría sin cerrar.
+DATABASES['default']['CONN_MAX_AGE']       = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+(BASE_DIR / 'logs').mkdir(exist_ok=True)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,